@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import hashlib
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import orjson
+from langgraph.checkpoint.base import Checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+
+from src.serde import REF_KEY, CompactRedisSaver, CompactSerializer
+from src.settings import settings
+
+from .fakes import create_fake_tools, load_fixtures
+from .run import DEFAULT_FIXTURES, build_system, percentile, wrap_tools
+
+# Savers are only used for their encode/decode methods, so nothing connects to this URL
+OFFLINE_REDIS_URL = "redis://localhost:6379"
+
+
+async def collect_checkpoints(fixtures: Path) -> list[tuple[str, Checkpoint]]:
+    """Every checkpoint written while answering each scenario once, with its thread"""
+    recorded, scenarios = load_fixtures(fixtures)
+    checkpointer = InMemorySaver()
+    tools = wrap_tools(create_fake_tools(recorded))
+
+    for scenario in scenarios:
+        system = build_system(scenario, tools, checkpointer, llm_latency=0)
+        await system.process_question(scenario.question, f"bench-{scenario.name}")
+
+    return [
+        (checkpoint_tuple.config["configurable"]["thread_id"], checkpoint_tuple.checkpoint)
+        async for checkpoint_tuple in checkpointer.alist(None)
+    ]
+
+
+def reference(values: dict[str, Any], thread: str, threshold: int, stored: set[str]) -> tuple[dict[str, Any], int]:
+    """What CompactRedisSaver.store_refs does without Redis: markers, plus the bytes of first-seen strings"""
+    added = 0
+    values = dict(values)
+
+    for channel, value in values.items():
+        if isinstance(value, str) and len(value) >= threshold:
+            key = f"{thread}:{hashlib.sha256(value.encode()).hexdigest()[:32]}"
+
+            if key not in stored:
+                stored.add(key)
+                added += len(value.encode())
+
+            values[channel] = {REF_KEY: key}
+
+    return values, added
+
+
+def measure(
+    name: str,
+    saver: AsyncRedisSaver,
+    checkpoints: list[tuple[str, Checkpoint]],
+    prepare: Callable[[str, Checkpoint], tuple[Checkpoint, int]],
+) -> None:
+    total = 0
+    encode: list[float] = []
+    decode: list[float] = []
+
+    for thread, checkpoint in checkpoints:
+        prepared, extra = prepare(thread, checkpoint)
+
+        started = time.perf_counter()
+        document = orjson.dumps(saver._dump_checkpoint(prepared))
+        encode.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        saver._recursive_deserialize(orjson.loads(document)["channel_values"])
+        decode.append(time.perf_counter() - started)
+
+        total += len(document) + extra
+
+    print(
+        f"{name:<22}{total / 1024:>10.1f}{total / len(checkpoints) / 1024:>10.1f}"
+        f"{percentile(encode, 0.5) * 1e3:>9.2f}{percentile(encode, 0.95) * 1e3:>9.2f}"
+        f"{percentile(decode, 0.5) * 1e3:>9.2f}{percentile(decode, 0.95) * 1e3:>9.2f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    checkpoints = await collect_checkpoints(args.fixtures)
+    json_saver = AsyncRedisSaver(OFFLINE_REDIS_URL)
+    compact_saver = CompactRedisSaver(
+        OFFLINE_REDIS_URL, serde=CompactSerializer(threshold=args.threshold, level=args.level)
+    )
+    stored: set[str] = set()
+
+    print(f"{len(checkpoints)} checkpoints, threshold {args.threshold} bytes, zstd level {args.level}\n")
+    print(f"{'format':<22}{'KiB':>10}{'KiB/ckpt':>10}{'enc p50':>9}{'enc p95':>9}{'dec p50':>9}{'dec p95':>9}  (ms)")
+
+    measure("json", json_saver, checkpoints, lambda _, checkpoint: (checkpoint, 0))
+    measure("zmsgpack", compact_saver, checkpoints, lambda _, checkpoint: (checkpoint, 0))
+
+    def with_refs(thread: str, checkpoint: Checkpoint) -> tuple[Checkpoint, int]:
+        values, added = reference(checkpoint["channel_values"], thread, args.ref_threshold, stored)
+        return {**checkpoint, "channel_values": values}, added
+
+    measure("zmsgpack + refs", compact_saver, checkpoints, with_refs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare checkpoint bytes and encode/decode time per serializer")
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES, help="Recorded tools and scenarios")
+    parser.add_argument("--threshold", type=int, default=settings.CHECKPOINT_COMPRESSION_THRESHOLD)
+    parser.add_argument("--level", type=int, default=settings.CHECKPOINT_COMPRESSION_LEVEL)
+    parser.add_argument("--ref-threshold", type=int, default=settings.CHECKPOINT_REF_THRESHOLD or 2**31)
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import Template
+from typing import Any, override
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel
+
+from src.tools import ToolOutput
+
+FAKE_MCP_SERVER = "fake-mcp"
+FAKE_MODEL_NAME = "fake-replay"
+CHARS_PER_TOKEN = 4
+
+TOOL_ARGS_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "context": {"type": "string"},
+        "namespace": {"type": "string"},
+        "kind": {"type": "string"},
+        "pod": {"type": "string"},
+    },
+}
+
+
+@dataclass(frozen=True)
+class RecordedTool:
+    """Replayed MCP tool: `lines` cycled `repeat` times with `$i` replaced by the row index"""
+
+    latency: float
+    repeat: int
+    lines: list[str]
+
+    def render(self) -> str:
+        templates = [Template(line) for line in self.lines]
+        return "\n".join(templates[i % len(templates)].substitute(i=i) for i in range(self.repeat))
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A question plus the scripted supervisor and worker responses that answer it"""
+
+    name: str
+    question: str
+    worker_rounds: list[list[dict[str, Any]]]
+    answer: str
+    structured: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+
+def load_fixtures(path: Path) -> tuple[dict[str, RecordedTool], list[Scenario]]:
+    data = json.loads(path.read_text())
+    tools = {name: RecordedTool(**spec) for name, spec in data["tools"].items()}
+    scenarios = [Scenario(**scenario) for scenario in data["scenarios"]]
+    return tools, scenarios
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    return sum(len(message.text()) for message in messages) // CHARS_PER_TOKEN
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model replaying a scenario with a fixed per-call latency.
+
+    Structured output calls return the scenario's payload for the requested schema. Plain calls act as the
+    react worker: one scripted round of tool calls per AI turn since the last human message, then the answer.
+    """
+
+    scenario: Scenario
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return FAKE_MODEL_NAME
+
+    @override
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Runnable:
+        return self.bind(**kwargs)
+
+    @override
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        model: type[BaseModel] = schema
+        return self.bind(structured_schema=model.__name__) | RunnableLambda(
+            lambda message: model.model_validate_json(message.text())
+        )
+
+    def reply(self, messages: list[BaseMessage], structured_schema: str | None = None) -> AIMessage:
+        tool_calls: list[dict[str, Any]] = []
+
+        if structured_schema:
+            content = json.dumps(self.scenario.structured.get(structured_schema, {}), ensure_ascii=False)
+        else:
+            turn = 0
+
+            for message in reversed(messages):
+                if isinstance(message, HumanMessage):
+                    break
+                if isinstance(message, AIMessage) and message.tool_calls:
+                    turn += 1
+
+            if turn < len(self.scenario.worker_rounds):
+                content = ""
+                tool_calls = [
+                    {"name": call["name"], "args": call["args"], "id": f"call-{turn}-{index}", "type": "tool_call"}
+                    for index, call in enumerate(self.scenario.worker_rounds[turn])
+                ]
+            else:
+                content = self.scenario.answer
+
+        input_tokens = estimate_tokens(messages)
+        output_tokens = (len(content) + len(json.dumps([call["args"] for call in tool_calls]))) // CHARS_PER_TOKEN
+
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": FAKE_MODEL_NAME},
+        )
+
+    @override
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self.reply(messages, kwargs.get("structured_schema")))])
+
+    @override
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self.reply(messages, kwargs.get("structured_schema")))])
+
+
+def create_fake_tools(recorded: dict[str, RecordedTool]) -> list[StructuredTool]:
+    """MCP-shaped tools that sleep for the recorded latency and return the recorded payload"""
+
+    def build(name: str, spec: RecordedTool) -> StructuredTool:
+        payload = spec.render()
+
+        async def coroutine(**_: Any) -> ToolOutput:
+            await asyncio.sleep(spec.latency)
+            return payload, None
+
+        return StructuredTool(
+            name=name,
+            description=f"Replayed {name} ({len(payload)} chars, {spec.latency}s)",
+            args_schema=TOOL_ARGS_SCHEMA,
+            coroutine=coroutine,
+            response_format="content_and_artifact",
+            metadata={"mcp_server": FAKE_MCP_SERVER},
+        )
+
+    return [build(name, spec) for name, spec in recorded.items()]
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, override
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.agent import SupervisorWorkerSystem
+from src.cache import create_tool_cache
+from src.digest import create_digester
+from src.settings import settings
+
+from .fakes import FakeChatModel, Scenario, create_fake_tools, load_fixtures
+
+DEFAULT_FIXTURES = Path(__file__).with_name("scenarios.json")
+
+
+class QuestionRecorder(AsyncCallbackHandler):
+    """Collects node wall times, LLM calls and tokens for one question"""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.started: dict[UUID, tuple[str, float]] = {}
+        self.node_times: dict[str, float] = defaultdict(float)
+        self.llm_calls = 0
+        self.tokens = 0
+
+    @override
+    async def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name")
+
+        if name and name == (metadata or {}).get("langgraph_node") and "langgraph_triggers" in (metadata or {}):
+            self.started[run_id] = (name, time.perf_counter())
+
+    @override
+    async def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id in self.started:
+            name, started = self.started.pop(run_id)
+            self.node_times[name] += time.perf_counter() - started
+
+    @override
+    async def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        await self.on_chain_end(None, run_id=run_id)
+
+    @override
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self.llm_calls += 1
+
+        for generations in response.generations:
+            for generation in generations:
+                match generation:
+                    case ChatGeneration(message=AIMessage(usage_metadata=dict(usage))):
+                        self.tokens += usage.get("total_tokens", 0)
+                    case _:
+                        pass
+
+
+recorder_var: ContextVar[QuestionRecorder | None] = ContextVar("benchmark_recorder", default=None)
+register_configure_hook(recorder_var, inheritable=True)
+
+
+@dataclass
+class QuestionStats:
+    scenario: str
+    wall_time: float
+    llm_calls: int
+    tokens: int
+    checkpoint_bytes: int
+    node_times: dict[str, float] = field(default_factory=dict)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def wrap_tools(tools: list[BaseTool]) -> list[BaseTool]:
+    """Apply the same cache and digest wrappers as the bot, driven by the same settings"""
+    if settings.TOOL_CACHE_ENABLED:
+        tools = create_tool_cache().wrap_tools(tools)
+
+    if settings.DIGEST_ENABLED:
+        tools = create_digester().wrap_tools(tools)
+
+    return tools
+
+
+def build_system(
+    scenario: Scenario,
+    tools: list[BaseTool],
+    checkpointer: BaseCheckpointSaver,
+    llm_latency: float,
+) -> SupervisorWorkerSystem:
+    model = FakeChatModel(scenario=scenario, latency=llm_latency)
+    return SupervisorWorkerSystem(
+        checkpointer, tools, supervisor_model=model, worker_model=model, evaluation_model=model
+    )
+
+
+async def checkpoint_size(checkpointer: BaseCheckpointSaver, thread_id: str) -> int:
+    checkpoint = await checkpointer.aget_tuple(RunnableConfig(configurable={"thread_id": thread_id}))
+
+    if not checkpoint:
+        return 0
+
+    _, payload = checkpointer.serde.dumps_typed(checkpoint.checkpoint)
+    return len(payload)
+
+
+async def ask(system: SupervisorWorkerSystem, scenario: Scenario, thread_id: str) -> QuestionStats:
+    """Run one question end to end through process_question and record its costs"""
+    recorder = QuestionRecorder()
+    token = recorder_var.set(recorder)
+
+    try:
+        started = time.perf_counter()
+        await system.process_question(scenario.question, thread_id)
+        wall_time = time.perf_counter() - started
+    finally:
+        recorder_var.reset(token)
+
+    return QuestionStats(
+        scenario=scenario.name,
+        wall_time=wall_time,
+        llm_calls=recorder.llm_calls,
+        tokens=recorder.tokens,
+        checkpoint_bytes=await checkpoint_size(system.checkpointer, thread_id),
+        node_times=dict(recorder.node_times),
+    )
+
+
+def report(stats: list[QuestionStats], batches: list[float], concurrency: int) -> None:
+    print(f"{'scenario':<26}{'n':>5}{'p50 s':>9}{'p95 s':>9}{'llm calls':>11}{'tokens':>10}{'ckpt KiB':>10}")
+
+    for scenario in sorted({s.scenario for s in stats}):
+        rows = [s for s in stats if s.scenario == scenario]
+        walls = [s.wall_time for s in rows]
+        print(
+            f"{scenario:<26}{len(rows):>5}{percentile(walls, 0.5):>9.3f}{percentile(walls, 0.95):>9.3f}"
+            f"{sum(s.llm_calls for s in rows) / len(rows):>11.1f}"
+            f"{sum(s.tokens for s in rows) / len(rows):>10.0f}"
+            f"{sum(s.checkpoint_bytes for s in rows) / len(rows) / 1024:>10.1f}"
+        )
+
+    node_times: dict[str, list[float]] = defaultdict(list)
+
+    for s in stats:
+        for node, seconds in s.node_times.items():
+            node_times[node].append(seconds)
+
+    print(f"\n{'node (total per question)':<26}{'n':>5}{'p50 s':>9}{'p95 s':>9}")
+
+    for node, times in sorted(node_times.items()):
+        print(f"{node:<26}{len(times):>5}{percentile(times, 0.5):>9.3f}{percentile(times, 0.95):>9.3f}")
+
+    if concurrency > 1:
+        questions = len(stats) / len(batches)
+        print(
+            f"\nconcurrency {concurrency}: {len(batches)} batches of {questions:.0f} questions, "
+            f"batch p50 {percentile(batches, 0.5):.3f}s, p95 {percentile(batches, 0.95):.3f}s, "
+            f"{len(stats) / sum(batches):.2f} questions/s"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    recorded, scenarios = load_fixtures(args.fixtures)
+
+    if args.scenario:
+        scenarios = [scenario for scenario in scenarios if scenario.name in args.scenario]
+
+    checkpointer = InMemorySaver()
+    tools = wrap_tools(create_fake_tools(recorded))
+    systems = {scenario.name: build_system(scenario, tools, checkpointer, args.llm_latency) for scenario in scenarios}
+
+    stats: list[QuestionStats] = []
+    batches: list[float] = []
+
+    for iteration in range(args.iterations):
+        round_id = "shared" if args.shared_threads else str(iteration)
+        jobs = [
+            ask(systems[scenario.name], scenario, f"bench-{scenario.name}-{round_id}-{slot}")
+            for scenario in scenarios
+            for slot in range(args.concurrency)
+        ]
+
+        started = time.perf_counter()
+
+        if args.concurrency > 1:
+            stats.extend(await asyncio.gather(*jobs))
+        else:
+            for job in jobs:
+                stats.append(await job)
+
+        batches.append(time.perf_counter() - started)
+
+    report(stats, batches, args.concurrency)
+
+    if args.json:
+        args.json.write_text(json.dumps([asdict(s) for s in stats], indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay scripted questions through the supervisor-worker workflow")
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES, help="Recorded tools and scenarios")
+    parser.add_argument("--scenario", action="append", help="Only run these scenarios (repeatable)")
+    parser.add_argument("--iterations", type=int, default=10, help="Rounds over all scenarios")
+    parser.add_argument("--concurrency", type=int, default=1, help="Simultaneous threads per scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake LLM call")
+    parser.add_argument("--shared-threads", action="store_true", help="Reuse one thread per slot across rounds")
+    parser.add_argument("--json", type=Path, help="Write per-question results to this file")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,164 @@
 import asyncio
 import sys
+import time
+from functools import partial
+from typing import TYPE_CHECKING
 
-import mlflow
 import uvloop
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool
-from langgraph.checkpoint.redis.aio import AsyncRedisSaver
 from langgraph.errors import GraphInterrupt
 from langgraph.types import Command
-from mlflow import langchain
+from redis.exceptions import RedisError
 
 import discord
 from src.agent import SupervisorWorkerSystem
-from src.constants import MessageState, constants
-from src.discord import MessageStateMachine, handle_sherlock_message
-from src.healthcheck import run_http_server
-from src.logger import logger
-from src.mcp import get_mcp_client
+from src.answer_cache import create_answer_cache
+from src.cache import create_tool_cache
+from src.clusters import resolve_cluster_context
+from src.constants import DeploymentMode, MessageState, ProgressKind, constants
+from src.deadlines import is_partial_answer
+from src.digest import create_digester
+from src.discord import MessageStateMachine, ProgressMessage, handle_sherlock_message
+from src.dispatcher import ThreadDispatcher
+from src.errors import AgentErrorMessages, DispatcherSaturatedError
+from src.healthcheck import register_readiness, register_stats, run_http_server
+from src.llm import get_shared_model, model_stats
+from src.logger import log_fields, logger
+from src.logindex import create_log_index
+from src.mcp import create_mcp_pool, get_mcp_client
+from src.metrics import question_duration, register_callback, top_samples
+from src.profiling import create_loop_watchdog, phase_timer
+from src.ratelimit import create_rate_limiter
+from src.retention import create_checkpoint_retention
+from src.serde import CompactRedisSaver, create_checkpointer
 from src.settings import settings
+from src.snapshots import ClusterSnapshotter, create_snapshotter
+from src.startup import StartupTimings
+from src.tracing import create_tracer
+from src.triage import ClusterTriage, create_cluster_triage
+from src.utils import parse_flags
+from src.workqueue import WorkItem, WorkQueue, create_shard_worker, create_work_queue
 
-mlflow.set_experiment(settings.MLFLOW_EXPERIMENT_NAME)
-mlflow.set_tracking_uri(settings.MLFLOW_TRACKING_URI)
-langchain.autolog()
+if TYPE_CHECKING:
+    from discord.abc import MessageableChannel
+
+startup = StartupTimings()
 
 
 class SherlockBot(discord.Client):
-    def __init__(self, intents: discord.Intents, checkpointer: AsyncRedisSaver):
+    def __init__(self, intents: discord.Intents, checkpointer: CompactRedisSaver, work_queue: WorkQueue | None = None):
         super().__init__(intents=intents)
 
+        self.work_queue = work_queue
+
         self.client = get_mcp_client()
+        self.mcp_pool = create_mcp_pool(self.client)
         self.checkpointer = checkpointer
         self.supervisor_system: SupervisorWorkerSystem | None = None
         self.tools: list[BaseTool] | None = None
+        self.triage: ClusterTriage | None = None
+        self.snapshotter: ClusterSnapshotter | None = None
         self.state = MessageStateMachine()
+        self.init_lock = asyncio.Lock()
+        self.ready = asyncio.Event()
+        self.init_attempted = asyncio.Event()
+        self.init_error: Exception | None = None
+        self.dispatcher = ThreadDispatcher(
+            max_concurrency=settings.DISPATCH_MAX_CONCURRENCY,
+            max_in_flight=settings.DISPATCH_MAX_IN_FLIGHT,
+        )
+        self.tool_cache = create_tool_cache() if settings.TOOL_CACHE_ENABLED else None
+        self.log_index = create_log_index() if settings.LOG_INDEX_ENABLED else None
+        self.digester = create_digester() if settings.DIGEST_ENABLED else None
+        self.answer_cache = create_answer_cache() if settings.ANSWER_CACHE_ENABLED else None
+        self.rate_limiter = create_rate_limiter() if settings.RATE_LIMIT_ENABLED else None
+        self.tracer = create_tracer()
+        self.retention = (
+            create_checkpoint_retention() if settings.CHECKPOINT_RETENTION_ENABLED and work_queue is None else None
+        )
+
+        register_stats("startup", startup.stats)
+        register_stats("dispatcher", self.dispatcher.stats)
+        register_stats("mcp_pool", self.mcp_pool.stats)
+        register_stats("checkpointer", checkpointer.stats)
+        register_stats("models", model_stats)
+        register_stats("tracing", self.tracer.stats)
+
+        if self.tool_cache:
+            register_stats("tool_cache", self.tool_cache.stats)
+
+        if self.log_index:
+            register_stats("log_index", self.log_index.stats)
+
+        if self.digester:
+            register_stats("digest", self.digester.stats)
+
+        if self.answer_cache:
+            register_stats("answer_cache", self.answer_cache.stats)
+
+        if self.rate_limiter:
+            register_stats("rate_limit", self.rate_limiter.stats)
+
+        if self.retention:
+            register_stats("checkpoints", self.retention.stats)
+
+        if work_queue:
+            register_readiness("gateway", self.is_ready)
+        else:
+            register_readiness("initialization", lambda: self.init_error is None)
+            register_readiness("supervisor", lambda: self.supervisor_system is not None)
+            register_readiness("mcp_pool", self.mcp_pool.is_ready)
+
+        self.register_metrics()
+
+    def register_metrics(self) -> None:
+        """Expose component state that is read at scrape time"""
+        register_callback(
+            "sherlock_startup_seconds",
+            "Startup step durations",
+            ("step",),
+            lambda: {(step,): seconds for step, seconds in startup.steps.items()},
+        )
+        register_callback(
+            "sherlock_dispatcher_load",
+            "Dispatcher queue depth and in-flight questions",
+            ("state",),
+            lambda: {(state,): value for state, value in self.dispatcher.stats().items()},
+        )
+        register_callback(
+            "sherlock_mcp_healthy_sessions",
+            "Healthy MCP sessions per server",
+            ("server",),
+            lambda: {(server,): info["healthy"] for server, info in self.mcp_pool.stats()["servers"].items()},
+        )
+
+        if self.tool_cache:
+            tool_cache = self.tool_cache
+            register_callback(
+                "sherlock_tool_cache_requests_total",
+                "Tool cache lookups by tool and result",
+                ("tool", "result"),
+                lambda: {
+                    (tool, result): count
+                    for result, counts in (
+                        ("hit", tool_cache.hits),
+                        ("miss", tool_cache.misses),
+                        ("coalesced", tool_cache.coalesced),
+                    )
+                    for tool, count in counts.items()
+                },
+                kind="counter",
+            )
+
+        if self.retention:
+            retention = self.retention
+            register_callback(
+                "sherlock_checkpoint_thread_bytes",
+                "Redis memory used by the largest threads' checkpoints at the latest sweep, the rest as other",
+                ("thread",),
+                lambda: top_samples(retention.sizes, constants.METRICS_TOP_THREADS),
+            )
 
     async def delete_memory(self, thread_id: str):
         """Delete conversation memory for a given thread_id"""
@@ -43,18 +169,60 @@ class SherlockBot(discord.Client):
             logger.error("Failed to delete memory for thread %s: %s", thread_id, e)
             raise
 
-    async def handle_reset_command(self, message: discord.Message, question: str, thread_id: str) -> bool:
+    async def handle_reset_command(self, channel: "MessageableChannel", question: str, thread_id: str) -> bool:
         """Handle reset command. Returns True if reset was processed."""
         if question == constants.RESET_COMMAND:
             try:
                 await self.delete_memory(thread_id)
-                await message.channel.send(constants.RESET_SUCCESS_MESSAGE)
+                await channel.send(constants.RESET_SUCCESS_MESSAGE)
             except Exception as e:
-                await message.channel.send(constants.RESET_ERROR_MESSAGE.format(error=e))
+                await channel.send(constants.RESET_ERROR_MESSAGE.format(error=e))
             return True
         return False
 
-    async def handle_human_commands(self, message: discord.Message, question: str, thread_id: str) -> bool:
+    async def handle_triage_command(self, channel: "MessageableChannel", question: str) -> bool:
+        """Handle `triage [cluster]`: probe every context (or the named one) and send the ranked report"""
+        command, _, target = question.partition(" ")
+        target = target.strip()
+
+        if command != constants.TRIAGE_COMMAND or not self.triage:
+            return False
+
+        context = resolve_cluster_context(target, settings.cluster_contexts) if target else None
+
+        if target and context is None:
+            clusters = ", ".join(f"`{project}`" for project in sorted(settings.cluster_contexts)) or "nenhum"
+            await channel.send(constants.TRIAGE_UNKNOWN_CLUSTER_MESSAGE.format(target=target, clusters=clusters))
+            return True
+
+        async with channel.typing():
+            try:
+                with question_duration.time(path="triage"):
+                    report = await self.triage.answer([context] if context else None)
+                await handle_sherlock_message(channel, report)
+            except Exception as e:
+                logger.error("Triage failed: %s", e)
+                await channel.send(constants.TRIAGE_ERROR_MESSAGE.format(error=e))
+
+        return True
+
+    async def handle_checkpoints_command(self, channel: "MessageableChannel", question: str, user_id: int) -> bool:
+        """Handle the admin `checkpoints` command: largest threads by checkpoint size"""
+        if question != constants.CHECKPOINTS_COMMAND or not self.retention:
+            return False
+
+        if user_id not in settings.admin_user_ids:
+            await channel.send(constants.ADMIN_DENIED_MESSAGE)
+            return True
+
+        try:
+            await handle_sherlock_message(channel, await self.retention.report(constants.CHECKPOINTS_REPORT_ROWS))
+        except RedisError as e:
+            await channel.send(f"Erro ao processar solicitação: {e!s}")
+
+        return True
+
+    async def handle_human_commands(self, channel: "MessageableChannel", question: str, thread_id: str) -> bool:
         """Handle human assistance responses. Returns True if command was processed."""
         try:
             if not self.supervisor_system or not self.supervisor_system.workflow:
@@ -64,7 +232,10 @@ class SherlockBot(discord.Client):
             state = await self.supervisor_system.workflow.aget_state(config)
 
             if state.next and len(state.next) > 0:
-                command = Command(resume={"data": question})
+                command = Command(
+                    resume={"data": question},
+                    update={"deadline": time.time() + settings.AGENT_TIMEOUT},
+                )
 
                 response_events = self.supervisor_system.workflow.astream(command, config, stream_mode="values")
 
@@ -75,40 +246,102 @@ class SherlockBot(discord.Client):
                         final_response = event["final_response"]
 
                 if final_response:
-                    await handle_sherlock_message(message.channel, final_response)
+                    await handle_sherlock_message(channel, final_response)
                 else:
-                    await message.channel.send("Processo concluído.")
+                    await channel.send("Processo concluído.")
 
                 return True
 
         except Exception as e:
-            logger.error(f"Error handling human command: {e}")
+            logger.error("Error handling human command: %s", e)
 
         return False
 
-    async def process_llm_question(self, message: discord.Message, question: str, thread_id: str):
-        """Process question through supervisor-worker system and send response"""
+    async def process_llm_question(self, channel: "MessageableChannel", question: str, thread_id: str, flags: set[str]):
+        """Answer from the answer cache when possible, otherwise run the supervisor-worker system"""
         if not self.supervisor_system:
-            await message.channel.send(constants.AGENT_INITIALIZING_MESSAGE)
+            await channel.send(constants.AGENT_INITIALIZING_MESSAGE)
             return
 
-        async with message.channel.typing():
+        context = resolve_cluster_context(question, settings.cluster_contexts) or constants.ANSWER_CACHE_ANY_CONTEXT
+
+        if self.answer_cache and constants.FRESH_FLAG in flags:
+            self.answer_cache.invalidate(context)
+        elif self.answer_cache and (cached := await self.answer_cache.lookup(question, context)):
+            with question_duration.time(path="answer_cache"):
+                await handle_sherlock_message(channel, cached.render())
+            return
+
+        if settings.STREAMING_ENABLED:
+            with question_duration.time(path="stream"):
+                response = await self.stream_llm_question(channel, question, thread_id)
+        else:
+            with question_duration.time(path="invoke"):
+                response = await self.answer_llm_question(channel, question, thread_id)
+
+        if (
+            self.answer_cache
+            and response
+            and response not in {error.value for error in AgentErrorMessages}
+            and not is_partial_answer(response)
+        ):
+            await self.answer_cache.store(question, context, response)
+
+    async def answer_llm_question(self, channel: "MessageableChannel", question: str, thread_id: str) -> str | None:
+        """Process question through supervisor-worker system and send response"""
+        if not self.supervisor_system:
+            return None
+
+        async with channel.typing():
             try:
                 response = await self.supervisor_system.process_question(question, thread_id)
-                await handle_sherlock_message(message.channel, response)
+                await handle_sherlock_message(channel, response)
+                return response
             except Exception as e:
                 match e:
                     case GraphInterrupt():
                         interrupt_data = getattr(e, "value", {})
                         query = interrupt_data.get("query", "Assistência humana solicitada")
-                        await message.channel.send(
+                        await channel.send(
                             f"🤖 Assistência humana solicitada:"
                             f"\n\n{query}\n\n"
                             f"Responda com sua orientação para continuar."
                         )
                     case _:
-                        await message.channel.send(f"Erro ao processar solicitação: {e!s}")
-                        logger.error(f"Error in process_llm_question: {e}")
+                        await channel.send(f"Erro ao processar solicitação: {e!s}")
+                        logger.error("Error in process_llm_question: %s", e)
+
+        return None
+
+    async def stream_llm_question(self, channel: "MessageableChannel", question: str, thread_id: str) -> str | None:
+        """Stream plan, tool calls and worker tokens into one edited message, then replace it with the answer"""
+        if not self.supervisor_system:
+            return None
+
+        progress = ProgressMessage(channel)
+        await progress.flush()
+
+        try:
+            async for event in self.supervisor_system.process_question_stream(question, thread_id):
+                match event.kind:
+                    case ProgressKind.INTERRUPT:
+                        await handle_sherlock_message(
+                            channel,
+                            f"🤖 Assistência humana solicitada:"
+                            f"\n\n{event.content}\n\n"
+                            f"Responda com sua orientação para continuar.",
+                            placeholder=progress.message,
+                        )
+                    case ProgressKind.FINAL:
+                        await handle_sherlock_message(channel, event.content, placeholder=progress.message)
+                        return event.content
+                    case _:
+                        await progress.update(event.kind, event.content)
+        except Exception as e:
+            await channel.send(f"Erro ao processar solicitação: {e!s}")
+            logger.error("Error in stream_llm_question: %s", e)
+
+        return None
 
     async def process_message(self, message: discord.Message, state: MessageState) -> str | None:
         """Process message based on its state and extract question if valid"""
@@ -130,29 +363,90 @@ class SherlockBot(discord.Client):
 
     async def on_ready(self):
         logger.info("%s has connected to Discord", self.user)
-        logger.info("Initializing Redis and MCP agent...")
+        startup.mark("discord_ready")
 
-        try:
-            await self.checkpointer.setup()
+        if self.work_queue is None:
+            await self.initialize()
 
-            self.tools = await self.client.get_tools()
+    async def initialize(self):
+        """Build the supervisor-worker system once; Discord reconnects fire on_ready again and reuse it"""
+        async with self.init_lock:
+            if self.supervisor_system is not None:
+                logger.info("Supervisor-worker system already initialized, reusing it")
+                return
 
-            if self.supervisor_system is None:
-                self.supervisor_system = SupervisorWorkerSystem(self.checkpointer, self.tools)
+            logger.info("Initializing Redis and MCP agent...")
 
-            logger.info("Supervisor-worker system initialization complete.")
-        except Exception as e:
-            logger.error(f"Failed to initialize supervisor system: {e}")
-            self.supervisor_system = None
+            try:
+                await asyncio.gather(
+                    startup.run("checkpointer", self.checkpointer.setup()),
+                    startup.run("mcp_pool", self.mcp_pool.start()),
+                    startup.run("model", asyncio.to_thread(get_shared_model)),
+                )
+
+                self.tools = self.mcp_pool.get_tools()
+
+                if self.tool_cache:
+                    self.tools = self.tool_cache.wrap_tools(self.tools)
+
+                self.triage = create_cluster_triage(self.tools)
+                register_stats("triage", self.triage.stats)
+
+                if settings.SNAPSHOT_ENABLED:
+                    self.snapshotter = create_snapshotter(self.tools)
+                    register_stats("snapshots", self.snapshotter.stats)
+
+                if self.log_index:
+                    self.tools = self.log_index.wrap_tools(self.tools)
+
+                if self.digester:
+                    self.tools = self.digester.wrap_tools(self.tools)
+
+                if self.snapshotter:
+                    self.tools = [*self.tools, *self.snapshotter.tools()]
+
+                with startup.measure("supervisor_system"):
+                    self.supervisor_system = SupervisorWorkerSystem(
+                        self.checkpointer, self.tools, log_index=self.log_index
+                    )
+
+                if compactor := self.supervisor_system.compactor:
+                    register_stats("compaction", compactor.stats)
+                    register_callback(
+                        "sherlock_thread_tokens",
+                        "Estimated worker history tokens after compaction for the largest threads, the rest as other",
+                        ("thread",),
+                        lambda: top_samples(compactor.token_counts, constants.METRICS_TOP_THREADS),
+                    )
+
+                self.init_error = None
+                startup.error = None
+                self.ready.set()
+                startup.mark("ready")
+                startup.log()
+
+                logger.info("Supervisor-worker system initialization complete.")
+            except Exception as e:
+                logger.error("Failed to initialize supervisor system: %s", e)
+                self.supervisor_system = None
+                self.init_error = e
+                startup.error = str(e)
+            finally:
+                self.init_attempted.set()
+
+    async def wait_until_ready(self) -> bool:
+        """Hold questions that arrived during startup until the system is built, failing fast if it could not be"""
+        try:
+            await asyncio.wait_for(self.init_attempted.wait(), settings.AGENT_TIMEOUT)
+        except TimeoutError:
+            return False
+
+        return self.ready.is_set()
 
     async def on_message(self, message: discord.Message):
         if message.author == self.user:
             return
 
-        if self.supervisor_system is None:
-            await message.channel.send(constants.AGENT_INITIALIZING_MESSAGE)
-            return
-
         state = self.state.process_state(message, settings.whitelisted_users)
 
         question = await self.process_message(message, state)
@@ -160,15 +454,102 @@ class SherlockBot(discord.Client):
         if not question:
             return
 
+        if not await self.admit(message.channel, question, message.author.id):
+            return
+
+        if self.work_queue is None and not self.init_attempted.is_set():
+            await message.channel.send(constants.AGENT_INITIALIZING_MESSAGE)
+
         thread_id = f"channel_{message.channel.id}"
 
-        if await self.handle_reset_command(message, question, thread_id):
+        if self.work_queue:
+            try:
+                await self.work_queue.publish(WorkItem(message.channel.id, thread_id, question, message.author.id))
+            except RedisError as e:
+                logger.error("Failed to enqueue question for %s: %s", thread_id, e)
+                await message.channel.send(constants.QUEUE_FULL_MESSAGE)
+            return
+
+        try:
+            job = partial(self.handle_question, message.channel, question, thread_id, message.author.id)
+            position = self.dispatcher.submit(thread_id, job)
+        except DispatcherSaturatedError as e:
+            logger.warning("Rejecting question for %s: %s", thread_id, e)
+            await message.channel.send(constants.QUEUE_FULL_MESSAGE)
+            return
+
+        if position:
+            await message.channel.send(constants.QUEUE_POSITION_MESSAGE.format(position=position))
+
+    async def admit(self, channel: "MessageableChannel", question: str, user_id: int) -> bool:
+        """Check the rate limits before a question is queued, so a flood never fills the dispatcher or the stream"""
+        if not self.rate_limiter or question in (constants.RESET_COMMAND, constants.CHECKPOINTS_COMMAND):
+            return True
+
+        decision = await self.rate_limiter.check(str(user_id), str(channel.id))
+
+        if not decision.allowed:
+            await channel.send(decision.message())
+
+        return decision.allowed
+
+    async def handle_question(self, channel: "MessageableChannel", question: str, thread_id: str, user_id: int):
+        """Handle a validated question; runs serialized per thread_id by the dispatcher"""
+        if not await self.wait_until_ready():
+            await channel.send(constants.AGENT_UNAVAILABLE_MESSAGE)
+            return
+
+        if await self.handle_reset_command(channel, question, thread_id):
             return
 
-        if await self.handle_human_commands(message, question, thread_id):
+        if await self.handle_checkpoints_command(channel, question, user_id):
             return
 
-        await self.process_llm_question(message, question, thread_id)
+        if await self.handle_human_commands(channel, question, thread_id):
+            return
+
+        if not self.rate_limiter:
+            await self.answer_question(channel, question, thread_id, user_id)
+            return
+
+        with self.rate_limiter.metered() as meter:
+            try:
+                await self.answer_question(channel, question, thread_id, user_id)
+            finally:
+                await self.rate_limiter.record_tokens(str(user_id), meter.tokens)
+
+    async def answer_question(self, channel: "MessageableChannel", question: str, thread_id: str, user_id: int):
+        """Run the triage command or the LLM pipeline for an admitted question, then its timings if asked"""
+        question, flags = parse_flags(question)
+        timed = constants.TIMINGS_FLAG in flags and user_id in settings.admin_user_ids
+
+        with (
+            self.tracer.trace(thread_id, question),
+            log_fields(thread_id=thread_id),
+            phase_timer(timed) as timer,
+        ):
+            if not await self.handle_triage_command(channel, question):
+                await self.process_llm_question(channel, question, thread_id, flags)
+
+        if timer:
+            await handle_sherlock_message(channel, timer.render())
+
+    async def run_snapshots(self):
+        """Keep the cluster snapshots fresh once the MCP pool is up; no-op when snapshots are disabled"""
+        await self.ready.wait()
+
+        if self.snapshotter:
+            await self.snapshotter.run()
+
+    async def run_retention(self):
+        """Sweep old checkpoints in the background; no-op when retention is disabled"""
+        if self.retention:
+            await self.retention.run()
+
+    async def handle_work_item(self, item: WorkItem):
+        """Answer a question taken from the work queue, replying through the REST API"""
+        channel = self.get_partial_messageable(item.channel_id)
+        await self.handle_question(channel, item.question, item.thread_id, item.user_id)
 
 
 async def main():
@@ -189,10 +570,42 @@ async def main():
     intents = discord.Intents.default()
     intents.message_content = True
 
-    async with AsyncRedisSaver.from_conn_string(settings.REDIS_URL) as checkpointer:
-        bot = SherlockBot(intents, checkpointer)
-
-        await asyncio.gather(run_http_server(), bot.start(settings.DISCORD_BOT_TOKEN))
+    watchdog = create_loop_watchdog()
+    register_stats("event_loop", watchdog.stats)
+
+    async with create_checkpointer() as checkpointer:
+        match settings.DEPLOYMENT_MODE:
+            case DeploymentMode.STANDALONE:
+                bot = SherlockBot(intents, checkpointer)
+
+                await asyncio.gather(
+                    run_http_server(),
+                    watchdog.run(),
+                    bot.run_snapshots(),
+                    bot.run_retention(),
+                    bot.tracer.run(),
+                    bot.start(settings.DISCORD_BOT_TOKEN),
+                )
+            case DeploymentMode.GATEWAY:
+                bot = SherlockBot(intents, checkpointer, work_queue=create_work_queue())
+
+                await asyncio.gather(run_http_server(), watchdog.run(), bot.start(settings.DISCORD_BOT_TOKEN))
+            case DeploymentMode.WORKER:
+                bot = SherlockBot(intents, checkpointer)
+                worker = create_shard_worker(create_work_queue(), bot.handle_work_item)
+
+                register_stats("shards", worker.stats)
+
+                await run_http_server()
+                await bot.login(settings.DISCORD_BOT_TOKEN)
+                await bot.initialize()
+
+                try:
+                    await asyncio.gather(
+                        worker.run(), watchdog.run(), bot.run_snapshots(), bot.run_retention(), bot.tracer.run()
+                    )
+                finally:
+                    await bot.close()
 
 
 if __name__ == "__main__":
@@ -1,23 +1,36 @@
+import asyncio
+import json
+import math
+import time
+from collections.abc import AsyncIterator, Awaitable
 from dataclasses import dataclass, field
 from string import Template
-from typing import Annotated, Type, TypedDict, TypeVar, cast
+from typing import Annotated, Protocol, Type, TypedDict, TypeVar, cast
 
-from langchain_core.language_models import LanguageModelInput
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
-from langchain_core.runnables import RunnableConfig, RunnableWithFallbacks
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool, tool
 from langgraph.checkpoint.base import BaseCheckpointSaver
-from langgraph.graph import END, StateGraph
+from langgraph.errors import GraphRecursionError
+from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
 from langgraph.types import interrupt
 from pydantic import BaseModel, Field
 
-from .constants import EvaluationDecision, WorkflowDecision
+from .compaction import create_compactor
+from .constants import EvaluationDecision, ProgressKind, QuestionRoute, WorkflowDecision, constants
+from .deadlines import node_budget, partial_answer, refinement_deadline
 from .errors import AgentErrorMessages
-from .llm import create_model
-from .logger import logger
+from .fanout import ToolFanout, format_results
+from .llm import get_shared_model, llm_metrics
+from .logger import log_fields, logger
+from .logindex import LogIndex
+from .metrics import deadline_exceeded, node_duration
+from .profiling import timed_phase
+from .routing import classify_question
 from .settings import settings
 from .templates import load_prompt_template, load_prompt_text
 
@@ -31,6 +44,16 @@ def human_assistance(request: str) -> str:
     return human_response["data"]
 
 
+class PlannedToolCall(BaseModel):
+    """Independent MCP tool call the supervisor wants prefetched in parallel"""
+
+    tool: str = Field(description="Exact MCP tool name, e.g. list-k8s-resources")
+    arguments_json: str = Field(
+        default="{}",
+        description='Tool arguments as a JSON object, e.g. {"context": "...", "namespace": "...", "kind": "Pod"}',
+    )
+
+
 class TaskPlan(BaseModel):
     """Structured plan for the worker agent"""
 
@@ -56,6 +79,11 @@ class TaskPlan(BaseModel):
         description="Steps to verify the task was completed correctly",
     )
 
+    parallel_calls: list[PlannedToolCall] = Field(
+        default_factory=list,
+        description="Independent MCP tool calls with concrete arguments that can all run at once before the worker",
+    )
+
 
 class EvaluationResponse(BaseModel):
     """Structured evaluation response from the supervisor"""
@@ -64,6 +92,33 @@ class EvaluationResponse(BaseModel):
     feedback: str = ""
 
 
+def collect_tool_calls(messages: list[BaseMessage]) -> list[str]:
+    """Describe the tool calls the worker made since the last human message"""
+    calls: list[str] = []
+
+    for message in reversed(messages):
+        match message:
+            case HumanMessage():
+                break
+            case AIMessage(tool_calls=tool_calls):
+                calls.extend(
+                    f"{call['name']}({json.dumps(call['args'], ensure_ascii=False, sort_keys=True)})"
+                    for call in reversed(tool_calls)
+                )
+            case _:
+                pass
+
+    return calls[::-1]
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Progress update emitted while a question is streamed through the workflow"""
+
+    kind: ProgressKind
+    content: str
+
+
 class SupervisorState(TypedDict):
     """State for the supervisor-worker workflow"""
 
@@ -77,6 +132,28 @@ class SupervisorState(TypedDict):
     max_iterations: int
     final_response: str
     main_thread_id: str
+    tool_history: list[str]
+    deadline: float
+
+
+class WorkflowNode(Protocol):
+    """A graph node; `state` is named because StateGraph.add_node matches nodes by that keyword"""
+
+    def __call__(self, state: SupervisorState) -> Awaitable[dict]: ...
+
+
+def timed_node(name: str, node: WorkflowNode) -> WorkflowNode:
+    """Wrap a workflow node so its wall time lands in the node histogram and phase timer and its logs carry the node"""
+
+    async def run(state: SupervisorState) -> dict:
+        with (
+            node_duration.time(node=name),
+            timed_phase("node", name),
+            log_fields(thread_id=state.get("main_thread_id"), node=name, iteration=state.get("iteration_count", 0)),
+        ):
+            return await node(state)
+
+    return run
 
 
 @dataclass
@@ -86,33 +163,43 @@ class SupervisorWorkerSystem:
     checkpointer: BaseCheckpointSaver
     input_tools: list[BaseTool]
     workflow: CompiledStateGraph = field(init=False)
-    supervisor_model: RunnableWithFallbacks[LanguageModelInput, BaseMessage] = field(default_factory=create_model)
-    worker_model: RunnableWithFallbacks[LanguageModelInput, BaseMessage] = field(default_factory=create_model)
+    log_index: LogIndex | None = None
+    supervisor_model: BaseChatModel = field(default_factory=get_shared_model)
+    worker_model: BaseChatModel = field(default_factory=lambda: get_shared_model(settings.WORKER_MODEL_NAME))
+    evaluation_model: BaseChatModel = field(default_factory=lambda: get_shared_model(settings.EVALUATION_MODEL_NAME))
     supervisor_prompt: str = field(default_factory=lambda: load_prompt_text("supervisor.md"))
     worker_prompt_template: Template = field(default_factory=lambda: load_prompt_template("worker.md"))
     evaluation_prompt: str = field(default_factory=lambda: load_prompt_text("evaluation.md"))
     plan_creation_template: Template = field(default_factory=lambda: load_prompt_template("plan-creation.md"))
     plan_refinement_template: Template = field(default_factory=lambda: load_prompt_template("plan-refinement.md"))
     task_execution_template: Template = field(default_factory=lambda: load_prompt_template("task-execution.md"))
+    direct_execution_template: Template = field(default_factory=lambda: load_prompt_template("direct-execution.md"))
     evaluation_context_template: Template = field(default_factory=lambda: load_prompt_template("evaluation-context.md"))
 
     def __post_init__(self) -> None:
-        self.tools = [*self.input_tools, human_assistance]
+        self.tools = [*self.input_tools, human_assistance, *(self.log_index.tools() if self.log_index else [])]
+        self.fanout = None
+
+        if settings.FANOUT_ENABLED:
+            self.fanout = ToolFanout(self.input_tools, settings.FANOUT_MAX_CONCURRENCY_PER_SERVER)
 
         worker_prompt = self.worker_prompt_template.substitute(cluster_info=settings.CLUSTERS or "{}")
 
+        self.compactor = create_compactor(self.supervisor_model) if settings.COMPACTION_ENABLED else None
+
         self.worker_agent = create_react_agent(
             self.worker_model,
             tools=self.tools,
             prompt=worker_prompt,
             checkpointer=self.checkpointer,
+            pre_model_hook=self.compactor.compact if self.compactor else None,
         )
 
         self.workflow = self.build_workflow()
 
     async def invoke_structured_model(
         self,
-        model: RunnableWithFallbacks[LanguageModelInput, BaseMessage],
+        model: BaseChatModel,
         model_type: Type[T],
         system_prompt: str,
         user_prompt: str,
@@ -123,18 +210,31 @@ class SupervisorWorkerSystem:
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
         return cast(T, await structured_model.ainvoke(messages, config=config))
 
+    def node_timeout(self, node: str, state: SupervisorState) -> float:
+        """Seconds left for `node` out of the question's AGENT_TIMEOUT budget"""
+        return node_budget(node, state.get("deadline") or time.time() + settings.AGENT_TIMEOUT, time.time())
+
     def build_workflow(self) -> CompiledStateGraph:
         """Build the supervisor-worker workflow graph"""
         workflow = StateGraph(SupervisorState)
 
-        workflow.add_node("create_plan", self.create_plan_node)
-        workflow.add_node("execute_task", self.execute_task_node)
-        workflow.add_node("evaluate_result", self.evaluate_result_node)
-        workflow.add_node("finalize", self.finalize_node)
+        workflow.add_node("create_plan", timed_node("create_plan", self.create_plan_node))
+        workflow.add_node("execute_direct", timed_node("execute_direct", self.execute_direct_node))
+        workflow.add_node("execute_task", timed_node("execute_task", self.execute_task_node))
+        workflow.add_node("evaluate_result", timed_node("evaluate_result", self.evaluate_result_node))
+        workflow.add_node("finalize", timed_node("finalize", self.finalize_node))
 
-        workflow.set_entry_point("create_plan")
+        workflow.add_conditional_edges(
+            START,
+            self.route_question,
+            {
+                QuestionRoute.DIRECT.value: "execute_direct",
+                QuestionRoute.SUPERVISED.value: "create_plan",
+            },
+        )
 
         workflow.add_edge("create_plan", "execute_task")
+        workflow.add_edge("execute_direct", "finalize")
         workflow.add_edge("execute_task", "evaluate_result")
 
         workflow.add_conditional_edges(
@@ -150,6 +250,16 @@ class SupervisorWorkerSystem:
 
         return workflow.compile(checkpointer=self.checkpointer)
 
+    def route_question(self, state: SupervisorState) -> str:
+        """Route simple lookups straight to the worker when the fast path is enabled"""
+        if not settings.FAST_PATH_ENABLED:
+            return QuestionRoute.SUPERVISED.value
+
+        route = classify_question(state["original_question"])
+        logger.info("Question routed: %s", route.value)
+
+        return route.value
+
     async def create_plan_node(self, state: SupervisorState) -> dict:
         """Supervisor creates/refines task plan"""
         iteration = state.get("iteration_count", 0)
@@ -163,20 +273,25 @@ class SupervisorWorkerSystem:
                     previous_plan=state["current_plan"].task_description if state["current_plan"] else "Nenhum",
                     previous_result=state.get("worker_result", "Nenhum"),
                     feedback=state.get("feedback", "Nenhum"),
+                    previous_tools=", ".join(state.get("tool_history", [])) or "Nenhuma",
                 )
 
         try:
-            plan_response = await self.invoke_structured_model(
-                self.supervisor_model,
-                TaskPlan,
-                self.supervisor_prompt,
-                prompt,
-            )
+            async with asyncio.timeout(self.node_timeout("create_plan", state)):
+                plan_response = await self.invoke_structured_model(
+                    self.supervisor_model,
+                    TaskPlan,
+                    self.supervisor_prompt,
+                    prompt,
+                )
 
-            logger.info(f"Plan created (iteration {iteration + 1}): {plan_response.task_description}")
+            logger.info("Plan created (iteration %d): %s", iteration + 1, plan_response.task_description)
             return {"current_plan": plan_response, "iteration_count": iteration + 1}
         except Exception as e:
-            logger.error(f"Plan creation failed: {e}")
+            if isinstance(e, TimeoutError):
+                deadline_exceeded.inc(node="create_plan")
+
+            logger.error("Plan creation failed: %r", e)
 
             question = state["original_question"].lower()
 
@@ -213,38 +328,38 @@ class SupervisorWorkerSystem:
 
             return {"current_plan": fallback_plan, "iteration_count": iteration + 1}
 
-    async def execute_task_node(self, state: SupervisorState) -> dict:
-        """Worker agent executes the planned task using create_react_agent"""
-        plan = state["current_plan"]
-
-        if not plan:
-            return {"worker_result": "Error: Plan was not created"}
+    async def run_worker(self, task_prompt: str, state: SupervisorState, node: str) -> dict:
+        """Run the react worker on the shared thread and return its answer plus the tools it called.
 
-        actions = "\n".join(f"- {cmd}" for cmd in plan.actions)
-        steps = "\n".join(f"- {step}" for step in plan.verification_steps)
-
-        task_prompt = self.task_execution_template.substitute(
-            task_description=plan.task_description,
-            actions=actions,
-            expected_outcome=plan.expected_outcome,
-            verification_steps=steps,
-        )
+        The worker gets `node`'s share of the question budget. When it runs out, in-flight model and tool
+        calls are cancelled and whatever the worker gathered so far becomes a partial answer.
+        """
+        result: dict = {}
 
         try:
             main_thread_id = state["main_thread_id"]
-            config = RunnableConfig(configurable={"thread_id": main_thread_id})
+            config = RunnableConfig(
+                configurable={"thread_id": main_thread_id},
+                tags=[constants.WORKER_RUN_TAG],
+                recursion_limit=settings.RECURSION_LIMIT,
+            )
 
-            logger.info(f"Worker executing with prompt: {task_prompt[:200]}...")
-            logger.info(f"Available tools count: {len(self.tools)}")
+            logger.debug("Worker executing with %d tools, prompt: %s", len(self.tools), task_prompt)
 
             worker_state = {"messages": [HumanMessage(content=task_prompt)]}
-            result = await self.worker_agent.ainvoke(worker_state, config)
+
+            async with asyncio.timeout(self.node_timeout(node, state)):
+                async for chunk in self.worker_agent.astream(worker_state, config, stream_mode="values"):
+                    if "messages" in chunk:
+                        result = chunk
 
             worker_response = "No response from worker agent"
+            tool_calls: list[str] = []
 
             match result:
                 case {"messages": messages} if messages:
                     final_message = messages[-1]
+                    tool_calls = collect_tool_calls(messages)
 
                     match getattr(final_message, "content", None):
                         case list(content):
@@ -256,15 +371,79 @@ class SupervisorWorkerSystem:
                 case _:
                     pass
 
-            logger.info(f"Worker completed: {len(worker_response)} chars")
-            logger.info(f"Worker response: {worker_response[:500]}...")
+            logger.info("Worker completed: %d chars, %d tool calls", len(worker_response), len(tool_calls))
+            logger.debug("Worker response: %s", worker_response)
+
+            return {"worker_result": worker_response, "tool_history": [*state.get("tool_history", []), *tool_calls]}
+        except (TimeoutError, GraphRecursionError) as e:
+            messages = result.get("messages", [])
+            gathered = partial_answer(messages)
+
+            match e:
+                case TimeoutError():
+                    deadline_exceeded.inc(node=node)
+                    reason = f"tempo limite de {settings.AGENT_TIMEOUT}s atingido"
+                case _:
+                    reason = f"limite de {settings.RECURSION_LIMIT} passos atingido"
 
-            return {"worker_result": worker_response}
+            logger.warning("Worker stopped in %s after %d messages: %s", node, len(messages), reason)
+
+            if not gathered:
+                return {"worker_result": AgentErrorMessages.DEADLINE_EXCEEDED.value}
+
+            note = constants.PARTIAL_ANSWER_NOTE.format(reason=reason)
+            return {
+                "worker_result": f"{note}\n\n{gathered}",
+                "tool_history": [*state.get("tool_history", []), *collect_tool_calls(messages)],
+            }
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"Worker execution failed: {error_msg}")
+            logger.error("Worker execution failed: %s", error_msg)
             return {"worker_result": f"Erro durante execução: {error_msg}"}
 
+    async def execute_direct_node(self, state: SupervisorState) -> dict:
+        """Worker answers a simple lookup directly, without plan or evaluation"""
+        task_prompt = self.direct_execution_template.substitute(question=state["original_question"])
+
+        return await self.run_worker(task_prompt, state, "execute_direct")
+
+    async def execute_task_node(self, state: SupervisorState) -> dict:
+        """Worker agent executes the planned task using create_react_agent"""
+        plan = state["current_plan"]
+
+        if not plan:
+            return {"worker_result": "Error: Plan was not created"}
+
+        actions = "\n".join(f"- {cmd}" for cmd in plan.actions)
+        steps = "\n".join(f"- {step}" for step in plan.verification_steps)
+        previous_tools = "\n".join(f"- {call}" for call in state.get("tool_history", [])) or "- Nenhuma"
+        prefetched = "Nenhum"
+
+        if self.fanout and plan.parallel_calls:
+            try:
+                async with asyncio.timeout(self.node_timeout("execute_task", state)):
+                    results = await self.fanout.run([(call.tool, call.arguments_json) for call in plan.parallel_calls])
+
+                prefetched = format_results(results)
+                state = cast(
+                    SupervisorState,
+                    {**state, "tool_history": [*state.get("tool_history", []), *(r.label for r in results if r.ok)]},
+                )
+            except TimeoutError:
+                deadline_exceeded.inc(node="execute_task")
+                logger.warning("Parallel prefetch exceeded the question deadline, leaving it to the worker")
+
+        task_prompt = self.task_execution_template.substitute(
+            task_description=plan.task_description,
+            actions=actions,
+            expected_outcome=plan.expected_outcome,
+            verification_steps=steps,
+            previous_tools=previous_tools,
+            prefetched_results=prefetched,
+        )
+
+        return await self.run_worker(task_prompt, state, "execute_task")
+
     async def evaluate_result_node(self, state: SupervisorState) -> dict:
         """Supervisor evaluates worker result"""
         plan_description = state["current_plan"].task_description if state["current_plan"] else "No plan"
@@ -276,18 +455,23 @@ class SupervisorWorkerSystem:
         )
 
         try:
-            evaluation_response = await self.invoke_structured_model(
-                self.supervisor_model,
-                EvaluationResponse,
-                self.evaluation_prompt,
-                evaluation_text,
-            )
+            async with asyncio.timeout(self.node_timeout("evaluate_result", state)):
+                evaluation_response = await self.invoke_structured_model(
+                    self.evaluation_model,
+                    EvaluationResponse,
+                    self.evaluation_prompt,
+                    evaluation_text,
+                )
 
-            logger.info(f"Evaluation: {evaluation_response.decision}")
+            logger.info("Evaluation: %s", evaluation_response.decision)
 
             return {"evaluation": evaluation_response.decision, "feedback": evaluation_response.feedback}
+        except TimeoutError:
+            deadline_exceeded.inc(node="evaluate_result")
+            logger.warning("Evaluation exceeded the question deadline, finalizing with the current result")
+            return {"evaluation": "", "feedback": ""}
         except Exception as e:
-            logger.error(f"Evaluation failed: {e}")
+            logger.error("Evaluation failed: %s", e)
             return {
                 "evaluation": EvaluationDecision.REFINE.value,
                 "feedback": (
@@ -304,19 +488,24 @@ class SupervisorWorkerSystem:
         max_iterations = state.get("max_iterations", settings.REFLECTION_ITERATIONS)
         current_iteration = state.get("iteration_count", 0)
         evaluation = state.get("evaluation", "")
+        refine_until = refinement_deadline(
+            state.get("deadline") or math.inf, settings.AGENT_TIMEOUT, settings.QUESTION_LATENCY_BUDGET
+        )
 
         match (evaluation, current_iteration >= max_iterations):
             case (eval_val, _) if eval_val == EvaluationDecision.APPROVED.value:
                 return WorkflowDecision.FINALIZE.value
             case (_, True):
                 return WorkflowDecision.FINALIZE.value
+            case _ if time.time() >= refine_until:
+                logger.info("Latency budget exhausted, finalizing with current result")
+                return WorkflowDecision.FINALIZE.value
             case _:
                 return WorkflowDecision.CONTINUE.value
 
-    async def process_question(self, question: str, thread_id: str) -> str:
-        """Process a question through the supervisor-worker workflow"""
-
-        initial_state = SupervisorState(
+    def build_initial_state(self, question: str, thread_id: str) -> SupervisorState:
+        """Build the workflow input for a new question"""
+        return SupervisorState(
             messages=[HumanMessage(content=question)],
             original_question=question,
             current_plan=None,
@@ -327,24 +516,88 @@ class SupervisorWorkerSystem:
             max_iterations=settings.REFLECTION_ITERATIONS,
             final_response="",
             main_thread_id=thread_id,
+            tool_history=[],
+            deadline=time.time() + settings.AGENT_TIMEOUT,
         )
 
+    def workflow_config(self, thread_id: str) -> RunnableConfig:
+        return RunnableConfig(
+            configurable={"thread_id": thread_id},
+            callbacks=[llm_metrics],
+            recursion_limit=settings.RECURSION_LIMIT,
+        )
+
+    async def process_question(self, question: str, thread_id: str) -> str:
+        """Process a question through the supervisor-worker workflow"""
+        initial_state = self.build_initial_state(question, thread_id)
+
         try:
             workflow = self.workflow
 
-            config = RunnableConfig(configurable={"thread_id": thread_id})
+            config = self.workflow_config(thread_id)
             final_state = await workflow.ainvoke(initial_state, config)
-
             response = final_state.get("final_response", "")
 
             if not response:
                 return AgentErrorMessages.PROCESSING_REQUEST.value
 
             iterations = final_state.get("iteration_count", 0)
-            logger.info(f"Completed in {iterations} iterations")
+            logger.info("Completed in %d iterations", iterations)
 
             return response
 
+        except GraphRecursionError:
+            logger.warning(
+                "Workflow hit the recursion limit of %d, returning the last result", settings.RECURSION_LIMIT
+            )
+            return await self.last_worker_result(config) or AgentErrorMessages.PROCESSING_REQUEST.value
         except Exception as e:
-            logger.error(f"Workflow failed: {e}")
+            logger.error("Workflow failed: %s", e)
             return AgentErrorMessages.PROCESSING_REQUEST.value
+
+    async def last_worker_result(self, config: RunnableConfig) -> str:
+        """Latest worker result checkpointed for the thread, for workflows stopped before finalizing"""
+        try:
+            snapshot = await self.workflow.aget_state(config)
+            return snapshot.values.get("worker_result", "")
+        except Exception as e:
+            logger.warning("Failed to read the last worker result: %s", e)
+            return ""
+
+    async def process_question_stream(self, question: str, thread_id: str) -> AsyncIterator[ProgressEvent]:
+        """Process a question yielding plan, tool and worker token progress before the final answer"""
+        initial_state = self.build_initial_state(question, thread_id)
+        config = self.workflow_config(thread_id)
+        final_response = ""
+
+        try:
+            async for mode, chunk in self.workflow.astream(initial_state, config, stream_mode=["updates", "messages"]):
+                match mode, chunk:
+                    case "updates", {"create_plan": {"current_plan": TaskPlan() as plan}}:
+                        yield ProgressEvent(ProgressKind.PLAN, plan.task_description)
+                    case "updates", {"finalize": {"final_response": str(response)}}:
+                        final_response = response
+                    case "updates", {"__interrupt__": interrupts} if interrupts:
+                        query = getattr(interrupts[0], "value", {}).get("query", "Assistência humana solicitada")
+                        yield ProgressEvent(ProgressKind.INTERRUPT, query)
+                        return
+                    case "messages", (AIMessageChunk() as message, {"tags": tags}) if constants.WORKER_RUN_TAG in tags:
+                        for tool_call in message.tool_call_chunks:
+                            if name := tool_call.get("name"):
+                                yield ProgressEvent(ProgressKind.TOOL, name)
+
+                        if text := message.text():
+                            yield ProgressEvent(ProgressKind.TOKEN, text)
+                    case _:
+                        pass
+        except GraphRecursionError:
+            logger.warning(
+                "Workflow hit the recursion limit of %d, returning the last result", settings.RECURSION_LIMIT
+            )
+            final_response = await self.last_worker_result(config)
+        except Exception as e:
+            logger.error("Streaming workflow failed: %s", e)
+            yield ProgressEvent(ProgressKind.FINAL, AgentErrorMessages.PROCESSING_REQUEST.value)
+            return
+
+        yield ProgressEvent(ProgressKind.FINAL, final_response or AgentErrorMessages.PROCESSING_REQUEST.value)
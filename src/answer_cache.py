@@ -0,0 +1,140 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from .constants import constants
+from .logger import logger
+from .settings import settings
+from .utils import normalize_text
+
+
+@dataclass
+class CachedAnswer:
+    """Answer stored for a question within one cluster context"""
+
+    question: str
+    normalized: str
+    vector: np.ndarray | None
+    answer: str
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def render(self) -> str:
+        """Answer followed by a note with its age and how to bypass the cache"""
+        minutes = int(self.age // 60)
+        age = f"{minutes} min" if minutes else f"{int(self.age)} s"
+
+        return f"{self.answer}\n\n{constants.ANSWER_CACHE_HIT_NOTE.format(age=age)}"
+
+
+@dataclass
+class AnswerCache:
+    """Short-lived answer cache keyed by cluster context, matching questions by text and embedding similarity"""
+
+    embeddings: Embeddings | None
+    ttl: float
+    similarity_threshold: float
+    max_entries_per_context: int
+    entries: dict[str, list[CachedAnswer]] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+
+    async def embed(self, normalized: str) -> np.ndarray | None:
+        """Unit-length embedding, or None when the embedding model is unavailable"""
+        if self.embeddings is None:
+            return None
+
+        try:
+            vector = np.asarray(await self.embeddings.aembed_query(normalized), dtype=np.float32)
+        except Exception as e:
+            logger.warning("Question embedding failed, using exact matches only: %s", e)
+            return None
+
+        norm = np.linalg.norm(vector)
+
+        return vector / norm if norm else None
+
+    def fresh_entries(self, context: str) -> list[CachedAnswer]:
+        """Drop expired entries for a context and return the rest"""
+        entries = [entry for entry in self.entries.get(context, []) if entry.age < self.ttl]
+        self.entries[context] = entries
+
+        return entries
+
+    async def lookup(self, question: str, context: str) -> CachedAnswer | None:
+        """Exact normalized match first, then the most similar cached question above the threshold"""
+        normalized = normalize_text(question)
+        entries = self.fresh_entries(context)
+
+        match next((entry for entry in entries if entry.normalized == normalized), None):
+            case CachedAnswer() as entry:
+                self.hits += 1
+                return entry
+            case None:
+                pass
+
+        candidates = [(entry, entry.vector) for entry in entries if entry.vector is not None]
+        vector = await self.embed(normalized) if candidates else None
+
+        if vector is None:
+            self.misses += 1
+            return None
+
+        similarities = np.stack([stored for _, stored in candidates]) @ vector
+        best = int(np.argmax(similarities))
+
+        if similarities[best] < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        logger.info(
+            "Answer cache hit (similarity %.3f) for %r ~ %r", similarities[best], question, candidates[best][0].question
+        )
+        self.hits += 1
+
+        return candidates[best][0]
+
+    async def store(self, question: str, context: str, answer: str) -> None:
+        """Cache an answer, replacing any entry for the same normalized question"""
+        normalized = normalize_text(question)
+        entries = [entry for entry in self.fresh_entries(context) if entry.normalized != normalized]
+        entries.append(CachedAnswer(question, normalized, await self.embed(normalized), answer))
+
+        self.entries[context] = entries[-self.max_entries_per_context :]
+
+    def invalidate(self, context: str | None = None) -> None:
+        """Forget cached answers for one context, or for all of them"""
+        if context is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(context, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": {context: len(entries) for context, entries in self.entries.items()},
+        }
+
+
+def create_answer_cache() -> AnswerCache:
+    """Build the answer cache from settings"""
+    embeddings = (
+        GoogleGenerativeAIEmbeddings(model=settings.ANSWER_CACHE_EMBEDDING_MODEL)
+        if settings.ANSWER_CACHE_EMBEDDING_MODEL
+        else None
+    )
+
+    return AnswerCache(
+        embeddings=embeddings,
+        ttl=settings.ANSWER_CACHE_TTL,
+        similarity_threshold=settings.ANSWER_CACHE_SIMILARITY,
+        max_entries_per_context=constants.ANSWER_CACHE_MAX_ENTRIES_PER_CONTEXT,
+    )
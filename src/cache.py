@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from redis.asyncio import Redis
+
+from .constants import constants
+from .logger import logger
+from .settings import settings
+from .tools import ToolOutput, call_tool, derive_tool
+
+# Seconds each MCP tool result stays fresh; tools missing here use TOOL_CACHE_DEFAULT_TTL
+DEFAULT_TOOL_TTLS: dict[str, int] = {
+    "list-k8s-contexts": 3600,
+    "list-k8s-namespaces": 600,
+    "list-k8s-nodes": 120,
+    "list-k8s-resources": 30,
+    "get-k8s-resource": 30,
+    "list-k8s-events": 10,
+    "get-k8s-pod-logs": 10,
+}
+
+
+def canonical_key(tool_name: str, arguments: dict[str, Any]) -> str:
+    """Cache key from the tool name and its arguments, ignoring key order and unset values"""
+    canonical_args = {key: value for key, value in arguments.items() if value is not None}
+    payload = json.dumps(canonical_args, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+
+    return f"{tool_name}:{digest}"
+
+
+@dataclass
+class CacheEntry:
+    value: ToolOutput
+    expires_at: float
+
+
+@dataclass
+class ToolCache:
+    """TTL + LRU cache for MCP tool results, optionally shared between replicas through Redis"""
+
+    max_entries: int
+    default_ttl: int
+    ttls: dict[str, int] = field(default_factory=dict)
+    redis: Redis | None = None
+    entries: OrderedDict[str, CacheEntry] = field(default_factory=OrderedDict)
+    pending: dict[str, asyncio.Future[ToolOutput]] = field(default_factory=dict)
+    hits: Counter[str] = field(default_factory=Counter)
+    misses: Counter[str] = field(default_factory=Counter)
+    coalesced: Counter[str] = field(default_factory=Counter)
+
+    def ttl_for(self, tool_name: str) -> int:
+        """TTL in seconds for a tool (0 disables caching)"""
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    async def get(self, key: str) -> ToolOutput | None:
+        """Look up a fresh entry in memory, then in Redis"""
+        match self.entries.get(key):
+            case CacheEntry(value=value, expires_at=expires_at) if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                return value
+            case CacheEntry():
+                del self.entries[key]
+            case None:
+                pass
+
+        if self.redis is None:
+            return None
+
+        redis_key = f"{constants.TOOL_CACHE_REDIS_PREFIX}{key}"
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(redis_key)
+                pipe.ttl(redis_key)
+                raw, remaining = await pipe.execute()
+        except Exception as e:
+            logger.warning("Tool cache Redis lookup failed: %s", e)
+            return None
+
+        if not raw or remaining <= 0:
+            return None
+
+        content, artifact = json.loads(raw)
+        self.store_local(key, (content, artifact), remaining)
+
+        return content, artifact
+
+    def store_local(self, key: str, value: ToolOutput, ttl: int) -> None:
+        """Store an entry in memory, evicting the least recently used ones past max_entries"""
+        self.entries[key] = CacheEntry(value=value, expires_at=time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def set(self, key: str, value: ToolOutput, ttl: int) -> None:
+        """Store an entry in memory and, when configured, in Redis"""
+        self.store_local(key, value, ttl)
+
+        if self.redis is None:
+            return
+
+        try:
+            payload = json.dumps(list(value))
+        except TypeError:
+            logger.debug("Tool result for %s is not JSON serializable, keeping it local", key)
+            return
+
+        try:
+            await self.redis.set(f"{constants.TOOL_CACHE_REDIS_PREFIX}{key}", payload, ex=ttl)
+        except Exception as e:
+            logger.warning("Tool cache Redis write failed: %s", e)
+
+    async def call(self, tool: BaseTool, arguments: dict[str, Any]) -> ToolOutput:
+        """Return a cached result or call the tool, sharing one call between concurrent identical requests"""
+        key = canonical_key(tool.name, arguments)
+
+        while True:
+            if (cached := await self.get(key)) is not None:
+                self.hits[tool.name] += 1
+                return cached
+
+            if (pending := self.pending.get(key)) is None:
+                break
+
+            self.coalesced[tool.name] += 1
+
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the owner's question was cancelled, not ours: retry and possibly take over the call
+                task = asyncio.current_task()
+                if not pending.cancelled() or task is None or task.cancelling():
+                    raise
+
+        self.misses[tool.name] += 1
+        future: asyncio.Future[ToolOutput] = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+
+        try:
+            result = await call_tool(tool, arguments)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self.pending.pop(key, None)
+
+        future.set_result(result)
+        await self.set(key, result, self.ttl_for(tool.name))
+
+        return result
+
+    def wrap(self, tool: BaseTool) -> BaseTool:
+        """Wrap a tool with the cache unless its TTL disables caching"""
+        if self.ttl_for(tool.name) <= 0:
+            return tool
+
+        return derive_tool(tool, partial(self.call, tool))
+
+    def wrap_tools(self, tools: list[BaseTool]) -> list[BaseTool]:
+        """Wrap every cacheable tool"""
+        return [self.wrap(tool) for tool in tools]
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters per tool and current size"""
+        return {
+            "entries": len(self.entries),
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "coalesced": dict(self.coalesced),
+        }
+
+
+def create_tool_cache() -> ToolCache:
+    """Build the tool cache from settings"""
+    redis = Redis.from_url(settings.REDIS_URL) if settings.TOOL_CACHE_REDIS and settings.REDIS_URL else None
+
+    return ToolCache(
+        max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+        default_ttl=settings.TOOL_CACHE_DEFAULT_TTL,
+        ttls={**DEFAULT_TOOL_TTLS, **settings.TOOL_CACHE_TTLS},
+        redis=redis,
+    )
@@ -0,0 +1,42 @@
+from .fanout import ToolFanout
+from .resources import parse_records
+from .settings import settings
+from .utils import normalize_text
+
+
+def context_aliases(contexts: dict[str, str]) -> dict[str, str]:
+    """Names users call each cluster by, from its project id (e.g. rj-superapp-staging -> "superapp staging")"""
+    aliases: dict[str, str] = {}
+    prefix_aliases: dict[str, str] = {}
+
+    for project, context in contexts.items():
+        words = normalize_text(project.removeprefix("rj-").replace("-", " ")).split()
+
+        aliases[normalize_text(project)] = context
+        aliases[" ".join(words)] = context
+
+        for size in range(1, len(words)):
+            prefix_aliases.setdefault(" ".join(words[:size]), context)
+
+    return {**prefix_aliases, **aliases}
+
+
+def resolve_cluster_context(question: str, contexts: dict[str, str]) -> str | None:
+    """Context whose longest alias appears in the question, if any"""
+    normalized = f" {normalize_text(question).replace('-', ' ')} "
+    matches = [
+        (len(alias), context)
+        for alias, context in context_aliases(contexts).items()
+        if f" {alias.replace('-', ' ')} " in normalized or context in question
+    ]
+
+    return max(matches)[1] if matches else None
+
+
+async def discover_contexts(fanout: ToolFanout) -> list[str]:
+    """Configured cluster contexts, or every context the MCP server knows about"""
+    if contexts := list(settings.cluster_contexts.values()):
+        return contexts
+
+    records = parse_records(await fanout.invoke("list-k8s-contexts", {})) or []
+    return [str(record["name"]) for record in records if record.get("name")]
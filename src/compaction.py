@@ -0,0 +1,180 @@
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import Runnable, RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from .constants import constants
+from .logger import logger
+from .settings import settings
+from .templates import load_prompt_text
+
+
+def human_turn_starts(messages: list[BaseMessage]) -> list[int]:
+    """Indexes of the human messages that start each turn"""
+    return [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+
+def render_transcript(messages: list[BaseMessage], max_chars: int) -> str:
+    """Flatten messages into a plain transcript for the summarizer, clipping each entry"""
+    lines = []
+
+    for message in messages:
+        content = message.text()
+        clipped = content if len(content) <= max_chars else f"{content[:max_chars]}… [{len(content)} caracteres]"
+        lines.append(f"[{message.type}] {clipped}")
+
+    return "\n\n".join(lines)
+
+
+@dataclass
+class MessageCompactor:
+    """pre_model_hook that keeps the worker's checkpointed history within a token budget"""
+
+    model: Runnable[LanguageModelInput, BaseMessage]
+    max_tokens: int
+    keep_tokens: int
+    stub_after_turns: int
+    stub_min_chars: int
+    summary_prompt: str = field(default_factory=lambda: load_prompt_text("compaction.md"))
+    token_counts: OrderedDict[str, int] = field(default_factory=OrderedDict)
+    counted_at: dict[str, float] = field(default_factory=dict)
+    counters: Counter[str] = field(default_factory=Counter)
+
+    def is_stubbable(self, content: str) -> bool:
+        return len(content) >= self.stub_min_chars and not content.startswith(constants.COMPACTION_STUB_PREFIX)
+
+    def stub_old_tool_outputs(self, messages: list[BaseMessage]) -> list[ToolMessage]:
+        """Replacements (same ids) for large tool outputs older than `stub_after_turns` human turns"""
+        turns = human_turn_starts(messages)
+
+        if len(turns) <= self.stub_after_turns:
+            return []
+
+        cutoff = turns[-self.stub_after_turns]
+        stubs = []
+
+        for message in messages[:cutoff]:
+            match message:
+                case ToolMessage(content=str(content)) if self.is_stubbable(content):
+                    stubs.append(
+                        ToolMessage(
+                            content=(
+                                f"{constants.COMPACTION_STUB_PREFIX} saída de {message.name or 'ferramenta'} "
+                                f"removida ({len(content)} caracteres); execute a ferramenta de novo se precisar]"
+                            ),
+                            tool_call_id=message.tool_call_id,
+                            name=message.name,
+                            id=message.id,
+                        )
+                    )
+                case _:
+                    pass
+
+        return stubs
+
+    def window_start(self, messages: list[BaseMessage]) -> int:
+        """Earliest human turn such that everything after it fits in `keep_tokens` (at least the last turn)"""
+        turns = human_turn_starts(messages)
+
+        if not turns:
+            return 0
+
+        start = turns[-1]
+
+        for index in reversed(turns[:-1]):
+            if count_tokens_approximately(messages[index:]) > self.keep_tokens:
+                break
+            start = index
+
+        return start
+
+    def record_tokens(self, thread_id: str, tokens: int) -> None:
+        """Remember a thread's history size, forgetting threads not seen within COMPACTION_TOKEN_COUNT_TTL"""
+        now = time.monotonic()
+        self.token_counts[thread_id] = tokens
+        self.token_counts.move_to_end(thread_id)
+        self.counted_at[thread_id] = now
+
+        horizon = now - constants.COMPACTION_TOKEN_COUNT_TTL
+
+        while self.counted_at[oldest := next(iter(self.token_counts))] < horizon:
+            del self.token_counts[oldest]
+            del self.counted_at[oldest]
+
+    async def summarize(self, messages: list[BaseMessage]) -> str:
+        """Summarize older turns with the model, hidden from the Discord token stream"""
+        transcript = render_transcript(messages, constants.COMPACTION_TRANSCRIPT_CLIP)
+        response = await self.model.ainvoke(
+            [SystemMessage(content=self.summary_prompt), HumanMessage(content=transcript)],
+            config=RunnableConfig(tags=[TAG_NOSTREAM]),
+        )
+
+        return response.text()
+
+    async def compact(self, state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
+        """Stub stale tool outputs and summarize older turns once the history exceeds `max_tokens`"""
+        thread_id = config.get("configurable", {}).get("thread_id", "unknown")
+        stubs = self.stub_old_tool_outputs(state["messages"])
+        replaced = {stub.id: stub for stub in stubs}
+        messages = [replaced.get(message.id, message) for message in state["messages"]]
+
+        self.counters["stubbed_tool_outputs"] += len(stubs)
+
+        tokens = count_tokens_approximately(messages)
+
+        if tokens <= self.max_tokens:
+            self.record_tokens(thread_id, tokens)
+            return {"messages": stubs} if stubs else {}
+
+        start = self.window_start(messages)
+
+        if start == 0:
+            self.record_tokens(thread_id, tokens)
+            return {"messages": stubs} if stubs else {}
+
+        try:
+            summary = await self.summarize(messages[:start])
+        except Exception as e:
+            logger.warning("History summarization failed for %s: %s", thread_id, e)
+            self.counters["summarization_failures"] += 1
+            self.record_tokens(thread_id, tokens)
+            return {"messages": stubs} if stubs else {}
+
+        compacted = [HumanMessage(content=f"{constants.COMPACTION_SUMMARY_PREFIX}\n\n{summary}"), *messages[start:]]
+        compacted_tokens = count_tokens_approximately(compacted)
+
+        self.counters["summarizations"] += 1
+        self.record_tokens(thread_id, compacted_tokens)
+
+        logger.info(
+            "Compacted history for %s: %d messages/%d tokens -> %d messages/%d tokens",
+            thread_id,
+            len(messages),
+            tokens,
+            len(compacted),
+            compacted_tokens,
+        )
+
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *compacted]}
+
+    def stats(self) -> dict[str, Any]:
+        """Per-thread token counts and compaction counters"""
+        return {"thread_tokens": dict(self.token_counts), **self.counters}
+
+
+def create_compactor(model: Runnable[LanguageModelInput, BaseMessage]) -> MessageCompactor:
+    """Build the worker history compactor from settings"""
+    return MessageCompactor(
+        model=model,
+        max_tokens=settings.COMPACTION_MAX_TOKENS,
+        keep_tokens=settings.COMPACTION_KEEP_TOKENS,
+        stub_after_turns=settings.COMPACTION_STUB_AFTER_TURNS,
+        stub_min_chars=settings.COMPACTION_STUB_MIN_CHARS,
+    )
@@ -10,6 +10,14 @@ class MessageState(Enum):
     VALID_DM_MESSAGE = "valid_dm_message"
 
 
+class DeploymentMode(str, Enum):
+    """How this process takes part in serving Discord questions"""
+
+    STANDALONE = "standalone"
+    GATEWAY = "gateway"
+    WORKER = "worker"
+
+
 class EvaluationDecision(str, Enum):
     """Allowed evaluation decisions"""
 
@@ -17,6 +25,38 @@ class EvaluationDecision(str, Enum):
     REFINE = "REFINAR"
 
 
+class LogFormat(str, Enum):
+    """How log records are rendered"""
+
+    JSON = "json"
+    TEXT = "text"
+
+
+class ProgressKind(str, Enum):
+    """Kinds of progress events streamed while a question is processed"""
+
+    PLAN = "plan"
+    TOOL = "tool"
+    TOKEN = "token"
+    INTERRUPT = "interrupt"
+    FINAL = "final"
+
+
+class QuestionRoute(str, Enum):
+    """Entry routes into the supervisor-worker workflow"""
+
+    DIRECT = "direct"
+    SUPERVISED = "supervised"
+
+
+class TraceExporter(str, Enum):
+    """Where sampled question traces are exported"""
+
+    MLFLOW = "mlflow"
+    FILE = "file"
+    NONE = "none"
+
+
 class WorkflowDecision(str, Enum):
     """Workflow decision options"""
 
@@ -26,30 +66,161 @@ class WorkflowDecision(str, Enum):
 
 @dataclass(frozen=True)
 class Constants:
-    AGENT_INITIALIZING_MESSAGE: str = "Bot está inicializando..."
+    ADMIN_DENIED_MESSAGE: str = "🔒 Este comando é restrito a administradores."
+    AGENT_INITIALIZING_MESSAGE: str = "Bot está inicializando... sua pergunta será respondida assim que estiver pronto."
+    AGENT_UNAVAILABLE_MESSAGE: str = "❌ Bot não conseguiu inicializar. Tente novamente em alguns instantes."
+    ANSWER_CACHE_ANY_CONTEXT: str = "*"
+    ANSWER_CACHE_HIT_NOTE: str = "_♻️ Resposta em cache de {age} atrás — use `!sherlock --fresh` para atualizar._"
+    ANSWER_CACHE_MAX_ENTRIES_PER_CONTEXT: int = 100
+    ATTACHMENT_FILENAME: str = "sherlock-resposta.md"
+    ATTACHMENT_NOTE: str = "📎 _Resposta completa ({chars} caracteres) no anexo._"
     DEFAULT_AGENT_TIMEOUT: int = 300
+    CHECKPOINT_SIZES_KEY: str = "sherlock:checkpoint-sizes"
+    CHECKPOINT_SWEEP_LOCK: str = "sherlock:checkpoint-sweep"
+    CHECKPOINTS_COMMAND: str = "checkpoints"
+    CHECKPOINTS_PENDING_MESSAGE: str = "🗄️ Nenhuma varredura de checkpoints concluída ainda."
+    CHECKPOINTS_REPORT_ROWS: int = 15
+    DEADLINE_EVALUATE_SHARE: float = 0.15
+    DEADLINE_PLAN_SHARE: float = 0.15
+    COMPACTION_STUB_PREFIX: str = "[compactado:"
+    COMPACTION_SUMMARY_PREFIX: str = "Resumo da conversa anterior (mensagens antigas foram compactadas):"
+    COMPACTION_TRANSCRIPT_CLIP: int = 2000
+    COMPACTION_TOKEN_COUNT_TTL: int = 86400
+    DEFAULT_ANSWER_CACHE_EMBEDDING_MODEL: str = "models/text-embedding-004"
+    DEFAULT_ANSWER_CACHE_SIMILARITY: float = 0.92
+    DEFAULT_ANSWER_CACHE_TTL: int = 300
+    DEFAULT_CHECKPOINT_COMPRESSION_LEVEL: int = 3
+    DEFAULT_CHECKPOINT_COMPRESSION_THRESHOLD: int = 2048
+    DEFAULT_CHECKPOINT_KEEP_LATEST: int = 20
+    DEFAULT_CHECKPOINT_REF_THRESHOLD: int = 4096
+    DEFAULT_CHECKPOINT_SWEEP_INTERVAL: int = 300
+    DEFAULT_CHECKPOINT_TTL: int = 604800
+    DEFAULT_COMPACTION_KEEP_TOKENS: int = 8000
+    DEFAULT_COMPACTION_MAX_TOKENS: int = 24000
+    DEFAULT_COMPACTION_STUB_AFTER_TURNS: int = 2
+    DEFAULT_COMPACTION_STUB_MIN_CHARS: int = 2000
+    DEFAULT_DIGEST_MAX_RAW_OUTPUTS: int = 64
+    DEFAULT_DIGEST_THRESHOLD: int = 6000
+    DEFAULT_DISPATCH_MAX_CONCURRENCY: int = 4
+    DEFAULT_DISPATCH_MAX_IN_FLIGHT: int = 32
+    DIGEST_LOG_HEAD: int = 20
+    DIGEST_LOG_TAIL: int = 40
+    DIGEST_MAX_ERRORS: int = 30
+    DIGEST_MAX_ROWS: int = 60
+    DIGEST_RAW_PAGE: int = 8000
     DEFAULT_DATE_FORMAT: str = "%Y-%m-%d %H:%M:%S"
     DEFAULT_HEALTH_HOST: str = "0.0.0.0"
     DEFAULT_HEALTH_PORT: int = 8080
     DEFAULT_KUBECONFIG_PATH: str = "/root/.kube/config"
-    DEFAULT_LOG_FORMAT: str = "[%(levelname)s] %(asctime)s - %(name)s - %(message)s"
+    DEFAULT_LOG_INDEX_INLINE_CHARS: int = 4000
+    DEFAULT_LOG_INDEX_MAX_LINES: int = 200_000
+    DEFAULT_LOG_INDEX_TTL: int = 600
+    DEFAULT_LOG_FORMAT: LogFormat = LogFormat.JSON
     DEFAULT_LOG_LEVEL: str = "INFO"
     DEFAULT_LOG_TRUNCATE_LENGTH: int = 100
+    DEFAULT_LOOP_STALL_SECONDS: float = 0.25
     DEFAULT_MAX_WAIT: int = 30
+    DEFAULT_MESSAGE_ATTACHMENT_THRESHOLD: int = 8000
+    DEFAULT_MCP_PING_INTERVAL: int = 30
+    DEFAULT_MCP_POOL_SIZE: int = 2
+    DEFAULT_MCP_SERVER: str = "mcp-k8s-go"
+    DEFAULT_MODEL_BREAKER_COOLDOWN: int = 30
+    DEFAULT_MODEL_BREAKER_ERROR_RATE: float = 0.5
+    DEFAULT_MODEL_HEALTH_WINDOW: int = 50
+    DEFAULT_MODEL_HEDGE_DELAY: float = 8.0
+    DEFAULT_MODEL_HEDGE_MIN_DELAY: float = 1.0
     DEFAULT_MODEL_NAME: str = "gemini-2.5-flash-lite"
+    DEFAULT_FANOUT_MAX_CONCURRENCY_PER_SERVER: int = 4
     DEFAULT_FALLBACK_MODEL_NAME: str = "gemini-2.5-flash"
     DEFAULT_RECURSION_LIMIT: int = 50
+    DEFAULT_QUESTION_LATENCY_BUDGET: int = 180
+    DEFAULT_RATE_LIMIT_CHANNEL_BURST: int = 10
+    DEFAULT_RATE_LIMIT_CHANNEL_PER_MINUTE: float = 20.0
+    DEFAULT_RATE_LIMIT_USER_BURST: int = 3
+    DEFAULT_RATE_LIMIT_USER_PER_MINUTE: float = 4.0
     DEFAULT_REFLECTION_ITERATIONS: int = 2
     DISCORD_CHAR_LIMIT: int = 2000
+    DISCORD_SEND_BURST: int = 5
+    DISCORD_SEND_WINDOW: float = 5.0
+    DEFAULT_TOOL_CACHE_MAX_ENTRIES: int = 512
+    DEFAULT_TOOL_CACHE_TTL: int = 0
+    DEFAULT_STREAM_EDIT_INTERVAL: float = 1.5
+    DEFAULT_SHARD_LEASE_TTL: int = 30
+    DEFAULT_SNAPSHOT_INTERVAL: int = 60
+    DEFAULT_SNAPSHOT_MAX_CHANGES: int = 2000
+    DEFAULT_TOKEN_QUOTA_PER_USER: int = 500_000
+    DEFAULT_TOKEN_QUOTA_WINDOW: int = 3600
+    DEFAULT_TRACING_BATCH_SIZE: int = 32
+    DEFAULT_TRACING_BUFFER_SIZE: int = 256
+    DEFAULT_TRACING_FILE: str = "traces.jsonl"
+    DEFAULT_TRACING_FLUSH_INTERVAL: int = 5
+    DEFAULT_TRACING_SAMPLE_RATE: float = 0.05
+    DEFAULT_TRACING_SLOW_SECONDS: int = 60
+    DEFAULT_TRIAGE_MAX_FINDINGS: int = 10
+    DEFAULT_TRIAGE_PROBE_TIMEOUT: int = 15
+    DEFAULT_WORK_SHARDS: int = 16
     DM_DISABLED_MESSAGE: str = "DMs não estão habilitadas para este bot."
+    HEALTHY_STATUSES: frozenset[str] = frozenset({"Running", "Succeeded", "Completed", "Active", "Ready", "Bound"})
     KUBECONFIG_MCP_PATH: str = "/root/.kube/config"
     LOGGER_NAME: str = "kube-sherlock"
+    LOG_REDACTED: str = "***"
+    LOG_TEXT_FORMAT: str = "[%(levelname)s] %(asctime)s - %(name)s - %(message)s"
+    LOG_HISTOGRAM_MAX_BUCKETS: int = 48
+    LOG_LINE_CLIP: int = 300
+    LOG_OVERVIEW_ERRORS: int = 10
+    LOG_OVERVIEW_TAIL: int = 10
+    LOG_SEARCH_DEFAULT_LIMIT: int = 30
+    LOG_SEARCH_MAX_LIMIT: int = 200
+    LOOP_STALL_HISTORY: int = 20
+    LOOP_WATCHDOG_INTERVAL: float = 0.1
+    METRICS_TOP_THREADS: int = 10
+    MCP_RESTART_BACKOFF: float = 1.0
+    MODEL_HEALTH_MIN_SAMPLES: int = 5
+    MAX_CHECKPOINT_COMPRESSION_LEVEL: int = 22
     MAX_RECURSION_LIMIT: int = 100
     MAX_REFLECTION_ITERATIONS: int = 10
+    FRESH_FLAG: str = "--fresh"
+    PARTIAL_ANSWER_NOTE: str = (
+        "⏱️ _Resposta parcial ({reason} antes de concluir a análise). Estes são os dados coletados até agora:_"
+    )
+    PARTIAL_TOOL_OUTPUT_CLIP: int = 1500
+    PROFILE_DEFAULT_SECONDS: float = 10.0
+    PROFILE_MAX_SECONDS: float = 120.0
+    PROFILE_SAMPLE_INTERVAL: float = 0.005
+    QUEUE_FULL_MESSAGE: str = "🚦 Sherlock está sobrecarregado no momento. Tente novamente em alguns instantes."
+    QUEUE_POSITION_MESSAGE: str = "⏳ Você é o #{position} na fila. Sua pergunta será respondida em breve."
+    RATE_LIMIT_REDIS_PREFIX: str = "sherlock:ratelimit:"
+    RATE_LIMIT_STATS_USERS: int = 10
+    RATE_LIMITED_CHANNEL_MESSAGE: str = "⏱️ Muitas perguntas neste canal em pouco tempo. Tente novamente em {retry}."
+    RATE_LIMITED_USER_MESSAGE: str = "⏱️ Você fez muitas perguntas em pouco tempo. Tente novamente em {retry}."
     RESET_COMMAND: str = "!reset"
     RESET_ERROR_MESSAGE: str = "❌ Erro ao resetar conversa. Erro: {error}"
     RESET_SUCCESS_MESSAGE: str = "✅ Conversa resetada! Histórico apagado."
+    SCAN_BATCH: int = 500
     SHERLOCK_COMMAND: str = "!sherlock"
+    SNAPSHOT_MAX_ROWS: int = 60
+    STREAM_PLAN_LABEL: str = "🧭 **Plano:**"
+    STREAM_THINKING_MESSAGE: str = "🔎 Investigando..."
+    STREAM_TOOL_LABEL: str = "🔧"
+    STREAM_TOOLS_SHOWN: int = 5
+    TIMINGS_FLAG: str = "--timings"
+    TIMINGS_HEADER: str = "⏱️ **Tempo por fase** (total {total:.1f}s)"
+    TIMINGS_MAX_ROWS: int = 40
+    TRACE_MAX_SPANS: int = 2000
+    TRACE_PAYLOAD_CLIP: int = 1000
+    TRIAGE_COMMAND: str = "triage"
+    TRIAGE_DETAIL_CLIP: int = 120
+    TRIAGE_ERROR_MESSAGE: str = "❌ Erro ao executar a triagem. Erro: {error}"
+    TRIAGE_REPORT_ROWS: int = 20
+    TRIAGE_RESTART_THRESHOLD: int = 5
+    TRIAGE_UNKNOWN_CLUSTER_MESSAGE: str = "❓ Cluster `{target}` não encontrado. Clusters disponíveis: {clusters}"
+    TOKEN_QUOTA_MESSAGE: str = "💸 Você atingiu sua cota de tokens do LLM. Tente novamente em {retry}."
+    TOOL_CACHE_REDIS_PREFIX: str = "sherlock:tool-cache:"
+    WORKER_RUN_TAG: str = "sherlock-worker"
+    WORK_STREAM_BLOCK_MS: int = 5000
+    WORK_STREAM_GROUP: str = "sherlock-workers"
+    WORK_STREAM_MAXLEN: int = 10000
+    WORK_STREAM_PREFIX: str = "sherlock:work"
     WHITELIST_DENIED_MESSAGE: str = "Você não está autorizado a usar este bot."
     DEFAULT_MLFLOW_EXPERIMENT: str = "kube-sherlock"
     DEFAULT_MLFLOW_TRACKING_URI: str = "http://mlflow:5000"
@@ -0,0 +1,53 @@
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from .constants import constants
+
+
+def node_budget(node: str, deadline: float, now: float) -> float:
+    """Seconds `node` may run: its share of what is left of one plan → execute → evaluate iteration.
+
+    Later nodes get every second the earlier ones did not use, so a fast plan leaves the worker more time.
+    """
+    remaining = max(deadline - now, 0.0)
+    plan_share = constants.DEADLINE_PLAN_SHARE
+    evaluate_share = constants.DEADLINE_EVALUATE_SHARE
+
+    match node:
+        case "create_plan":
+            share = plan_share
+        case "execute_task":
+            share = (1 - plan_share - evaluate_share) / (1 - plan_share)
+        case _:
+            share = 1.0
+
+    return remaining * share
+
+
+def refinement_deadline(deadline: float, timeout: float, latency_budget: float) -> float:
+    """When the reflection loop stops refining: `latency_budget` seconds into the `timeout` that ends at `deadline`"""
+    return deadline - timeout + min(latency_budget, timeout)
+
+
+def partial_answer(messages: list[BaseMessage]) -> str:
+    """Best-effort answer from what the worker gathered before its deadline: its notes and tool outputs"""
+    sections: list[str] = []
+
+    for message in reversed(messages):
+        match message:
+            case HumanMessage():
+                break
+            case ToolMessage(name=name) if text := message.text():
+                clip = constants.PARTIAL_TOOL_OUTPUT_CLIP
+                body = text if len(text) <= clip else f"{text[:clip]}\n… ({len(text) - clip} caracteres omitidos)"
+                sections.append(f"**{name or 'ferramenta'}**\n```\n{body}\n```")
+            case AIMessage() if text := message.text():
+                sections.append(text)
+            case _:
+                pass
+
+    return "\n\n".join(reversed(sections))
+
+
+def is_partial_answer(response: str) -> bool:
+    """Whether a response was cut short by the deadline, so it is never cached as a complete answer"""
+    return response.startswith(constants.PARTIAL_ANSWER_NOTE.partition("(")[0])
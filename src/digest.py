@@ -0,0 +1,199 @@
+import hashlib
+import io
+import re
+from collections import Counter, OrderedDict, deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from .constants import constants
+from .logger import logger
+from .resources import ResourceRow, content_text, is_resource_record, parse_records, resource_row
+from .settings import settings
+from .tools import ToolOutput, call_tool, derive_tool
+
+LOG_TOOLS = frozenset({"get-k8s-pod-logs"})
+
+ERROR_PATTERN = re.compile(
+    r"\b(error|erro|exception|fatal|panic|fail(ed|ure)?|traceback|critical|refused|timeout|oomkilled|killed)\b",
+    re.IGNORECASE,
+)
+
+VOLATILE_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"  # timestamps
+    r"|\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"  # uuids
+    r"|\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b"  # hex ids
+    r"|\d+(\.\d+)?",  # numbers
+    re.IGNORECASE,
+)
+
+
+def line_signature(line: str) -> str:
+    """Line with timestamps, ids and numbers masked, so repeats of the same message group together"""
+    return VOLATILE_PATTERN.sub("#", line.strip())
+
+
+def digest_logs(lines: Iterable[str], head: int, tail: int, max_errors: int) -> str:
+    """Single pass over log lines keeping head/tail windows, error lines and repeat counts"""
+    head_lines: list[str] = []
+    tail_lines: deque[str] = deque(maxlen=tail)
+    signatures: Counter[str] = Counter()
+    examples: dict[str, str] = {}
+    errors: OrderedDict[str, str] = OrderedDict()
+    total = 0
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        total += 1
+        signature = line_signature(line)
+        signatures[signature] += 1
+        examples.setdefault(signature, line)
+
+        if len(head_lines) < head:
+            head_lines.append(line)
+        else:
+            tail_lines.append(line)
+
+        if ERROR_PATTERN.search(line) and (signature in errors or len(errors) < max_errors):
+            errors[signature] = line
+
+    def with_count(line: str) -> str:
+        count = signatures[line_signature(line)]
+        return f"{line}  (x{count})" if count > 1 else line
+
+    sections = [f"[digest de log: {total} linhas, {len(signatures)} mensagens distintas]"]
+
+    if errors:
+        sections.append("## Linhas de erro\n" + "\n".join(with_count(line) for line in errors.values()))
+
+    repeated = [(signature, count) for signature, count in signatures.most_common(max_errors) if count > 1]
+
+    if repeated:
+        sections.append("## Mais repetidas\n" + "\n".join(f"x{count} {examples[sig]}" for sig, count in repeated))
+
+    sections.append("## Início\n" + "\n".join(head_lines))
+
+    if tail_lines:
+        sections.append("## Fim\n" + "\n".join(tail_lines))
+
+    return "\n\n".join(sections)
+
+
+def digest_resources(records: list[dict[str, Any]], max_rows: int) -> str:
+    """Collapse resource objects into a name/namespace/status/restarts/age table"""
+    return render_rows([resource_row(record) for record in records], max_rows)
+
+
+def render_rows(resources: Iterable[ResourceRow], max_rows: int) -> str:
+    """Status summary plus a table with unhealthy and restarting resources first"""
+    rows = sorted(
+        resources,
+        key=lambda row: (row.status in constants.HEALTHY_STATUSES, -row.restarts, row.namespace, row.name),
+    )
+    statuses = Counter(row.status for row in rows)
+
+    lines = [
+        f"[digest de recursos: {len(rows)} itens; "
+        + ", ".join(f"{status}={count}" for status, count in statuses.most_common())
+        + "]",
+        "NAME | NAMESPACE | STATUS | RESTARTS | AGE",
+    ]
+    lines.extend(f"{r.name} | {r.namespace} | {r.status} | {r.restarts} | {r.age}" for r in rows[:max_rows])
+
+    if len(rows) > max_rows:
+        lines.append(f"… {len(rows) - max_rows} itens saudáveis omitidos")
+
+    return "\n".join(lines)
+
+
+def clip_text(text: str, head_chars: int, tail_chars: int) -> str:
+    """Keep the beginning and end of an unstructured payload"""
+    omitted = len(text) - head_chars - tail_chars
+    return f"{text[:head_chars]}\n… [{omitted} caracteres omitidos] …\n{text[-tail_chars:]}"
+
+
+@dataclass
+class OutputDigester:
+    """Shrinks oversized tool outputs before they reach the LLM, keeping the raw payload retrievable by reference"""
+
+    threshold: int
+    max_raw_outputs: int
+    raw_outputs: OrderedDict[str, str] = field(default_factory=OrderedDict)
+    saved_chars: int = 0
+
+    def remember(self, raw: str) -> str:
+        """Store a raw payload and return its reference"""
+        ref = hashlib.sha1(raw.encode()).hexdigest()[:12]
+        self.raw_outputs[ref] = raw
+        self.raw_outputs.move_to_end(ref)
+
+        while len(self.raw_outputs) > self.max_raw_outputs:
+            self.raw_outputs.popitem(last=False)
+
+        return ref
+
+    def digest(self, tool_name: str, content: Any) -> str | None:
+        """Digested text for oversized content, or None to pass the original through"""
+        raw = content_text(content)
+
+        if len(raw) <= self.threshold:
+            return None
+
+        if tool_name in LOG_TOOLS:
+            digested = digest_logs(
+                (line.rstrip("\n") for line in io.StringIO(raw)),
+                constants.DIGEST_LOG_HEAD,
+                constants.DIGEST_LOG_TAIL,
+                constants.DIGEST_MAX_ERRORS,
+            )
+        elif (records := parse_records(content)) and all(is_resource_record(record) for record in records):
+            digested = digest_resources(records, constants.DIGEST_MAX_ROWS)
+        else:
+            digested = clip_text(raw, self.threshold // 2, self.threshold // 4)
+
+        ref = self.remember(raw)
+        self.saved_chars += len(raw) - len(digested)
+
+        logger.debug("Digested %s output: %d -> %d chars (ref %s)", tool_name, len(raw), len(digested), ref)
+
+        return f"{digested}\n\n[saída completa: ref={ref}, {len(raw)} caracteres — use get-raw-tool-output se precisar]"
+
+    async def call(self, tool: BaseTool, arguments: dict[str, Any]) -> ToolOutput:
+        content, artifact = await call_tool(tool, arguments)
+        digested = self.digest(tool.name, content)
+
+        return (content if digested is None else digested), artifact
+
+    def wrap_tools(self, tools: list[BaseTool]) -> list[BaseTool]:
+        """Wrap MCP tools so their output is digested, and add the raw output retrieval tool"""
+        return [*(derive_tool(tool, partial(self.call, tool)) for tool in tools), self.raw_output_tool()]
+
+    def read_raw(self, ref: str, offset: int = 0, limit: int = constants.DIGEST_RAW_PAGE) -> str:
+        """Page through a stored raw payload"""
+        if (raw := self.raw_outputs.get(ref)) is None:
+            return f"Referência {ref} não encontrada (saídas antigas são descartadas)."
+
+        page = raw[offset : offset + limit]
+        remaining = max(len(raw) - offset - len(page), 0)
+
+        return f"{page}\n\n[offset {offset}, {len(page)} caracteres, {remaining} restantes]"
+
+    def raw_output_tool(self) -> BaseTool:
+        async def get_raw_tool_output(ref: str, offset: int = 0, limit: int = constants.DIGEST_RAW_PAGE) -> str:
+            """Read the full raw output of a digested tool call by its ref, paging with offset/limit"""
+            return self.read_raw(ref, offset, limit)
+
+        return StructuredTool.from_function(coroutine=get_raw_tool_output, name="get-raw-tool-output")
+
+    def stats(self) -> dict[str, int]:
+        return {"raw_outputs": len(self.raw_outputs), "saved_chars": self.saved_chars}
+
+
+def create_digester() -> OutputDigester:
+    """Build the tool output digester from settings"""
+    return OutputDigester(threshold=settings.DIGEST_THRESHOLD, max_raw_outputs=settings.DIGEST_MAX_RAW_OUTPUTS)
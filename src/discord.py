@@ -1,13 +1,19 @@
+import asyncio
+import io
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import discord
 
 if TYPE_CHECKING:
     from discord.abc import Messageable, MessageableChannel
 
-from .constants import MessageState, constants
+from .constants import MessageState, ProgressKind, constants
 from .logger import logger
+from .profiling import timed_phase
+from .settings import settings
 from .utils import split_content
 
 
@@ -45,28 +51,180 @@ class MessageStateMachine:
         return new_state
 
 
+@dataclass
+class SendPacer:
+    """Per-channel sliding window that spaces sends to Discord's message rate limit instead of hitting 429s"""
+
+    burst: int = constants.DISCORD_SEND_BURST
+    window: float = constants.DISCORD_SEND_WINDOW
+    sent: dict[int, deque[float]] = field(default_factory=dict)
+    locks: dict[int, asyncio.Lock] = field(default_factory=dict)
+    swept_at: float = field(default_factory=time.monotonic)
+
+    def evict_idle(self, now: float) -> None:
+        """Forget channels with no send inside the window and no sender holding the lock"""
+        idle = [
+            channel_id
+            for channel_id, times in self.sent.items()
+            if (not times or times[-1] + self.window <= now) and not self.locks[channel_id].locked()
+        ]
+
+        for channel_id in idle:
+            del self.sent[channel_id]
+            del self.locks[channel_id]
+
+        self.swept_at = now
+
+    async def wait(self, channel_id: int) -> None:
+        """Sleep until the channel has room in its window; concurrent senders to a channel queue on its lock"""
+        if (now := time.monotonic()) - self.swept_at >= self.window:
+            self.evict_idle(now)
+
+        async with self.locks.setdefault(channel_id, asyncio.Lock()):
+            times = self.sent.setdefault(channel_id, deque(maxlen=self.burst))
+
+            if len(times) == self.burst and (delay := times[0] + self.window - time.monotonic()) > 0:
+                logger.debug("Pacing send to channel %d for %.2fs", channel_id, delay)
+                await asyncio.sleep(delay)
+
+            times.append(time.monotonic())
+
+
+send_pacer = SendPacer()
+
+
+async def paced_send(channel: "Messageable", content: str, **kwargs: Any) -> discord.Message:
+    with timed_phase("send", "message"):
+        await send_pacer.wait(getattr(channel, "id", 0))
+        return await channel.send(content, **kwargs)
+
+
 async def send_long_message(channel: "Messageable", content: str, max_length: int = constants.DISCORD_CHAR_LIMIT):
-    """Send a long message in chunks to avoid Discord's character limit."""
-    chunks = split_content(content, max_length)
+    """Send a long message in fence-aware chunks, paced to the channel's rate limit"""
+    for i, chunk in enumerate(split_content(content, max_length), start=1):
+        logger.debug("Sending chunk %d: %d chars", i, len(chunk))
+        await paced_send(channel, chunk)
+
 
-    for i, chunk in enumerate(chunks):
-        logger.debug("Sending chunk %d/%d: %d chars", i + 1, len(chunks), len(chunk))
-        await channel.send(chunk)
+async def send_as_attachment(channel: "Messageable", content: str):
+    """Send the opening of a very long answer inline and the full text as a Markdown file, in one request"""
+    note = constants.ATTACHMENT_NOTE.format(chars=len(content))
+    preview = next(split_content(content, constants.DISCORD_CHAR_LIMIT - len(note) - 2))
+    attachment = discord.File(io.BytesIO(content.encode()), filename=constants.ATTACHMENT_FILENAME)
 
+    await paced_send(channel, f"{preview}\n\n{note}", file=attachment)
 
-async def handle_sherlock_message(channel: "MessageableChannel", response: str):
-    """Handle a !sherlock command message with pre-generated response"""
+
+async def handle_sherlock_message(
+    channel: "MessageableChannel",
+    response: str,
+    placeholder: discord.Message | None = None,
+):
+    """Handle a !sherlock command message with pre-generated response, replacing the placeholder if given"""
     safe_limit = constants.DISCORD_CHAR_LIMIT - 50
 
+    if placeholder is not None:
+        try:
+            with timed_phase("send", "edit"):
+                if len(response) < safe_limit:
+                    await placeholder.edit(content=response)
+                    return
+
+                await placeholder.delete()
+        except discord.HTTPException as e:
+            logger.warning("Failed to replace progress message: %s", e)
+
     if len(response) < safe_limit:
         logger.info("Sending single message (under limit)")
 
         try:
-            await channel.send(response)
+            await paced_send(channel, response)
         except Exception as e:
-            logger.warning(f"Single message failed ({len(response)} chars), splitting: {e}")
+            logger.warning("Single message failed (%d chars), splitting: %s", len(response), e)
             await send_long_message(channel, response)
         return
 
+    if len(response) > settings.MESSAGE_ATTACHMENT_THRESHOLD:
+        logger.info("Sending as attachment (%d chars)", len(response))
+
+        try:
+            await send_as_attachment(channel, response)
+            return
+        except discord.HTTPException as e:
+            logger.warning("Attachment send failed, splitting: %s", e)
+
     logger.info("Sending as multiple chunks (over limit)")
     await send_long_message(channel, response)
+
+
+@dataclass
+class ProgressMessage:
+    """Single Discord message that is edited in place while a question streams"""
+
+    channel: "MessageableChannel"
+    edit_interval: float = field(default_factory=lambda: settings.STREAM_EDIT_INTERVAL)
+    message: discord.Message | None = None
+    plan: str = ""
+    tools: list[str] = field(default_factory=list)
+    text: str = ""
+    last_edit: float = 0.0
+    last_rendered: str = ""
+
+    def apply(self, kind: ProgressKind, content: str) -> None:
+        """Fold a progress event into the rendered state"""
+        match kind:
+            case ProgressKind.PLAN:
+                self.plan = content
+                self.text = ""
+            case ProgressKind.TOOL:
+                self.tools.append(content)
+                self.text = ""
+            case ProgressKind.TOKEN:
+                self.text += content
+            case _:
+                pass
+
+    def render(self) -> str:
+        """Render the progress state within Discord's character limit"""
+        lines = [constants.STREAM_THINKING_MESSAGE]
+
+        if self.plan:
+            lines.append(f"{constants.STREAM_PLAN_LABEL} {self.plan}")
+
+        lines.extend(f"{constants.STREAM_TOOL_LABEL} `{name}`" for name in self.tools[-constants.STREAM_TOOLS_SHOWN :])
+
+        header = "\n".join(lines)
+        budget = constants.DISCORD_CHAR_LIMIT - len(header) - 10
+
+        if not self.text or budget <= 0:
+            return header[: constants.DISCORD_CHAR_LIMIT]
+
+        text = self.text if len(self.text) <= budget else "…" + self.text[-budget + 1 :]
+
+        return f"{header}\n\n{text}"
+
+    async def update(self, kind: ProgressKind, content: str) -> None:
+        """Apply an event and edit the Discord message if the edit interval elapsed"""
+        self.apply(kind, content)
+
+        if time.monotonic() - self.last_edit >= self.edit_interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Post or edit the progress message with the current state"""
+        rendered = self.render()
+
+        if rendered == self.last_rendered:
+            return
+
+        try:
+            with timed_phase("send", "progress"):
+                if self.message is None:
+                    self.message = await self.channel.send(rendered)
+                else:
+                    await self.message.edit(content=rendered)
+        except discord.HTTPException as e:
+            logger.warning("Failed to update progress message: %s", e)
+
+        self.last_rendered = rendered
+        self.last_edit = time.monotonic()
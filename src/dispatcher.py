@@ -0,0 +1,106 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from .errors import DispatcherSaturatedError
+from .logger import logger
+
+Job = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class ThreadDispatcher:
+    """Runs jobs in order per thread_id while different threads share a bounded worker pool"""
+
+    max_concurrency: int
+    max_in_flight: int
+    queues: dict[str, asyncio.Queue[Job]] = field(default_factory=dict)
+    consumers: dict[str, asyncio.Task] = field(default_factory=dict)
+    busy_threads: set[str] = field(default_factory=set)
+    in_flight: int = 0
+    waiting_for_slot: int = 0
+
+    def __post_init__(self) -> None:
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+
+    def queue_position(self, thread_id: str) -> int:
+        """Number of jobs that would run before a new job for this thread (0 means it starts right away)"""
+        queue = self.queues.get(thread_id)
+        ahead_in_thread = (queue.qsize() if queue else 0) + (1 if thread_id in self.busy_threads else 0)
+
+        if ahead_in_thread:
+            return ahead_in_thread
+
+        if self.slots.locked():
+            return self.waiting_for_slot + 1
+
+        return 0
+
+    def submit(self, thread_id: str, job: Job) -> int:
+        """Enqueue a job for a thread and return its queue position"""
+        if self.in_flight >= self.max_in_flight:
+            raise DispatcherSaturatedError(
+                "Dispatcher is saturated", details=f"{self.in_flight}/{self.max_in_flight} jobs in flight"
+            )
+
+        position = self.queue_position(thread_id)
+
+        queue = self.queues.setdefault(thread_id, asyncio.Queue())
+        queue.put_nowait(job)
+        self.in_flight += 1
+
+        if thread_id not in self.consumers:
+            self.consumers[thread_id] = asyncio.create_task(self.consume(thread_id, queue))
+
+        logger.debug("Job queued for %s at position %d (%d in flight)", thread_id, position, self.in_flight)
+
+        return position
+
+    async def consume(self, thread_id: str, queue: asyncio.Queue[Job]) -> None:
+        """Drain a thread queue one job at a time, holding a pool slot while each job runs"""
+        try:
+            while not queue.empty():
+                job = queue.get_nowait()
+                self.busy_threads.add(thread_id)
+
+                try:
+                    self.waiting_for_slot += 1
+
+                    try:
+                        await self.slots.acquire()
+                    finally:
+                        self.waiting_for_slot -= 1
+
+                    try:
+                        await job()
+                    finally:
+                        self.slots.release()
+                except asyncio.CancelledError:
+                    # A job cancelling itself must not take down the rest of the thread's queue
+                    task = asyncio.current_task()
+                    if task is None or task.cancelling():
+                        raise
+                    logger.error("Job for %s was cancelled", thread_id)
+                except Exception as e:
+                    logger.error("Job for %s failed: %s", thread_id, e)
+                finally:
+                    self.busy_threads.discard(thread_id)
+                    self.in_flight -= 1
+        finally:
+            self.in_flight -= queue.qsize()
+            self.consumers.pop(thread_id, None)
+            self.queues.pop(thread_id, None)
+
+    async def drain(self) -> None:
+        """Wait until every submitted job, including jobs submitted meanwhile, has finished"""
+        while self.consumers:
+            await asyncio.gather(*self.consumers.values())
+
+    def stats(self) -> dict[str, int]:
+        """Current dispatcher load"""
+        return {
+            "in_flight": self.in_flight,
+            "active_threads": len(self.busy_threads),
+            "queued_threads": len(self.queues),
+            "waiting_for_slot": self.waiting_for_slot,
+        }
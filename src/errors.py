@@ -27,6 +27,18 @@ class InvalidResponseError(AgentError):
     pass
 
 
+class DispatcherSaturatedError(KubeSherlockError):
+    """Too many questions are queued or running to accept another one"""
+
+    pass
+
+
+class MCPUnavailableError(KubeSherlockError):
+    """No healthy MCP session is available for a server"""
+
+    pass
+
+
 class AgentErrorMessages(Enum):
     """Standardized error messages for the agent"""
 
@@ -34,3 +46,6 @@ class AgentErrorMessages(Enum):
     EMPTY_RESPONSE = "Não foi possível gerar uma resposta adequada. Por favor, tente reformular sua pergunta."
     PROCESSING_REQUEST = "Peço desculpas, mas ocorreu um erro ao processar sua solicitação. Por favor, tente novamente."
     REFLECTION_ERROR = "Erro durante o processo de reflexão, retornando resposta original."
+    DEADLINE_EXCEEDED = (
+        "⏱️ O tempo limite foi atingido antes que fosse possível coletar dados. Tente uma pergunta mais específica."
+    )
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.tools import BaseTool
+
+from .constants import constants
+from .logger import logger
+from .resources import content_text
+
+
+@dataclass(frozen=True)
+class FanoutResult:
+    """Outcome of one prefetched tool call"""
+
+    label: str
+    output: str
+    ok: bool
+
+
+@dataclass
+class ToolFanout:
+    """Runs independent tool calls concurrently, capped per MCP server"""
+
+    tools: list[BaseTool]
+    max_concurrency_per_server: int
+    semaphores: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+
+    def server_of(self, tool: BaseTool) -> str:
+        return (tool.metadata or {}).get("mcp_server", constants.DEFAULT_MCP_SERVER)
+
+    def semaphore_for(self, server: str) -> asyncio.Semaphore:
+        if server not in self.semaphores:
+            self.semaphores[server] = asyncio.Semaphore(self.max_concurrency_per_server)
+        return self.semaphores[server]
+
+    async def invoke(self, tool_name: str, arguments: dict[str, Any]) -> Any:
+        """Run one tool under its server's concurrency cap, returning the raw tool content"""
+        if (tool := self.tools_by_name.get(tool_name)) is None:
+            raise KeyError(f"Ferramenta desconhecida: {tool_name}")
+
+        async with self.semaphore_for(self.server_of(tool)):
+            return await tool.ainvoke(arguments)
+
+    async def call(self, tool_name: str, arguments_json: str) -> FanoutResult:
+        """Run one planned call, turning every failure into a readable result"""
+        label = f"{tool_name}({arguments_json})"
+
+        if tool_name not in self.tools_by_name:
+            return FanoutResult(label, f"Ferramenta desconhecida: {tool_name}", ok=False)
+
+        try:
+            arguments = json.loads(arguments_json or "{}")
+        except ValueError as e:
+            return FanoutResult(label, f"Argumentos JSON inválidos: {e}", ok=False)
+
+        if not isinstance(arguments, dict):
+            return FanoutResult(label, "Argumentos devem ser um objeto JSON", ok=False)
+
+        try:
+            output = await self.invoke(tool_name, arguments)
+        except Exception as e:
+            logger.warning("Parallel call %s failed: %s", label, e)
+            return FanoutResult(label, f"Erro: {e}", ok=False)
+
+        return FanoutResult(label, content_text(output), ok=True)
+
+    async def run(self, calls: list[tuple[str, str]]) -> list[FanoutResult]:
+        """Dispatch all calls at once; total time is bounded by the slowest call"""
+        results = await asyncio.gather(*(self.call(tool_name, arguments) for tool_name, arguments in calls))
+
+        logger.info("Parallel fan-out: %d/%d calls succeeded", sum(result.ok for result in results), len(results))
+
+        return list(results)
+
+
+def format_results(results: list[FanoutResult]) -> str:
+    """Render prefetched results for the worker prompt"""
+    return "\n\n".join(f"### {result.label}\n{result.output}" for result in results)
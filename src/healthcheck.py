@@ -1,8 +1,33 @@
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
 from aiohttp import web
 
 from .constants import constants
+from .metrics import registry
+from .profiling import profile_event_loop, render_collapsed
+from .settings import settings
 
 routes = web.RouteTableDef()
+debug_routes = web.RouteTableDef()
+profile_lock = asyncio.Lock()
+
+StatsProvider = Callable[[], dict[str, Any]]
+ReadinessCheck = Callable[[], bool]
+
+stats_providers: dict[str, StatsProvider] = {}
+readiness_checks: dict[str, ReadinessCheck] = {}
+
+
+def register_stats(name: str, provider: StatsProvider) -> None:
+    """Expose a component's counters under /stats"""
+    stats_providers[name] = provider
+
+
+def register_readiness(name: str, check: ReadinessCheck) -> None:
+    """Gate /ready on a component reporting itself usable"""
+    readiness_checks[name] = check
 
 
 @routes.get("/health")
@@ -11,6 +36,55 @@ async def health(_: web.Request) -> web.Response:
     return web.json_response({"status": "healthy"})
 
 
+@routes.get("/ready")
+async def ready(_: web.Request) -> web.Response:
+    """Readiness endpoint: fails until every registered component is initialized and healthy."""
+    checks = {name: check() for name, check in readiness_checks.items()}
+    is_ready = bool(checks) and all(checks.values())
+
+    return web.json_response(
+        {"status": "ready" if is_ready else "not ready", "checks": checks},
+        status=200 if is_ready else 503,
+    )
+
+
+@routes.get("/metrics")
+async def metrics(_: web.Request) -> web.Response:
+    """Prometheus text exposition of the registered metrics."""
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+
+@routes.get("/stats")
+async def stats(_: web.Request) -> web.Response:
+    """Runtime counters from registered components."""
+    return web.json_response({name: provider() for name, provider in stats_providers.items()})
+
+
+@debug_routes.get("/debug/profile")
+async def profile(request: web.Request) -> web.Response:
+    """Sample the event loop for `?seconds=N` and return collapsed stacks for flamegraph tools."""
+    try:
+        seconds = float(request.query.get("seconds", constants.PROFILE_DEFAULT_SECONDS))
+    except ValueError:
+        seconds = 0
+
+    if not 0 < seconds <= constants.PROFILE_MAX_SECONDS:
+        raise web.HTTPBadRequest(text=f"seconds must be between 0 and {constants.PROFILE_MAX_SECONDS:g}")
+
+    if profile_lock.locked():
+        raise web.HTTPConflict(text="A profile is already running")
+
+    async with profile_lock:
+        stacks = await profile_event_loop(seconds)
+
+    return web.Response(
+        text=render_collapsed(stacks),
+        content_type="text/plain",
+        charset="utf-8",
+        headers={"Content-Disposition": 'attachment; filename="sherlock.folded"'},
+    )
+
+
 async def run_http_server(
     host: str = constants.DEFAULT_HEALTH_HOST,
     port: int = constants.DEFAULT_HEALTH_PORT,
@@ -20,6 +94,9 @@ async def run_http_server(
 
     app.add_routes(routes)
 
+    if settings.PROFILING_ENABLED:
+        app.add_routes(debug_routes)
+
     runner = web.AppRunner(app)
 
     await runner.setup()
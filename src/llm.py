@@ -1,32 +1,114 @@
+import time
+from functools import cache
+from typing import Any, override
+from uuid import UUID
+
 from langchain.chat_models import init_chat_model
-from langchain_core.language_models import LanguageModelInput
-from langchain_core.messages import BaseMessage
-from langchain_core.runnables import RunnableWithFallbacks
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
 
 from .logger import logger
+from .metrics import llm_calls, llm_tokens
+from .router import ModelHealth, ModelRouter
 from .settings import settings
 
 
-def create_model() -> RunnableWithFallbacks[LanguageModelInput, BaseMessage]:
-    try:
-        primary_model = init_chat_model(
-            settings.MODEL_NAME,
-            model_provider="google_genai",
-            temperature=0.1,
+class LLMMetricsHandler(AsyncCallbackHandler):
+    """Record token usage and call outcomes per model; routed calls are attributed to the model that answered"""
+
+    def __init__(self) -> None:
+        self.models: dict[UUID, str] = {}
+
+    @override
+    async def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.models[run_id] = str((metadata or {}).get("ls_model_name", "unknown")).removeprefix("models/")
+
+    @override
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        model = self.models.pop(run_id, "unknown")
+
+        for generations in response.generations:
+            for generation in generations:
+                match generation:
+                    case ChatGeneration(message=AIMessage(usage_metadata=dict(usage)) as message):
+                        model = str(message.response_metadata.get("model_name", model)).removeprefix("models/")
+                        llm_tokens.inc(usage.get("input_tokens", 0), model=model, direction="input")
+                        llm_tokens.inc(usage.get("output_tokens", 0), model=model, direction="output")
+                    case _:
+                        pass
+
+        llm_calls.inc(model=model, outcome="success")
+
+    @override
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_calls.inc(model=self.models.pop(run_id, "unknown"), outcome="error")
+
+
+llm_metrics = LLMMetricsHandler()
+
+
+@cache
+def get_chat_model(model_name: str) -> BaseChatModel:
+    return init_chat_model(model_name, model_provider="google_genai", temperature=0.1)
+
+
+model_health: dict[str, ModelHealth] = {}
+
+
+def get_model_health(model_name: str) -> ModelHealth:
+    """Process-wide health of one model, shared by every route that calls it"""
+    if model_name not in model_health:
+        model_health[model_name] = ModelHealth(
+            window=settings.MODEL_HEALTH_WINDOW,
+            error_threshold=settings.MODEL_BREAKER_ERROR_RATE,
+            cooldown=settings.MODEL_BREAKER_COOLDOWN,
         )
 
-        fallback_model = init_chat_model(
-            settings.FALLBACK_MODEL_NAME,
-            model_provider="google_genai",
-            temperature=0.1,
+    return model_health[model_name]
+
+
+def create_model(model_name: str | None = None) -> ModelRouter:
+    """Router preferring `model_name` (MODEL_NAME by default), hedged and failed over to the other models"""
+    try:
+        names = list(
+            dict.fromkeys([model_name or settings.MODEL_NAME, settings.MODEL_NAME, settings.FALLBACK_MODEL_NAME])
         )
 
-        model_with_fallback = RunnableWithFallbacks(runnable=primary_model, fallbacks=[fallback_model])
+        router = ModelRouter(
+            models=[get_chat_model(name) for name in names],
+            names=names,
+            health={name: get_model_health(name) for name in names},
+            hedging=settings.MODEL_HEDGING_ENABLED,
+            hedge_delay=settings.MODEL_HEDGE_DELAY,
+            hedge_min_delay=settings.MODEL_HEDGE_MIN_DELAY,
+        )
 
-        logger.info(f"Model configured: {settings.MODEL_NAME} with {settings.FALLBACK_MODEL_NAME} fallback")
+        logger.info("Model configured: %s (hedging %s)", " → ".join(names), "on" if router.hedging else "off")
 
-        return model_with_fallback
+        return router
 
     except Exception as e:
-        logger.error(f"Failed to create model: {e}")
+        logger.error("Failed to create model: %s", e)
         raise
+
+
+@cache
+def get_shared_model(model_name: str | None = None) -> ModelRouter:
+    """Process-wide router per preferred model: chat model clients hold no per-call state, so routes share them"""
+    return create_model(model_name)
+
+
+def model_stats() -> dict[str, Any]:
+    """Rolling latency, error rate and breaker state of every routed model"""
+    now = time.time()
+    return {name: health.stats(now) for name, health in model_health.items()}
@@ -1,11 +1,151 @@
+import atexit
+import copy
+import json
 import logging
-import os
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, override
 
-from .constants import constants
+from .constants import LogFormat, constants
+from .settings import settings
 
-logger = logging.getLogger(constants.LOGGER_NAME)
-logger.setLevel(getattr(logging, os.getenv("LOG_LEVEL", constants.DEFAULT_LOG_LEVEL)))
+SECRET_PATTERNS = (
+    re.compile(
+        r"(?i)(?P<keep>(?:authorization|api[_-]?key|token|password|passwd|secret)\"?\s*[:=]\s*\"?)"
+        r"(?:(?:bearer|basic)\s+)?[^\s\"',}]+"
+    ),
+    re.compile(r"(?i)(?P<keep>\bbearer\s+)[a-z0-9._~+/-]+=*"),
+    re.compile(r"(?P<keep>)\bAIza[0-9A-Za-z_-]{35}\b"),
+)
 
-handler = logging.StreamHandler()
-handler.setFormatter(logging.Formatter(fmt=constants.DEFAULT_LOG_FORMAT, datefmt=constants.DEFAULT_DATE_FORMAT))
-logger.addHandler(handler)
+log_fields_var: ContextVar[dict[str, Any]] = ContextVar("log_fields")
+
+
+@contextmanager
+def log_fields(**fields: Any) -> Iterator[None]:
+    """Attach correlation fields such as thread_id, node and iteration to every record logged inside"""
+    token = log_fields_var.set({**log_fields_var.get({}), **fields})
+
+    try:
+        yield
+    finally:
+        log_fields_var.reset(token)
+
+
+def clip(value: Any, limit: int) -> Any:
+    """Arguments longer than `limit` characters are cut, so large prompts and outputs never reach a log line"""
+    if isinstance(value, bool | int | float | None):
+        return value
+
+    text = value if isinstance(value, str) else str(value)
+    return text if len(text) <= limit else f"{text[:limit]}… (+{len(text) - limit} chars)"
+
+
+def redact(text: str) -> str:
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(rf"\g<keep>{constants.LOG_REDACTED}", text)
+
+    return text
+
+
+class PolicyQueueHandler(QueueHandler):
+    """Queue handler that applies the truncation and redaction policy in the caller and defers the rest.
+
+    Only argument clipping and %-interpolation happen on the logging thread, usually the event loop;
+    rendering and the stream write run on the listener thread.
+    """
+
+    def __init__(self, queue: SimpleQueue[logging.LogRecord], truncate_length: int) -> None:
+        super().__init__(queue)
+        self.truncate_length = truncate_length
+
+    @override
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+
+        match record.args:
+            case dict(args):
+                record.args = {key: clip(value, self.truncate_length) for key, value in args.items()}
+            case tuple(args):
+                record.args = tuple(clip(value, self.truncate_length) for value in args)
+
+        record.msg = redact(record.getMessage())
+        record.args = None
+
+        # Flat scalar attributes, so handlers such as OpenTelemetry's export them as they are
+        fields = log_fields_var.get({})
+        record.__dict__.update(fields)
+        record.fields = tuple(fields)
+
+        if record.exc_info:
+            record.exc_text = redact(logging.Formatter().formatException(record.exc_info))
+            record.exc_info = None
+
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the correlation fields at the top level"""
+
+    @override
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **{name: getattr(record, name) for name in getattr(record, "fields", ())},
+        }
+
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format with correlation fields appended"""
+
+    @override
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+
+        if fields := getattr(record, "fields", ()):
+            text = f"{text} [{' '.join(f'{name}={getattr(record, name)}' for name in fields)}]"
+
+        return text
+
+
+def configure_logging() -> logging.Logger:
+    """Send the bot's records through a queue to the stream and root handlers on a listener thread.
+
+    Root handlers, such as the one OpenTelemetry instrumentation installs, are served from the listener
+    instead of by propagation, so they also get the truncated and redacted records.
+    """
+    queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    stream = logging.StreamHandler()
+
+    match settings.LOG_FORMAT:
+        case LogFormat.JSON:
+            stream.setFormatter(JsonFormatter())
+        case LogFormat.TEXT:
+            stream.setFormatter(TextFormatter(fmt=constants.LOG_TEXT_FORMAT, datefmt=constants.DEFAULT_DATE_FORMAT))
+
+    listener = QueueListener(queue, stream, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    configured = logging.getLogger(constants.LOGGER_NAME)
+    configured.setLevel(settings.LOG_LEVEL)
+    configured.addHandler(PolicyQueueHandler(queue, settings.LOG_TRUNCATE_LENGTH))
+    configured.propagate = False
+
+    return configured
+
+
+logger = configure_logging()
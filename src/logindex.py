@@ -0,0 +1,444 @@
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
+
+from langchain_core.runnables import ensure_config
+from langchain_core.tools import BaseTool, StructuredTool
+from pydantic import BaseModel, Field
+
+from .constants import constants
+from .digest import ERROR_PATTERN, LOG_TOOLS, line_signature
+from .logger import logger
+from .resources import content_text
+from .settings import settings
+from .tools import ToolOutput, call_tool, derive_tool
+
+SEVERITIES = ("debug", "info", "warning", "error", "fatal")
+SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITIES)}
+LEVEL_ALIASES = {
+    "trace": "debug",
+    "debug": "debug",
+    "dbg": "debug",
+    "info": "info",
+    "notice": "info",
+    "warn": "warning",
+    "warning": "warning",
+    "err": "error",
+    "error": "error",
+    "severe": "error",
+    "crit": "fatal",
+    "critical": "fatal",
+    "fatal": "fatal",
+    "panic": "fatal",
+}
+KLOG_LEVELS = {"I": "info", "W": "warning", "E": "error", "F": "fatal"}
+
+ISO_TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:[.,](\d+))?(Z|[+-]\d{2}:?\d{2})?")
+KLOG_PREFIX = re.compile(r"^([IWEF])(\d{2})(\d{2}) (\d{2}:\d{2}:\d{2})(?:\.(\d+))?")
+LEVEL_FIELD = re.compile(r"\b(?:level|lvl|severity)[\"']?\s*[=:]\s*[\"']?([a-z]+)", re.IGNORECASE)
+LEVEL_WORD = re.compile(r"\b(TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|ERR|FATAL|PANIC|CRITICAL)\b")
+REGEX_CHARS = re.compile(r"[\\^$.*+?()\[\]{}|]")
+TERM_PATTERN = re.compile(r"\w+")
+DURATION_PATTERN = re.compile(r"^(\d+)\s*([smhd])$")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+TIMESTAMP_SCAN = 64
+
+
+def parse_timestamp(line: str, year: int) -> float | None:
+    """Epoch seconds of an ISO or klog timestamp near the start of the line"""
+    if match := KLOG_PREFIX.match(line):
+        _, month, day, clock, fraction = match.groups()
+        text = f"{year}-{month}-{day}T{clock}.{(fraction or '0')[:6]}+00:00"
+    elif match := ISO_TIMESTAMP.search(line, 0, TIMESTAMP_SCAN):
+        date, clock, fraction, zone = match.groups()
+        offset = "+00:00" if zone in (None, "Z") else zone
+        text = f"{date}T{clock}.{(fraction or '0')[:6]}{offset}"
+    else:
+        return None
+
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_severity(line: str) -> str:
+    """Level from a level= field, a bare level word or a klog prefix; error keywords otherwise; info by default"""
+    if (match := LEVEL_FIELD.search(line)) and (level := LEVEL_ALIASES.get(match.group(1).lower())):
+        return level
+    if match := LEVEL_WORD.search(line):
+        return LEVEL_ALIASES[match.group(1).lower()]
+    if match := KLOG_PREFIX.match(line):
+        return KLOG_LEVELS[match.group(1)]
+    if ERROR_PATTERN.search(line):
+        return "error"
+    return "info"
+
+
+def parse_duration(value: str) -> int:
+    """Seconds in a duration such as 30s, 15m, 2h or 1d"""
+    if not (match := DURATION_PATTERN.match(value.strip().lower())):
+        raise ValueError(f"duração inválida: {value!r} (use 30s, 15m, 2h ou 1d)")
+
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def parse_since(value: str, now: float) -> float:
+    """Cut-off in epoch seconds from a relative duration or an ISO timestamp"""
+    if DURATION_PATTERN.match(value.strip().lower()):
+        return now - parse_duration(value)
+
+    if (timestamp := parse_timestamp(value, datetime.fromtimestamp(now, UTC).year)) is None:
+        raise ValueError(f"since inválido: {value!r} (use 15m, 2h ou um timestamp ISO)")
+
+    return timestamp
+
+
+def format_time(timestamp: float | None) -> str:
+    if timestamp is None:
+        return "sem horário"
+
+    return datetime.fromtimestamp(timestamp, UTC).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def terms(text: str) -> set[str]:
+    return {term.lower() for term in TERM_PATTERN.findall(text)}
+
+
+@dataclass(frozen=True)
+class LogLine:
+    source: str
+    timestamp: float | None
+    severity: str
+    text: str
+
+
+@dataclass
+class IndexedLog:
+    """Lines of one container log with an inverted index from lowercase words to line positions.
+
+    The words are also kept sorted, so a pattern word finds every indexed word it starts with by bisection
+    instead of a scan of the whole vocabulary.
+    """
+
+    source: str
+    lines: list[LogLine]
+    ingested_at: float
+    scope: str = ""
+    postings: dict[str, list[int]] = field(default_factory=dict)
+    vocabulary: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        postings: defaultdict[str, list[int]] = defaultdict(list)
+
+        for position, line in enumerate(self.lines):
+            for term in terms(line.text):
+                postings[term].append(position)
+
+        self.postings = dict(postings)
+        self.vocabulary = sorted(postings)
+
+    def positions(self, prefix: str) -> set[int]:
+        """Positions of the lines holding a word that starts with `prefix`"""
+        found: set[int] = set()
+        index = bisect_left(self.vocabulary, prefix)
+
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(prefix):
+            found.update(self.postings[self.vocabulary[index]])
+            index += 1
+
+        return found
+
+    def candidates(self, pattern: str) -> list[int]:
+        """Positions with a word starting with each word of a literal pattern; every position for regex patterns"""
+        if REGEX_CHARS.search(pattern) or not (wanted := terms(pattern)):
+            return list(range(len(self.lines)))
+
+        matches: set[int] | None = None
+
+        for term in sorted(wanted, key=len, reverse=True):
+            positions = self.positions(term)
+            matches = positions if matches is None else matches & positions
+
+            if not matches:
+                return []
+
+        return sorted(matches or ())
+
+
+def parse_log(source: str, raw: str, year: int) -> list[LogLine]:
+    """Split a log into lines with timestamps and severities; continuation lines inherit both from their entry"""
+    lines: list[LogLine] = []
+    timestamp: float | None = None
+    severity = "info"
+
+    for text in raw.splitlines():
+        if not text.strip():
+            continue
+
+        if (parsed := parse_timestamp(text, year)) is not None:
+            timestamp, severity = parsed, parse_severity(text)
+        elif not text[:1].isspace():
+            severity = parse_severity(text)
+
+        lines.append(LogLine(source, timestamp, severity, text))
+
+    return lines
+
+
+def index_log(source: str, raw: str, now: float, scope: str = "") -> IndexedLog:
+    """Parse and index one log; touches no shared state, so it can run off the event loop"""
+    return IndexedLog(source, parse_log(source, raw, datetime.fromtimestamp(now, UTC).year), now, scope)
+
+
+def current_scope() -> str:
+    """Thread of the question whose graph is running, so one channel never searches another channel's logs"""
+    return str(ensure_config().get("configurable", {}).get("thread_id", ""))
+
+
+class LogQuery(BaseModel):
+    """Filters for the search-logs tool"""
+
+    pattern: str = Field(
+        description=(
+            "Words or phrase to find (case-insensitive; each word matches words that start with it); "
+            "regular expressions are accepted and also match inside words"
+        )
+    )
+    pod: str | None = Field(default=None, description="Only logs whose pod name contains this text")
+    since: str | None = Field(default=None, description='Only lines newer than this, e.g. "15m", "2h" or ISO time')
+    severity: str | None = Field(default=None, description='Minimum severity: "warning", "error" or "fatal"')
+    limit: int = Field(default=constants.LOG_SEARCH_DEFAULT_LIMIT, description="Maximum distinct messages")
+
+
+def render_search(query: LogQuery, logs: list[IndexedLog], now: float) -> str:
+    """Distinct matching messages, most recent first, with repeat counts; reads only `logs`, so it can run off
+    the event loop"""
+    try:
+        matcher = re.compile(query.pattern, re.IGNORECASE)
+    except re.error:
+        matcher = re.compile(re.escape(query.pattern), re.IGNORECASE)
+
+    cutoff = parse_since(query.since, now) if query.since else None
+    min_rank = SEVERITY_RANK.get(LEVEL_ALIASES.get((query.severity or "").lower(), ""), 0)
+    limit = max(1, min(query.limit, constants.LOG_SEARCH_MAX_LIMIT))
+    groups: dict[str, list[LogLine]] = {}
+    total = 0
+
+    for log in logs:
+        for position in log.candidates(query.pattern):
+            line = log.lines[position]
+
+            if SEVERITY_RANK[line.severity] < min_rank:
+                continue
+            if cutoff is not None and (line.timestamp is None or line.timestamp < cutoff):
+                continue
+            if not matcher.search(line.text):
+                continue
+
+            total += 1
+            groups.setdefault(line_signature(line.text), []).append(line)
+
+    if not logs:
+        return "Nenhum log indexado ainda: chame get-k8s-pod-logs primeiro."
+
+    ranked = sorted(groups.values(), key=lambda lines: lines[-1].timestamp or 0, reverse=True)
+    rendered = [
+        f"[search-logs: {total} linhas em {len(logs)} logs, {len(groups)} mensagens distintas; "
+        f"mostrando {min(limit, len(groups))}]"
+    ]
+    rendered.extend(
+        f"x{len(lines)} [{lines[-1].severity}] {format_time(lines[-1].timestamp)} {lines[-1].source}: "
+        f"{lines[-1].text[: constants.LOG_LINE_CLIP]}"
+        for lines in ranked[:limit]
+    )
+
+    return "\n".join(rendered)
+
+
+def render_histogram(bucket: str, severity: str | None, logs: list[IndexedLog]) -> str:
+    """Line counts of `logs` per time bucket, split by severity; reads only `logs`, so it can run off the event loop"""
+    width = parse_duration(bucket)
+    min_rank = SEVERITY_RANK.get(LEVEL_ALIASES.get((severity or "").lower(), ""), 0)
+    counts: defaultdict[int, Counter[str]] = defaultdict(Counter)
+
+    for log in logs:
+        for line in log.lines:
+            if line.timestamp is not None and SEVERITY_RANK[line.severity] >= min_rank:
+                counts[int(line.timestamp // width * width)][line.severity] += 1
+
+    if not counts:
+        return "Nenhuma linha com horário nos logs indexados."
+
+    starts = sorted(counts)[-constants.LOG_HISTOGRAM_MAX_BUCKETS :]
+    rendered = [
+        f"[log-histogram: baldes de {bucket}, {len(starts)} mais recentes]",
+        "INÍCIO | TOTAL | POR SEVERIDADE",
+    ]
+    rendered.extend(
+        f"{format_time(start)} | {counts[start].total()} | "
+        + ", ".join(f"{level}={counts[start][level]}" for level in reversed(SEVERITIES) if counts[start][level])
+        for start in starts
+    )
+
+    return "\n".join(rendered)
+
+
+@dataclass
+class LogIndex:
+    """Short-lived, shared index of the pod logs fetched by the worker.
+
+    Log tool outputs are parsed once into lines with timestamps and severities, indexed by term, and
+    replaced in the worker context by an overview. The worker then queries them with search-logs and
+    log-histogram instead of re-reading megabytes of raw log text on every iteration. Each log belongs to
+    the thread of the question that fetched it, and queries only see their own thread's logs.
+    """
+
+    ttl: float
+    max_lines: int
+    inline_chars: int
+    logs: OrderedDict[tuple[str, str], IndexedLog] = field(default_factory=OrderedDict)
+    counters: Counter[str] = field(default_factory=Counter)
+
+    def expire(self, now: float) -> None:
+        while self.logs and now - next(iter(self.logs.values())).ingested_at > self.ttl:
+            self.logs.popitem(last=False)
+
+        while len(self.logs) > 1 and sum(len(log.lines) for log in self.logs.values()) > self.max_lines:
+            self.logs.popitem(last=False)
+            self.counters["evicted"] += 1
+
+    def ingest(self, source: str, raw: str, now: float, scope: str = "") -> IndexedLog:
+        """Index one log, replacing an earlier copy of the same source in the same scope"""
+        return self.store(index_log(source, raw, now, scope))
+
+    def store(self, log: IndexedLog) -> IndexedLog:
+        self.logs.pop((log.scope, log.source), None)
+        self.logs[(log.scope, log.source)] = log
+        self.expire(log.ingested_at)
+        self.counters["ingested_lines"] += len(log.lines)
+
+        return log
+
+    def selected(self, pod: str | None, now: float, scope: str) -> list[IndexedLog]:
+        self.expire(now)
+        return [log for log in self.logs.values() if log.scope == scope and (pod is None or pod in log.source)]
+
+    async def search(self, query: LogQuery, now: float, scope: str = "") -> str:
+        """Select the scope's logs on the event loop, then scan them in a thread"""
+        logs = self.selected(query.pod, now, scope)
+        self.counters["searches"] += 1
+
+        return await asyncio.to_thread(render_search, query, logs, now)
+
+    async def histogram(self, bucket: str, pod: str | None, severity: str | None, now: float, scope: str = "") -> str:
+        """Select the scope's logs on the event loop, then bucket their lines in a thread"""
+        return await asyncio.to_thread(render_histogram, bucket, severity, self.selected(pod, now, scope))
+
+    def overview(self, log: IndexedLog) -> str:
+        """What replaces a large log in the worker context: size, time range, severities, top errors and tail"""
+        severities = Counter(line.severity for line in log.lines)
+        errors = Counter(
+            line_signature(line.text) for line in log.lines if SEVERITY_RANK[line.severity] >= SEVERITY_RANK["error"]
+        )
+        examples = {line_signature(line.text): line.text for line in log.lines}
+        stamped = [line.timestamp for line in log.lines if line.timestamp is not None]
+        span = f"{format_time(min(stamped))} → {format_time(max(stamped))}" if stamped else "sem horários"
+
+        sections = [
+            f"[log indexado: {log.source}, {len(log.lines)} linhas, {span}; "
+            + ", ".join(f"{level}={count}" for level, count in severities.most_common())
+            + "]"
+        ]
+
+        if errors:
+            sections.append(
+                "## Erros mais frequentes\n"
+                + "\n".join(
+                    f"x{count} {examples[signature][: constants.LOG_LINE_CLIP]}"
+                    for signature, count in errors.most_common(constants.LOG_OVERVIEW_ERRORS)
+                )
+            )
+
+        sections.append(
+            "## Últimas linhas\n"
+            + "\n".join(line.text[: constants.LOG_LINE_CLIP] for line in log.lines[-constants.LOG_OVERVIEW_TAIL :])
+        )
+        sections.append(
+            "Use `search-logs` (pattern, pod, since, severity) e `log-histogram` (bucket) para consultar este log."
+        )
+
+        return "\n\n".join(sections)
+
+    async def call(self, tool: BaseTool, arguments: dict[str, Any]) -> ToolOutput:
+        content, artifact = await call_tool(tool, arguments)
+        raw = content_text(content)
+
+        source = "/".join(
+            str(arguments[key]) for key in ("context", "namespace", "pod", "container") if arguments.get(key)
+        )
+        # Parsing and summarizing megabytes of log text would stall the event loop, so both run in a thread;
+        # only storing the finished index touches the shared state
+        log = self.store(await asyncio.to_thread(index_log, source or tool.name, raw, time.time(), current_scope()))
+
+        if len(raw) <= self.inline_chars:
+            return content, artifact
+
+        self.counters["saved_chars"] += len(raw)
+        logger.debug("Indexed %d log lines of %s", len(log.lines), log.source)
+
+        return await asyncio.to_thread(self.overview, log), artifact
+
+    def wrap_tools(self, tools: list[BaseTool]) -> list[BaseTool]:
+        """Route log tools through the index; other tools pass through untouched"""
+        return [derive_tool(tool, partial(self.call, tool)) if tool.name in LOG_TOOLS else tool for tool in tools]
+
+    def tools(self) -> list[BaseTool]:
+        async def search_logs(**query: Any) -> str:
+            try:
+                return await self.search(LogQuery(**query), time.time(), current_scope())
+            except ValueError as e:
+                return f"Erro na busca: {e}"
+
+        async def log_histogram(bucket: str = "5m", pod: str | None = None, severity: str | None = None) -> str:
+            """Count indexed log lines per time bucket (e.g. "1m", "5m", "1h") split by severity, to see when
+            errors started or spiked. Filter by pod name substring and minimum severity."""
+            try:
+                return await self.histogram(bucket, pod, severity, time.time(), current_scope())
+            except ValueError as e:
+                return f"Erro no histograma: {e}"
+
+        return [
+            StructuredTool.from_function(
+                coroutine=search_logs,
+                name="search-logs",
+                description=(
+                    "Search the pod logs already fetched with get-k8s-pod-logs by words, phrase or regex, filtered "
+                    "by pod, time and minimum severity. Returns distinct messages with counts, most recent first."
+                ),
+                args_schema=LogQuery,
+            ),
+            StructuredTool.from_function(coroutine=log_histogram, name="log-histogram"),
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.counters,
+            "logs": len(self.logs),
+            "lines": sum(len(log.lines) for log in self.logs.values()),
+        }
+
+
+def create_log_index() -> LogIndex:
+    """Build the shared log index from settings"""
+    return LogIndex(
+        ttl=settings.LOG_INDEX_TTL,
+        max_lines=settings.LOG_INDEX_MAX_LINES,
+        inline_chars=settings.LOG_INDEX_INLINE_CHARS,
+    )
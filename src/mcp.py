@@ -1,4 +1,21 @@
+import asyncio
+import contextlib
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from langchain_core.tools import BaseTool, ToolException
 from langchain_mcp_adapters.client import Connection, MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+from mcp import ClientSession
+
+from .constants import constants
+from .errors import MCPUnavailableError
+from .logger import logger
+from .metrics import tool_duration, tool_errors
+from .settings import settings
+from .tools import ToolOutput, call_tool, derive_tool
 
 
 def get_mcp_client() -> MultiServerMCPClient:
@@ -12,3 +29,235 @@ def get_mcp_client() -> MultiServerMCPClient:
     }
 
     return MultiServerMCPClient(servers)
+
+
+@dataclass
+class PoolMember:
+    """One long-lived MCP session (one server subprocess for stdio transports)"""
+
+    server_name: str
+    index: int
+    session: ClientSession | None = None
+    tools: dict[str, BaseTool] = field(default_factory=dict)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    restart_requested: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task | None = None
+    in_flight: int = 0
+    calls: int = 0
+    failures: int = 0
+    restarts: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.session is not None and not self.restart_requested.is_set()
+
+    def request_restart(self, reason: str) -> None:
+        if not self.restart_requested.is_set():
+            logger.warning("Restarting MCP session %s#%d: %s", self.server_name, self.index, reason)
+            self.restart_requested.set()
+
+
+@dataclass
+class MCPPool:
+    """Pool of persistent MCP sessions per server with load balancing, health checks and restarts"""
+
+    client: MultiServerMCPClient
+    size: int
+    call_timeout: float
+    ping_interval: float
+    members: dict[str, list[PoolMember]] = field(default_factory=dict)
+    health_task: asyncio.Task | None = None
+
+    async def run_member(self, member: PoolMember) -> None:
+        """Own a session for the member's lifetime, reopening it whenever a restart is requested"""
+        while True:
+            try:
+                async with self.client.session(member.server_name) as session:
+                    tools = await load_mcp_tools(session)
+                    member.tools = {tool.name: tool for tool in tools}
+                    member.session = session
+                    member.ready.set()
+
+                    await member.restart_requested.wait()
+            except Exception as e:
+                logger.error("MCP session %s#%d failed: %s", member.server_name, member.index, e)
+                member.failures += 1
+            finally:
+                member.session = None
+
+            member.restart_requested.clear()
+            member.restarts += 1
+            await asyncio.sleep(constants.MCP_RESTART_BACKOFF)
+
+    async def start(self) -> None:
+        """Open `size` sessions per server and wait until each answered its tool listing"""
+        if self.members:
+            return
+
+        for server_name in self.client.connections:
+            self.members[server_name] = [PoolMember(server_name, index) for index in range(self.size)]
+
+        for member in self.all_members():
+            member.task = asyncio.create_task(self.run_member(member))
+
+        await asyncio.gather(
+            *(asyncio.wait_for(member.ready.wait(), self.call_timeout) for member in self.all_members()),
+            return_exceptions=True,
+        )
+
+        self.health_task = asyncio.create_task(self.health_loop())
+
+        logger.info("MCP pool started: %s", self.stats()["servers"])
+
+    def all_members(self) -> list[PoolMember]:
+        return [member for members in self.members.values() for member in members]
+
+    def is_ready(self) -> bool:
+        """Every configured server has at least one healthy session"""
+        return bool(self.members) and all(any(m.healthy for m in members) for members in self.members.values())
+
+    def pick(self, server_name: str, exclude: PoolMember | None = None) -> PoolMember:
+        """Least-loaded healthy member of a server"""
+        candidates = [m for m in self.members.get(server_name, []) if m.healthy and m is not exclude]
+
+        if not candidates:
+            raise MCPUnavailableError("No healthy MCP session available", details=server_name)
+
+        return min(candidates, key=lambda member: member.in_flight)
+
+    async def call_member(self, member: PoolMember, tool_name: str, arguments: dict[str, Any]) -> ToolOutput:
+        if (tool := member.tools.get(tool_name)) is None:
+            raise ToolException(f"Unknown MCP tool {tool_name} on server {member.server_name}")
+
+        member.in_flight += 1
+        member.calls += 1
+
+        try:
+            async with asyncio.timeout(self.call_timeout):
+                return await call_tool(tool, arguments)
+        except ToolException:
+            raise
+        except TimeoutError:
+            member.failures += 1
+            member.request_restart(f"{tool_name} exceeded {self.call_timeout}s")
+            raise
+        except Exception as e:
+            member.failures += 1
+            member.request_restart(f"{tool_name} failed: {e}")
+            raise
+        finally:
+            member.in_flight -= 1
+
+    async def call(self, server_name: str, tool_name: str, arguments: dict[str, Any]) -> ToolOutput:
+        """Call a tool through the pool, recording its latency and failures"""
+        with tool_duration.time(server=server_name, tool=tool_name):
+            try:
+                return await self.route(server_name, tool_name, arguments)
+            except Exception:
+                tool_errors.inc(server=server_name, tool=tool_name)
+                raise
+
+    async def route(self, server_name: str, tool_name: str, arguments: dict[str, Any]) -> ToolOutput:
+        """Call a tool on the least-loaded session, retrying once elsewhere if the session itself failed"""
+        try:
+            member = self.pick(server_name)
+        except MCPUnavailableError as e:
+            raise ToolException(str(e)) from e
+
+        try:
+            return await self.call_member(member, tool_name, arguments)
+        except ToolException:
+            raise
+        except Exception as e:
+            try:
+                fallback = self.pick(server_name, exclude=member)
+            except MCPUnavailableError:
+                raise ToolException(f"MCP server {server_name} unavailable: {e}") from e
+
+            try:
+                return await self.call_member(fallback, tool_name, arguments)
+            except TimeoutError as timeout:
+                raise ToolException(f"{tool_name} timed out after {self.call_timeout}s") from timeout
+
+    async def ping(self, member: PoolMember) -> None:
+        if member.session is None:
+            return
+
+        try:
+            async with asyncio.timeout(self.call_timeout):
+                await member.session.send_ping()
+        except Exception as e:
+            member.failures += 1
+            member.request_restart(f"ping failed: {e}")
+
+    async def health_loop(self) -> None:
+        """Ping every session periodically; failed pings trigger a restart"""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await asyncio.gather(*(self.ping(member) for member in self.all_members() if member.healthy))
+
+    def get_tools(self) -> list[BaseTool]:
+        """Pool-level tools that route each call to a healthy session, tagged with their server name.
+
+        Raises MCPUnavailableError when no session of any server could list its tools.
+        """
+        tools: list[BaseTool] = []
+
+        for server_name, members in self.members.items():
+            template = next((member.tools for member in members if member.tools), {})
+
+            if not template:
+                logger.error("No MCP session of %s started, its tools are unavailable", server_name)
+
+            for tool in template.values():
+                pooled = derive_tool(tool, partial(self.call, server_name, tool.name))
+                pooled.metadata = {**(tool.metadata or {}), "mcp_server": server_name}
+                tools.append(pooled)
+
+        if not tools:
+            raise MCPUnavailableError("No MCP session started", details=", ".join(self.members) or "no servers")
+
+        return tools
+
+    async def close(self) -> None:
+        tasks = [task for task in [self.health_task, *(m.task for m in self.all_members())] if task is not None]
+
+        for task in tasks:
+            task.cancel()
+
+        with contextlib.suppress(asyncio.CancelledError):
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Per-session health and load counters"""
+        return {
+            "servers": {
+                server_name: {
+                    "healthy": sum(member.healthy for member in members),
+                    "size": len(members),
+                }
+                for server_name, members in self.members.items()
+            },
+            "members": [
+                {
+                    "server": member.server_name,
+                    "index": member.index,
+                    "healthy": member.healthy,
+                    "in_flight": member.in_flight,
+                    "calls": member.calls,
+                    "failures": member.failures,
+                    "restarts": member.restarts,
+                }
+                for member in self.all_members()
+            ],
+        }
+
+
+def create_mcp_pool(client: MultiServerMCPClient) -> MCPPool:
+    """Build the MCP session pool from settings"""
+    return MCPPool(
+        client=client,
+        size=settings.MCP_POOL_SIZE,
+        call_timeout=settings.MAX_WAIT,
+        ping_interval=settings.MCP_PING_INTERVAL,
+    )
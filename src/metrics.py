@@ -0,0 +1,200 @@
+import heapq
+import math
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+LabelValues = tuple[str, ...]
+Samples = dict[LabelValues, float]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+BYTE_BUCKETS: tuple[float, ...] = tuple(float(2**power) for power in range(10, 27, 2))
+LAG_BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+@dataclass
+class Metric(ABC):
+    """Base for metrics rendered in the Prometheus text exposition format"""
+
+    name: str
+    help: str
+    label_names: tuple[str, ...] = ()
+    kind: str = field(default="untyped", init=False)
+
+    def label_values(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Sample lines of the exposition, without the HELP and TYPE header"""
+
+    def render(self) -> str:
+        return "\n".join([f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()])
+
+
+@dataclass
+class Counter(Metric):
+    values: Samples = field(default_factory=dict)
+    kind: str = field(default="counter", init=False)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self.label_values(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+
+
+@dataclass
+class Gauge(Counter):
+    kind: str = field(default="gauge", init=False)
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self.label_values(labels)] = value
+
+
+@dataclass
+class CallbackMetric(Metric):
+    """Metric whose samples are read from a component at scrape time"""
+
+    collect: Callable[[], Samples] = field(default=dict)
+    metric_kind: str = "gauge"
+
+    def __post_init__(self) -> None:
+        self.kind = self.metric_kind
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.collect().items():
+            yield f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+
+
+@dataclass
+class Histogram(Metric):
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    counts: dict[LabelValues, list[int]] = field(default_factory=dict)
+    sums: Samples = field(default_factory=dict)
+    kind: str = field(default="histogram", init=False)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self.label_values(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+
+        for index, bound in enumerate((*self.buckets, math.inf)):
+            if value <= bound:
+                counts[index] += 1
+
+        self.sums[key] = self.sums.get(key, 0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[str]:
+        for key, counts in self.counts.items():
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                labels = format_labels(self.label_names, key, f'le="{format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {count}"
+
+            yield f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(self.sums[key])}"
+            yield f"{self.name}_count{format_labels(self.label_names, key)} {counts[-1]}"
+
+
+M = TypeVar("M", bound=Metric)
+
+
+@dataclass
+class Registry:
+    metrics: dict[str, Metric] = field(default_factory=dict)
+
+    def register(self, metric: M) -> M:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+registry = Registry()
+
+node_duration = registry.register(Histogram("sherlock_node_duration_seconds", "Workflow node wall time", ("node",)))
+question_duration = registry.register(
+    Histogram("sherlock_question_duration_seconds", "End-to-end question wall time", ("path",))
+)
+deadline_exceeded = registry.register(
+    Counter("sherlock_deadline_exceeded_total", "Workflow nodes cut short by the question deadline", ("node",))
+)
+tool_duration = registry.register(
+    Histogram("sherlock_mcp_tool_duration_seconds", "MCP tool call latency", ("server", "tool"))
+)
+tool_errors = registry.register(Counter("sherlock_mcp_tool_errors_total", "MCP tool call failures", ("server", "tool")))
+llm_tokens = registry.register(Counter("sherlock_llm_tokens_total", "LLM token usage", ("model", "direction")))
+llm_calls = registry.register(
+    Counter("sherlock_llm_calls_total", "LLM calls by model and outcome", ("model", "outcome"))
+)
+llm_fallbacks = registry.register(
+    Counter("sherlock_llm_fallback_activations_total", "LLM calls answered by the fallback model", ("model",))
+)
+llm_hedges = registry.register(
+    Counter(
+        "sherlock_llm_hedged_requests_total", "Hedged LLM calls started because the first model was slow", ("model",)
+    )
+)
+rate_limited = registry.register(
+    Counter("sherlock_rate_limited_total", "Questions rejected by the rate limiter, by scope", ("scope",))
+)
+checkpoint_bytes = registry.register(
+    Histogram("sherlock_checkpoint_bytes", "Serialized size of each checkpoint written", buckets=BYTE_BUCKETS)
+)
+loop_lag = registry.register(
+    Histogram("sherlock_event_loop_lag_seconds", "How late event loop heartbeats wake up", buckets=LAG_BUCKETS)
+)
+loop_stalls = registry.register(
+    Counter("sherlock_event_loop_stalls_total", "Callbacks that blocked the event loop past the stall threshold")
+)
+
+
+def register_callback(
+    name: str,
+    description: str,
+    label_names: tuple[str, ...],
+    collect: Callable[[], Samples],
+    kind: str = "gauge",
+) -> None:
+    """Expose a metric whose samples come from a component's state at scrape time"""
+    registry.register(CallbackMetric(name, description, label_names, collect=collect, metric_kind=kind))
+
+
+def top_samples(values: Mapping[str, float], limit: int) -> Samples:
+    """The `limit` largest values under their own label and the rest summed under "other", bounding cardinality"""
+    top = heapq.nlargest(limit, values.items(), key=lambda item: item[1])
+    rest = sum(values.values()) - sum(value for _, value in top)
+
+    samples: Samples = {(label,): value for label, value in top}
+    samples[("other",)] = rest
+
+    return samples
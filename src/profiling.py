@@ -0,0 +1,275 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any, override
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from .constants import constants
+from .logger import logger
+from .metrics import loop_lag, loop_stalls
+from .settings import settings
+
+NESTED_PHASES = frozenset({"llm", "tool"})
+SUMMED_PHASES = frozenset({"checkpoint", "send"})
+
+
+def collapse(frame: FrameType | None) -> str:
+    """A frame's stack in collapsed form, outermost first: `module:function;module:function`"""
+    names = []
+
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> Counter[str]:
+    """Count the stacks a thread is seen in, sampling every `interval` for `seconds`; runs on another thread"""
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        if (frame := sys._current_frames().get(thread_id)) is not None:
+            stacks[collapse(frame)] += 1
+
+        time.sleep(interval)
+
+    return stacks
+
+
+def render_collapsed(stacks: Counter[str]) -> str:
+    """One `stack count` line per stack, the input format of flamegraph.pl, speedscope and inferno"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+async def profile_event_loop(seconds: float, interval: float = constants.PROFILE_SAMPLE_INTERVAL) -> Counter[str]:
+    """Sample the running loop from a worker thread, so the loop keeps serving while it is profiled"""
+    return await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds, interval)
+
+
+@dataclass
+class LoopWatchdog:
+    """Detects callbacks that block the event loop and records the code that blocked it.
+
+    A heartbeat task measures how late each tick wakes up. A helper thread notices an overdue tick while
+    the loop is still blocked and captures the loop thread's stack, so each stall is reported with its
+    culprit. Unlike asyncio's debug mode, nothing is added to the cost of every callback.
+    """
+
+    threshold: float
+    interval: float = constants.LOOP_WATCHDOG_INTERVAL
+    enabled: bool = True
+    beat: float = 0.0
+    blocked: tuple[float, str] | None = None
+    running: bool = False
+    stalls: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=constants.LOOP_STALL_HISTORY))
+
+    def watch(self, thread_id: int) -> None:
+        """Helper thread: capture the loop thread's stack once per overdue tick"""
+        while self.running:
+            time.sleep(self.interval)
+            beat = self.beat
+
+            if time.monotonic() - beat - self.interval < self.threshold or (self.blocked and self.blocked[0] == beat):
+                continue
+
+            if (frame := sys._current_frames().get(thread_id)) is not None:
+                self.blocked = (beat, collapse(frame))
+
+    def tick(self, beat: float, lag: float) -> None:
+        """Record a late tick as a stall, with the stack the helper thread saw while it was blocked"""
+        loop_lag.observe(lag)
+
+        if lag < self.threshold:
+            return
+
+        stack = self.blocked[1] if self.blocked and self.blocked[0] == beat else ""
+        loop_stalls.inc()
+        self.stalls.append({"at": round(time.time(), 3), "seconds": round(lag, 3), "stack": stack})
+        logger.warning("Event loop blocked for %.2fs in %s", lag, stack.rpartition(";")[2] or "unknown code")
+
+    async def run(self) -> None:
+        """Tick forever on the running loop, watched by a daemon thread; no-op when disabled"""
+        if not self.enabled:
+            return
+
+        self.running = True
+        self.beat = time.monotonic()
+        threading.Thread(target=self.watch, args=(threading.get_ident(),), name="loop-watchdog", daemon=True).start()
+
+        try:
+            while True:
+                beat = self.beat = time.monotonic()
+                await asyncio.sleep(self.interval)
+                self.tick(beat, time.monotonic() - beat - self.interval)
+        finally:
+            self.running = False
+
+    def stats(self) -> dict[str, Any]:
+        return {"enabled": self.enabled, "threshold": self.threshold, "recent_stalls": list(self.stalls)}
+
+
+def create_loop_watchdog() -> LoopWatchdog:
+    """Build the event loop watchdog from settings"""
+    return LoopWatchdog(threshold=settings.LOOP_STALL_SECONDS, enabled=settings.LOOP_WATCHDOG_ENABLED)
+
+
+@dataclass
+class Phase:
+    kind: str
+    name: str
+    start: float
+    end: float | None = None
+
+
+class PhaseTimer(AsyncCallbackHandler):
+    """Splits one question's wall time into workflow nodes, LLM and tool calls, checkpoint I/O and sends.
+
+    Nodes, checkpoint I/O and sends report themselves through `timed_phase`; model and tool calls arrive as
+    callbacks, so a question pays for none of it unless it asked for timings.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.ended: float | None = None
+        self.phases: list[Phase] = []
+        self.running: dict[UUID, Phase] = {}
+
+    def begin(self, kind: str, name: str) -> Phase:
+        phase = Phase(kind, name, time.perf_counter())
+        self.phases.append(phase)
+        return phase
+
+    def finish(self, run_id: UUID, name: str | None = None) -> None:
+        if (phase := self.running.pop(run_id, None)) is not None:
+            phase.end = time.perf_counter()
+            phase.name = name or phase.name
+
+    @override
+    async def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        model = str((metadata or {}).get("ls_model_name", "unknown")).removeprefix("models/")
+        self.running[run_id] = self.begin("llm", model)
+
+    @override
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        model = None
+
+        for generations in response.generations:
+            for generation in generations:
+                match generation:
+                    case ChatGeneration(message=AIMessage(response_metadata={"model_name": str(name)})):
+                        model = name.removeprefix("models/")
+                    case _:
+                        pass
+
+        self.finish(run_id, model)
+
+    @override
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.finish(run_id)
+
+    @override
+    async def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self.running[run_id] = self.begin("tool", kwargs.get("name") or (serialized or {}).get("name", "tool"))
+
+    @override
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.finish(run_id)
+
+    @override
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.finish(run_id)
+
+    def rows(self) -> list[tuple[str, float]]:
+        """Nodes with their model and tool calls in start order, then checkpoint I/O and sends summed by name"""
+        now = self.ended or time.perf_counter()
+        rows: list[tuple[str, float]] = []
+        summed: dict[tuple[str, str], list[float]] = {}
+
+        for phase in sorted(self.phases, key=lambda phase: phase.start):
+            seconds = (phase.end or now) - phase.start
+
+            if phase.kind in SUMMED_PHASES:
+                summed.setdefault((phase.kind, phase.name), []).append(seconds)
+            elif phase.kind in NESTED_PHASES:
+                rows.append((f"  {phase.kind} {phase.name}", seconds))
+            else:
+                rows.append((phase.name, seconds))
+
+        rows.extend((f"{kind} {name} ({len(times)}x)", sum(times)) for (kind, name), times in summed.items())
+
+        return rows
+
+    def render(self) -> str:
+        total = (self.ended or time.perf_counter()) - self.started
+        rows = self.rows()
+        lines = [f"{label[:44]:<44}{seconds:>8.2f}s" for label, seconds in rows[: constants.TIMINGS_MAX_ROWS]]
+
+        if len(rows) > constants.TIMINGS_MAX_ROWS:
+            lines.append(f"… +{len(rows) - constants.TIMINGS_MAX_ROWS}")
+
+        return "\n".join([constants.TIMINGS_HEADER.format(total=total), "```", *lines, "```"])
+
+
+phase_timer_var: ContextVar[PhaseTimer | None] = ContextVar("phase_timer", default=None)
+register_configure_hook(phase_timer_var, inheritable=True)
+
+
+@contextmanager
+def phase_timer(enabled: bool) -> Iterator[PhaseTimer | None]:
+    """Time the phases of the question answered inside the block, when it asked for timings"""
+    if not enabled:
+        yield None
+        return
+
+    timer = PhaseTimer()
+    token = phase_timer_var.set(timer)
+
+    try:
+        yield timer
+    finally:
+        phase_timer_var.reset(token)
+        timer.ended = time.perf_counter()
+
+
+@contextmanager
+def timed_phase(kind: str, name: str) -> Iterator[None]:
+    """Add the block's wall time to the active phase timer; free when no question asked for timings"""
+    if (timer := phase_timer_var.get()) is None:
+        yield
+        return
+
+    phase = timer.begin(kind, name)
+
+    try:
+        yield
+    finally:
+        phase.end = time.perf_counter()
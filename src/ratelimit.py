@@ -0,0 +1,250 @@
+import math
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, override
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.tracers.context import register_configure_hook
+from redis.asyncio import Redis
+
+from .constants import constants
+from .logger import logger
+from .metrics import rate_limited
+from .settings import settings
+
+SECONDS_PER_MINUTE = 60
+
+# KEYS: one bucket per scope. ARGV: now is taken from Redis, then (capacity, tokens per ms) per key.
+# Takes one token from every bucket only when all of them have one; otherwise returns the blocking
+# bucket's index (1-based) and how many ms until it refills.
+TAKE_TOKENS_SCRIPT = """
+local time = redis.call('time')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('hmget', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+    if levels[i] < 1 then
+        return {i, math.ceil((1 - levels[i]) / rate)}
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    redis.call('hset', key, 'tokens', tostring(levels[i] - 1), 'ts', now)
+    redis.call('pexpire', key, math.ceil(capacity / rate))
+end
+return {0, 0}
+"""
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    """Token bucket holding up to `burst` questions, refilled at `per_minute` questions per minute"""
+
+    burst: int
+    per_minute: float
+
+    @property
+    def rate_per_ms(self) -> float:
+        return self.per_minute / (SECONDS_PER_MINUTE * 1000)
+
+
+@dataclass(frozen=True)
+class RateDecision:
+    allowed: bool
+    scope: str = ""
+    retry_after: float = 0.0
+
+    def message(self) -> str:
+        wait = max(math.ceil(self.retry_after), 1)
+        retry = f"{wait // SECONDS_PER_MINUTE} min" if wait >= SECONDS_PER_MINUTE else f"{wait} s"
+
+        match self.scope:
+            case "quota":
+                return constants.TOKEN_QUOTA_MESSAGE.format(retry=retry)
+            case "channel":
+                return constants.RATE_LIMITED_CHANNEL_MESSAGE.format(retry=retry)
+            case _:
+                return constants.RATE_LIMITED_USER_MESSAGE.format(retry=retry)
+
+
+ALLOWED = RateDecision(allowed=True)
+
+
+def take_local(
+    state: dict[str, tuple[float, float]], buckets: list[tuple[str, BucketSpec]], now_ms: float
+) -> tuple[int, float]:
+    """In-process equivalent of TAKE_TOKENS_SCRIPT: (blocking bucket index or 0, ms until it refills)"""
+    levels = []
+
+    for index, (key, spec) in enumerate(buckets, start=1):
+        tokens, ts = state.get(key, (spec.burst, now_ms))
+        level = min(spec.burst, tokens + max(now_ms - ts, 0) * spec.rate_per_ms)
+
+        if level < 1:
+            return index, math.ceil((1 - level) / spec.rate_per_ms)
+
+        levels.append(level)
+
+    for (key, _), level in zip(buckets, levels, strict=True):
+        state[key] = (level - 1, now_ms)
+
+    return 0, 0
+
+
+class UsageMeter(AsyncCallbackHandler):
+    """Adds up the LLM tokens spent while it is the active meter"""
+
+    def __init__(self) -> None:
+        self.tokens = 0
+
+    @override
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                match generation:
+                    case ChatGeneration(message=AIMessage(usage_metadata=dict(usage))):
+                        self.tokens += usage.get("total_tokens", 0)
+                    case _:
+                        pass
+
+
+usage_meter_var: ContextVar[UsageMeter | None] = ContextVar("usage_meter", default=None)
+register_configure_hook(usage_meter_var, inheritable=True)
+
+
+@dataclass
+class RateLimiter:
+    """Per-user and per-channel token buckets plus a per-user LLM token quota.
+
+    State lives in Redis so every replica enforces the same limits; without Redis it is kept in process.
+    Redis errors fail open, since a broken limiter must not take the bot down during an incident.
+    """
+
+    user_bucket: BucketSpec
+    channel_bucket: BucketSpec
+    token_quota: int
+    quota_window: int
+    redis: Redis | None = None
+    prefix: str = constants.RATE_LIMIT_REDIS_PREFIX
+    local_buckets: dict[str, tuple[float, float]] = field(default_factory=dict)
+    local_usage: Counter[str] = field(default_factory=Counter)
+    decisions: Counter[str] = field(default_factory=Counter)
+    tokens_by_user: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self.take_tokens = self.redis.register_script(TAKE_TOKENS_SCRIPT) if self.redis else None
+
+    def quota_key(self, user_id: str, now: float) -> tuple[str, float]:
+        """Key of the user's current quota window and seconds until the window ends"""
+        window = int(now // self.quota_window)
+        return f"{self.prefix}quota:{user_id}:{window}", (window + 1) * self.quota_window - now
+
+    async def quota_used(self, key: str) -> int:
+        if self.redis is None:
+            return self.local_usage[key]
+
+        return int(await self.redis.get(key) or 0)
+
+    async def take(self, buckets: list[tuple[str, BucketSpec]]) -> tuple[int, float]:
+        if self.take_tokens is None:
+            return take_local(self.local_buckets, buckets, time.time() * 1000)
+
+        args = [value for _, spec in buckets for value in (spec.burst, spec.rate_per_ms)]
+        blocked, wait_ms = await self.take_tokens(keys=[f"{self.prefix}{key}" for key, _ in buckets], args=args)
+        return int(blocked), float(wait_ms)
+
+    async def check(self, user_id: str, channel_id: str) -> RateDecision:
+        """Admit a question, or say which limit blocks it and for how long"""
+        decision = ALLOWED
+
+        try:
+            quota_key, window_left = self.quota_key(user_id, time.time())
+
+            if self.token_quota and await self.quota_used(quota_key) >= self.token_quota:
+                decision = RateDecision(False, "quota", window_left)
+            else:
+                scopes = [
+                    ("user", f"user:{user_id}", self.user_bucket),
+                    ("channel", f"channel:{channel_id}", self.channel_bucket),
+                ]
+                blocked, wait_ms = await self.take([(key, spec) for _, key, spec in scopes])
+
+                if blocked:
+                    decision = RateDecision(False, scopes[blocked - 1][0], wait_ms / 1000)
+        except Exception as e:
+            logger.warning("Rate limiter unavailable, allowing question: %s", e)
+
+        self.decisions["allowed" if decision.allowed else decision.scope] += 1
+
+        if not decision.allowed:
+            rate_limited.inc(scope=decision.scope)
+            logger.info(
+                "Rate limited user %s in channel %s (%s, %.0fs)",
+                user_id,
+                channel_id,
+                decision.scope,
+                decision.retry_after,
+            )
+
+        return decision
+
+    async def record_tokens(self, user_id: str, tokens: int) -> None:
+        """Charge LLM tokens to the user's current quota window"""
+        if not tokens:
+            return
+
+        self.tokens_by_user[user_id] += tokens
+        key, window_left = self.quota_key(user_id, time.time())
+
+        if self.redis is None:
+            self.local_usage[key] += tokens
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incrby(key, tokens)
+                pipe.expire(key, math.ceil(window_left))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Failed to record token usage for %s: %s", user_id, e)
+
+    @contextmanager
+    def metered(self) -> Iterator[UsageMeter]:
+        """Count the tokens of every LLM call made inside the block, including nested graph runs"""
+        meter = UsageMeter()
+        token = usage_meter_var.set(meter)
+
+        try:
+            yield meter
+        finally:
+            usage_meter_var.reset(token)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "decisions": dict(self.decisions),
+            "tokens_by_user": dict(self.tokens_by_user.most_common(constants.RATE_LIMIT_STATS_USERS)),
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter from settings, sharing state through REDIS_URL when it is set"""
+    return RateLimiter(
+        user_bucket=BucketSpec(settings.RATE_LIMIT_USER_BURST, settings.RATE_LIMIT_USER_PER_MINUTE),
+        channel_bucket=BucketSpec(settings.RATE_LIMIT_CHANNEL_BURST, settings.RATE_LIMIT_CHANNEL_PER_MINUTE),
+        token_quota=settings.TOKEN_QUOTA_PER_USER,
+        quota_window=settings.TOKEN_QUOTA_WINDOW,
+        redis=Redis.from_url(settings.REDIS_URL, decode_responses=True) if settings.REDIS_URL else None,
+    )
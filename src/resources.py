@@ -0,0 +1,110 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+
+
+def content_text(content: Any) -> str:
+    """Flatten MCP tool content (a string or a list of text blocks) into one string"""
+    match content:
+        case str():
+            return content
+        case list():
+            return "\n".join(
+                item if isinstance(item, str) else json.dumps(item, ensure_ascii=False) for item in content
+            )
+        case None:
+            return ""
+        case _:
+            return str(content)
+
+
+def parse_records(content: Any) -> list[dict[str, Any]] | None:
+    """Parse tool content into JSON objects; None when it is not structured data"""
+    blocks = content if isinstance(content, list) else [content]
+    records: list[dict[str, Any]] = []
+
+    for block in blocks:
+        if isinstance(block, dict):
+            records.append(block)
+            continue
+
+        if not isinstance(block, str):
+            return None
+
+        try:
+            parsed = json.loads(block)
+        except ValueError:
+            return None
+
+        match parsed:
+            case dict():
+                records.append(parsed)
+            case list() if all(isinstance(item, dict) for item in parsed):
+                records.extend(parsed)
+            case _:
+                return None
+
+    return records
+
+
+@dataclass(frozen=True)
+class ResourceRow:
+    """Compact view of a Kubernetes resource as returned by list-k8s-resources"""
+
+    name: str
+    namespace: str
+    status: str
+    restarts: int
+    age: str
+    owner: str
+
+
+def container_statuses(record: dict[str, Any]) -> list[dict[str, Any]]:
+    status = record.get("status")
+    return status.get("containerStatuses", []) if isinstance(status, dict) else []
+
+
+def resource_status(record: dict[str, Any]) -> str:
+    """Most informative status: a waiting/terminated reason beats the pod phase"""
+    for container in container_statuses(record):
+        state = container.get("state", {})
+        for key in ("waiting", "terminated"):
+            if reason := state.get(key, {}).get("reason"):
+                return reason
+
+    match record.get("status"):
+        case str(status):
+            return status
+        case {"phase": str(phase)}:
+            return phase
+        case _:
+            return str(record.get("phase", "-"))
+
+
+def resource_restarts(record: dict[str, Any]) -> int:
+    match record.get("restarts", record.get("restartCount")):
+        case int(restarts):
+            return restarts
+        case str(restarts) if restarts.split(" ")[0].isdigit():
+            return int(restarts.split(" ")[0])
+        case _:
+            return sum(int(container.get("restartCount", 0)) for container in container_statuses(record))
+
+
+def resource_row(record: dict[str, Any]) -> ResourceRow:
+    """Extract name/namespace/status/restarts/age/owner from a raw or pre-flattened resource"""
+    metadata = record.get("metadata", {}) if isinstance(record.get("metadata"), dict) else {}
+    owners = metadata.get("ownerReferences") or []
+
+    return ResourceRow(
+        name=str(record.get("name") or metadata.get("name", "-")),
+        namespace=str(record.get("namespace") or metadata.get("namespace", "-")),
+        status=resource_status(record),
+        restarts=resource_restarts(record),
+        age=str(record.get("age") or metadata.get("creationTimestamp", "-")),
+        owner=str(record.get("owner") or (owners[0].get("name", "-") if owners else "-")),
+    )
+
+
+def is_resource_record(record: dict[str, Any]) -> bool:
+    return "name" in record or isinstance(record.get("metadata"), dict)
@@ -0,0 +1,232 @@
+import asyncio
+import math
+import socket
+import time
+from collections import Counter, defaultdict
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from typing import Any, cast
+
+from langgraph.checkpoint.redis.base import CHECKPOINT_BLOB_PREFIX, CHECKPOINT_PREFIX, CHECKPOINT_WRITE_PREFIX
+from langgraph.checkpoint.redis.key_registry import WRITE_KEYS_ZSET_PREFIX
+from langgraph.checkpoint.redis.util import to_storage_safe_id
+from redis.asyncio import Redis
+
+from .constants import constants
+from .logger import logger
+from .settings import settings
+
+LATEST_POINTER_PREFIX = "checkpoint_latest"
+REF_PREFIX = "checkpoint_ref"
+SWEPT_AT_FIELD = "__swept_at__"
+
+# Key families of one thread; checkpoint namespaces may contain ":", so ids are split from the right
+THREAD_KEY_PREFIXES = (
+    CHECKPOINT_PREFIX,
+    CHECKPOINT_WRITE_PREFIX,
+    CHECKPOINT_BLOB_PREFIX,
+    WRITE_KEYS_ZSET_PREFIX,
+    LATEST_POINTER_PREFIX,
+    REF_PREFIX,
+)
+
+
+def checkpoint_ttl_config() -> dict[str, Any] | None:
+    """TTL config for AsyncRedisSaver: every write gets CHECKPOINT_TTL, refreshed when a thread is read"""
+    if not settings.CHECKPOINT_TTL:
+        return None
+
+    return {"default_ttl": settings.CHECKPOINT_TTL / 60, "refresh_on_read": True}
+
+
+def checkpoint_of(key: str, thread: str) -> tuple[str, str] | None:
+    """(namespace, checkpoint id) a checkpoint, write or write-registry key belongs to"""
+    family, _, rest = key.partition(":")
+    rest = rest.removeprefix(f"{thread}:")
+
+    if family in (CHECKPOINT_PREFIX, WRITE_KEYS_ZSET_PREFIX):
+        namespace, _, checkpoint_id = rest.rpartition(":")
+    elif family == CHECKPOINT_WRITE_PREFIX:
+        namespace, _, checkpoint_id = rest.rsplit(":", 2)[0].rpartition(":")
+    else:
+        return None
+
+    return namespace, checkpoint_id
+
+
+def prunable_keys(keys: list[str], thread: str, keep_latest: int) -> list[str]:
+    """Keys of every checkpoint older than the latest `keep_latest` of its namespace, with their writes.
+
+    Checkpoint ids are time-ordered uuid6 values, so lexicographic order is creation order. Channel values are
+    stored inline in each checkpoint, so blobs, latest pointers and string references are never pruned here;
+    references expire with the checkpoint TTL instead.
+    """
+    ids: dict[str, set[str]] = defaultdict(set)
+
+    for key in keys:
+        if key.startswith(f"{CHECKPOINT_PREFIX}:") and (checkpoint := checkpoint_of(key, thread)):
+            ids[checkpoint[0]].add(checkpoint[1])
+
+    stale = {
+        (namespace, checkpoint_id)
+        for namespace, checkpoint_ids in ids.items()
+        for checkpoint_id in sorted(checkpoint_ids)[:-keep_latest]
+    }
+
+    return [key for key in keys if checkpoint_of(key, thread) in stale]
+
+
+@dataclass
+class CheckpointRetention:
+    """Background sweeper that prunes old checkpoints, applies per-thread TTLs and measures thread sizes.
+
+    Every graph step writes a full checkpoint of the thread, so a long-lived channel accumulates one copy of
+    its history per step. Replicas take turns through a Redis lock, so one sweep runs per interval.
+    """
+
+    redis: Redis
+    keep_latest: int
+    sweep_interval: float
+    ttl_overrides: dict[str, int] = field(default_factory=dict)
+    owner: str = field(default_factory=socket.gethostname)
+    sizes: dict[str, int] = field(default_factory=dict)
+    checkpoint_counts: dict[str, int] = field(default_factory=dict)
+    counters: Counter[str] = field(default_factory=Counter)
+    last_sweep: float = 0.0
+
+    async def threads(self) -> set[str]:
+        """Threads with at least one checkpoint, from their latest-checkpoint pointers"""
+        return {
+            key.split(":")[1]
+            async for key in self.redis.scan_iter(match=f"{LATEST_POINTER_PREFIX}:*", count=constants.SCAN_BATCH)
+        }
+
+    async def thread_keys(self, thread: str) -> list[str]:
+        keys = []
+
+        for prefix in THREAD_KEY_PREFIXES:
+            async for key in self.redis.scan_iter(match=f"{prefix}:{thread}:*", count=constants.SCAN_BATCH):
+                keys.append(key)
+
+        return keys
+
+    async def measure(self, keys: list[str]) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+            sizes = await pipe.execute()
+
+        return sum(size or 0 for size in sizes)
+
+    async def sweep_thread(self, thread: str) -> None:
+        """Prune one thread to its latest checkpoints, apply its TTL override and record its size"""
+        keys = await self.thread_keys(thread)
+
+        if stale := prunable_keys(keys, thread, self.keep_latest):
+            await self.redis.unlink(*stale)
+            self.counters["pruned_keys"] += len(stale)
+            pruned = set(stale)
+            keys = [key for key in keys if key not in pruned]
+
+        if (ttl := self.ttl_overrides.get(thread)) is not None and keys:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    if ttl > 0:
+                        pipe.expire(key, ttl)
+                    else:
+                        pipe.persist(key)
+                await pipe.execute()
+
+        self.sizes[thread] = await self.measure(keys)
+        self.checkpoint_counts[thread] = sum(key.startswith(f"{CHECKPOINT_PREFIX}:") for key in keys)
+
+    async def sweep(self) -> None:
+        started = time.perf_counter()
+        threads = await self.threads()
+
+        for thread in threads:
+            try:
+                await self.sweep_thread(thread)
+            except Exception as e:
+                logger.warning("Checkpoint sweep of %s failed: %s", thread, e)
+
+        for gone in self.sizes.keys() - threads:
+            self.sizes.pop(gone, None)
+            self.checkpoint_counts.pop(gone, None)
+
+        self.last_sweep = time.time()
+        self.counters["sweeps"] += 1
+        await self.publish()
+
+        logger.info(
+            "Checkpoint sweep: %d threads, %d bytes in %.2fs",
+            len(threads),
+            sum(self.sizes.values()),
+            time.perf_counter() - started,
+        )
+
+    async def run(self) -> None:
+        """Sweep every `sweep_interval` seconds on whichever replica holds the sweep lock"""
+        lock_ms = int(self.sweep_interval * 1000)
+
+        while True:
+            try:
+                if await self.redis.set(constants.CHECKPOINT_SWEEP_LOCK, self.owner, nx=True, px=lock_ms):
+                    await self.sweep()
+            except Exception as e:
+                logger.error("Checkpoint sweep failed: %s", e)
+
+            await asyncio.sleep(self.sweep_interval)
+
+    async def publish(self) -> None:
+        """Share the latest sizes with every replica, since only the lock holder sweeps"""
+        summary = {thread: f"{size}:{self.checkpoint_counts.get(thread, 0)}" for thread, size in self.sizes.items()}
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(constants.CHECKPOINT_SIZES_KEY)
+            pipe.hset(constants.CHECKPOINT_SIZES_KEY, mapping={**summary, SWEPT_AT_FIELD: str(self.last_sweep)})
+            await pipe.execute()
+
+    async def report(self, limit: int) -> str:
+        """Largest threads by checkpoint bytes from the latest sweep of any replica, for the admin command"""
+        summary = await cast("Awaitable[dict[str, str]]", self.redis.hgetall(constants.CHECKPOINT_SIZES_KEY))
+
+        if SWEPT_AT_FIELD not in summary:
+            return constants.CHECKPOINTS_PENDING_MESSAGE
+
+        age = int(time.time() - float(summary.pop(SWEPT_AT_FIELD)))
+        threads = {thread: tuple(map(int, value.split(":"))) for thread, value in summary.items()}
+        ranked = sorted(threads.items(), key=lambda item: item[1][0], reverse=True)
+        total = sum(size for size, _ in threads.values())
+
+        lines = [
+            f"🗄️ **Checkpoints**: {len(ranked)} threads, {total / 1024:.0f} KiB "
+            f"(varredura de {age}s atrás, mantendo os {self.keep_latest} mais recentes)"
+        ]
+        lines.extend(
+            f"- `{thread}`: {size / 1024:.1f} KiB em {count} checkpoints" for thread, (size, count) in ranked[:limit]
+        )
+
+        return "\n".join(lines)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.counters,
+            "threads": len(self.sizes),
+            "bytes": sum(self.sizes.values()),
+            "thread_bytes": dict(self.sizes),
+            "last_sweep_age": math.floor(time.time() - self.last_sweep) if self.last_sweep else None,
+        }
+
+
+def create_checkpoint_retention() -> CheckpointRetention:
+    """Build the checkpoint sweeper from settings"""
+    if not settings.REDIS_URL:
+        raise ValueError("REDIS_URL is required for checkpoint retention")
+
+    return CheckpointRetention(
+        redis=Redis.from_url(settings.REDIS_URL, decode_responses=True),
+        keep_latest=settings.CHECKPOINT_KEEP_LATEST,
+        sweep_interval=settings.CHECKPOINT_SWEEP_INTERVAL,
+        ttl_overrides={to_storage_safe_id(thread): ttl for thread, ttl in settings.CHECKPOINT_TTLS.items()},
+    )
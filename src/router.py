@@ -0,0 +1,305 @@
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, Sequence
+from dataclasses import dataclass, field
+from typing import Any, TypeVar, override
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel, LangSmithParams, LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableSequence
+
+from .constants import constants
+from .logger import logger
+from .metrics import llm_fallbacks, llm_hedges
+
+R = TypeVar("R")
+
+
+@dataclass
+class ModelHealth:
+    """Rolling latency and error window of one model, with a circuit breaker.
+
+    The breaker opens when the error rate over the window reaches `error_threshold`. After `cooldown`
+    seconds it is half-open: calls go through again, the first success closes it and a failure reopens it.
+    """
+
+    window: int
+    error_threshold: float
+    cooldown: float
+    min_samples: int = constants.MODEL_HEALTH_MIN_SAMPLES
+    latencies: deque[float] = field(init=False)
+    outcomes: deque[bool] = field(init=False)
+    opened_at: float | None = None
+    counters: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self.latencies = deque(maxlen=self.window)
+        self.outcomes = deque(maxlen=self.window)
+
+    def record(self, ok: bool, latency: float, now: float) -> None:
+        self.outcomes.append(ok)
+        self.counters["success" if ok else "error"] += 1
+
+        if ok:
+            self.latencies.append(latency)
+
+            if self.opened_at is not None:
+                self.opened_at = None
+                self.outcomes.clear()
+                logger.info("Model circuit closed after a successful probe")
+        elif self.opened_at is not None or (
+            len(self.outcomes) >= self.min_samples and self.error_rate() >= self.error_threshold
+        ):
+            self.opened_at = now
+            self.counters["trips"] += 1
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def p95(self) -> float | None:
+        """95th percentile answer latency, once the window has enough successful calls"""
+        if len(self.latencies) < self.min_samples:
+            return None
+
+        ordered = sorted(self.latencies)
+        return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+    def state(self, now: float) -> str:
+        match self.opened_at:
+            case None:
+                return "closed"
+            case opened_at if now - opened_at < self.cooldown:
+                return "open"
+            case _:
+                return "half-open"
+
+    def stats(self, now: float) -> dict[str, Any]:
+        p95 = self.p95()
+
+        return {
+            **self.counters,
+            "state": self.state(now),
+            "error_rate": round(self.error_rate(), 3),
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class ModelRouter(BaseChatModel):
+    """Chat model that races an ordered list of models instead of falling back only after a failure.
+
+    The first model with a closed breaker is called; if it has not answered within its p95 latency, the
+    next one is hedged in parallel and whichever answers first wins, cancelling the other. A failed call
+    starts the next model right away. Streaming calls are hedged on their first chunk. Blocking calls have
+    no event loop to hedge on, so they only fail over, one model after the other.
+    """
+
+    models: list[BaseChatModel]
+    names: list[str]
+    health: dict[str, ModelHealth]
+    hedging: bool = True
+    hedge_delay: float = constants.DEFAULT_MODEL_HEDGE_DELAY
+    hedge_min_delay: float = constants.DEFAULT_MODEL_HEDGE_MIN_DELAY
+
+    @property
+    @override
+    def _llm_type(self) -> str:
+        return "sherlock-router"
+
+    @override
+    def _get_ls_params(self, stop: list[str] | None = None, **kwargs: Any) -> LangSmithParams:
+        params = self.models[0]._get_ls_params(stop=stop, **kwargs)
+        params["ls_model_name"] = self.names[0]
+        return params
+
+    @override
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Format tools once with the primary model's provider and bind them to the router"""
+        binding = self.models[0].bind_tools(tools, **kwargs)
+
+        if not isinstance(binding, RunnableBinding):
+            raise NotImplementedError(f"Unsupported tool binding from {self.names[0]}")
+
+        return self.bind(**binding.kwargs)
+
+    @override
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable[LanguageModelInput, Any]:
+        """Reuse the primary model's structured-output binding and parser with routed calls"""
+        structured = self.models[0].with_structured_output(schema, **kwargs)
+
+        match structured:
+            case RunnableSequence(first=RunnableBinding(kwargs=bound), last=parser):
+                return self.bind(**bound) | parser
+            case _:
+                raise NotImplementedError(f"Unsupported structured output from {self.names[0]}")
+
+    def candidates(self, now: float) -> list[int]:
+        """Models whose breaker lets calls through, in preference order; all of them if every breaker is open"""
+        available = [index for index, name in enumerate(self.names) if self.health[name].state(now) != "open"]
+        return available or list(range(len(self.models)))
+
+    def delay_for(self, name: str) -> float | None:
+        if not self.hedging:
+            return None
+
+        return max(self.health[name].p95() or self.hedge_delay, self.hedge_min_delay)
+
+    def settle(
+        self, done: set[asyncio.Task[R]], pending: dict[asyncio.Task[R], str], started: dict[str, float]
+    ) -> tuple[list[tuple[asyncio.Task[R], str]], BaseException | None]:
+        """Record the outcome of finished attempts: the ones that answered, and the last error"""
+        answered: list[tuple[asyncio.Task[R], str]] = []
+        error: BaseException | None = None
+
+        for task in done:
+            name = pending.pop(task)
+            latency = time.perf_counter() - started[name]
+
+            if (exc := task.exception()) is not None:
+                self.health[name].record(False, latency, time.time())
+                logger.warning("Model %s failed after %.1fs: %s", name, latency, exc)
+                error = exc
+            else:
+                self.health[name].record(True, latency, time.time())
+                answered.append((task, name))
+
+        return answered, error
+
+    async def race(
+        self,
+        attempt: Callable[[BaseChatModel], Coroutine[Any, Any, R]],
+        discard: Callable[[R], Awaitable[None]] | None = None,
+    ) -> tuple[str, R]:
+        """Run `attempt` on the preferred model, hedging on slowness and failing over on errors.
+
+        Returns the name of the model that answered with its result.
+        """
+        queue = deque(self.candidates(time.time()))
+        pending: dict[asyncio.Task[R], str] = {}
+        started: dict[str, float] = {}
+        error: BaseException | None = None
+
+        def launch() -> str:
+            index = queue.popleft()
+            name = self.names[index]
+            started[name] = time.perf_counter()
+            pending[asyncio.create_task(attempt(self.models[index]))] = name
+            return name
+
+        first = launch()
+
+        try:
+            while pending:
+                delay = self.delay_for(first) if queue else None
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    name = launch()
+                    self.health[name].counters["hedged"] += 1
+                    llm_hedges.inc(model=name)
+                    logger.info("Hedging %s after %.1fs without an answer", name, delay)
+                    continue
+
+                answered, failure = self.settle(done, pending, started)
+                error = failure or error
+
+                if answered:
+                    (winner, name), *losers = answered
+
+                    if name != first and first in pending.values():
+                        self.health[name].counters["hedge_wins"] += 1
+
+                    if name != self.names[0]:
+                        llm_fallbacks.inc(model=name)
+
+                    if discard:
+                        for loser, _ in losers:
+                            await discard(loser.result())
+
+                    return name, winner.result()
+
+                if not pending and queue:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error or RuntimeError("No model available")
+
+    def label(self, result: ChatResult, name: str) -> ChatResult:
+        """Tag each generation with the model that produced it"""
+        for generation in result.generations:
+            generation.message.response_metadata["model_name"] = name
+
+        return result
+
+    @override
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: BaseException | None = None
+
+        for index in self.candidates(time.time()):
+            name = self.names[index]
+            started = time.perf_counter()
+
+            try:
+                result = self.models[index]._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self.health[name].record(False, time.perf_counter() - started, time.time())
+                logger.warning("Model %s failed: %s", name, e)
+                error = e
+                continue
+
+            self.health[name].record(True, time.perf_counter() - started, time.time())
+
+            if name != self.names[0]:
+                llm_fallbacks.inc(model=name)
+
+            return self.label(result, name)
+
+        raise error or RuntimeError("No model available")
+
+    @override
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        name, result = await self.race(lambda model: model._agenerate(messages, stop=stop, **kwargs))
+        return self.label(result, name)
+
+    @override
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async def open_stream(model: BaseChatModel) -> tuple[AsyncIterator[ChatGenerationChunk], ChatGenerationChunk]:
+            stream = model._astream(messages, stop=stop, **kwargs)
+            return stream, await anext(aiter(stream))
+
+        async def close_stream(opened: tuple[AsyncIterator[ChatGenerationChunk], ChatGenerationChunk]) -> None:
+            await opened[0].aclose()  # type: ignore[attr-defined]
+
+        name, (stream, chunk) = await self.race(open_stream, close_stream)
+        chunk.message.response_metadata["model_name"] = name
+        yield chunk
+
+        async for chunk in stream:
+            yield chunk
+
+    def stats(self) -> dict[str, Any]:
+        now = time.time()
+        return {name: self.health[name].stats(now) for name in self.names}
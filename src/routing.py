@@ -0,0 +1,90 @@
+import re
+
+from .constants import QuestionRoute
+
+LOOKUP_PREFIXES = (
+    "liste",
+    "listar",
+    "lista",
+    "list",
+    "mostre",
+    "mostrar",
+    "mostra",
+    "show",
+    "quais",
+    "quantos",
+    "quantas",
+    "qual",
+    "get",
+)
+
+RESOURCE_KEYWORDS = (
+    "pod",
+    "deployment",
+    "service",
+    "namespace",
+    "node",
+    "context",
+    "contexto",
+    "cluster",
+    "evento",
+    "event",
+    "ingress",
+    "configmap",
+    "secret",
+    "statefulset",
+    "daemonset",
+    "job",
+    "cronjob",
+    "réplica",
+    "replica",
+)
+
+DIAGNOSTIC_KEYWORDS = (
+    "por que",
+    "porque",
+    "por quê",
+    "why",
+    "erro",
+    "error",
+    "falha",
+    "fail",
+    "crash",
+    "problema",
+    "debug",
+    "investig",
+    "lento",
+    "timeout",
+    "down",
+    "fora do ar",
+    "caiu",
+    "reinici",
+    "restart",
+    "oom",
+    "backoff",
+    "pending",
+    "diagnos",
+    "analis",
+    "compare",
+)
+
+MAX_DIRECT_WORDS = 20
+
+
+def classify_question(question: str) -> QuestionRoute:
+    """Send simple resource lookups straight to the worker, everything else through the supervisor"""
+    normalized = question.strip().lower()
+    words = re.findall(r"[\wáéíóúâêôãõç-]+", normalized)
+
+    match words:
+        case []:
+            return QuestionRoute.SUPERVISED
+        case [first, *_] if (
+            first.startswith(LOOKUP_PREFIXES)
+            and len(words) <= MAX_DIRECT_WORDS
+            and any(keyword in normalized for keyword in RESOURCE_KEYWORDS)
+            and not any(keyword in normalized for keyword in DIAGNOSTIC_KEYWORDS)
+        ):
+            return QuestionRoute.DIRECT
+        case _:
+            return QuestionRoute.SUPERVISED
@@ -0,0 +1,269 @@
+import base64
+import hashlib
+from collections import Counter
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, override
+
+import zstandard
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+from langgraph.checkpoint.redis.jsonplus_redis import JsonPlusRedisSerializer
+from langgraph.checkpoint.redis.util import to_storage_safe_id
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from .logger import logger
+from .metrics import checkpoint_bytes
+from .profiling import timed_phase
+from .retention import REF_PREFIX, checkpoint_ttl_config
+from .settings import settings
+
+PACKED_KEY = "__zmsgpack__"
+PACKED_TYPE = "zmsgpack"
+REF_KEY = "__ref__"
+
+
+class CompactSerializer(JsonPlusRedisSerializer):
+    """Checkpoint serializer that stores large values as zstd-compressed msgpack.
+
+    Checkpoints stay JSON documents so RedisJSON can index them, but channel values above `threshold`
+    bytes of msgpack are replaced by a `{"__zmsgpack__": <base64>}` marker, and pending writes above it
+    use the `zmsgpack` type. Values without markers load as before, so existing threads keep working.
+    """
+
+    def __init__(self, threshold: int | None, level: int) -> None:
+        super().__init__()
+        self.threshold = threshold
+        self.level = level
+        self.counters: Counter[str] = Counter()
+
+    def compress(self, value: Any) -> str | None:
+        """Base64 of the compressed msgpack encoding, or None when the value is small or not msgpack-safe"""
+        if self.threshold is None or value is None or isinstance(value, bool | int | float | bytes | bytearray):
+            return None
+        if isinstance(value, str) and len(value) < self.threshold:
+            return None
+
+        type_, data = JsonPlusSerializer.dumps_typed(self, value)
+
+        if type_ != "msgpack" or len(data) < self.threshold:
+            return None
+
+        packed = zstandard.compress(data, self.level)
+        self.counters["packed"] += 1
+        self.counters["packed_bytes_in"] += len(data)
+        self.counters["packed_bytes_out"] += len(packed)
+
+        return base64.b64encode(packed).decode()
+
+    def decompress(self, data: str | bytes) -> Any:
+        return JsonPlusSerializer.loads_typed(self, ("msgpack", zstandard.decompress(base64.b64decode(data))))
+
+    def pack(self, value: Any) -> Any:
+        return value if (packed := self.compress(value)) is None else {PACKED_KEY: packed}
+
+    def unpack(self, value: Any) -> Any:
+        match value:
+            case {"__zmsgpack__": str(packed)}:
+                return self.decompress(packed)
+            case _:
+                return value
+
+    @override
+    def _revive_if_needed(self, obj: Any) -> Any:
+        if isinstance(obj, dict) and PACKED_KEY in obj:
+            return self.unpack(obj)
+
+        return super()._revive_if_needed(obj)
+
+    @override
+    def dumps_typed(self, obj: Any) -> tuple[str, str]:  # type: ignore[override]
+        # Strings, not bytes, as in JsonPlusRedisSerializer: the Redis savers put blobs straight into RedisJSON.
+        # A whole checkpoint must stay JSON: CompactRedisSaver packs its channel values one by one
+        is_checkpoint = isinstance(obj, dict) and "channel_values" in obj
+
+        if not is_checkpoint and (packed := self.compress(obj)) is not None:
+            return PACKED_TYPE, packed
+
+        type_, data = super().dumps_typed(obj)
+
+        if is_checkpoint:
+            checkpoint_bytes.observe(len(data))
+
+        return type_, data
+
+    @override
+    def loads_typed(self, data: tuple[str, str | bytes]) -> Any:
+        type_, data_ = data
+
+        if type_ == PACKED_TYPE:
+            return self.decompress(data_)
+
+        return super().loads_typed(data)
+
+
+class CompactRedisSaver(AsyncRedisSaver):
+    """AsyncRedisSaver that packs large channel values and stores large string channels once by reference.
+
+    String channels of at least `ref_threshold` characters, such as `worker_result`, are written once to a
+    content-addressed `checkpoint_ref:<thread>:<hash>` key and every checkpoint holds a `{"__ref__": key}`
+    marker instead of another copy. Reference keys get the checkpoint TTL, refreshed on each write.
+    """
+
+    serde: CompactSerializer
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        *,
+        serde: CompactSerializer,
+        ref_threshold: int | None = None,
+        ttl: dict[str, Any] | None = None,
+    ) -> None:
+        super().__init__(redis_url, ttl=ttl)
+        self.serde = serde
+        self.ref_threshold = ref_threshold
+        self.counters: Counter[str] = Counter()
+
+    def ttl_seconds(self) -> int | None:
+        minutes = (self.ttl_config or {}).get("default_ttl")
+        return int(minutes * 60) if minutes else None
+
+    async def store_refs(self, thread_id: str, values: dict[str, Any]) -> dict[str, Any]:
+        """Channel values with large strings swapped for reference markers, writing only missing references"""
+        if self.ref_threshold is None:
+            return values
+
+        refs = {
+            channel: f"{REF_PREFIX}:{to_storage_safe_id(thread_id)}:{hashlib.sha256(value.encode()).hexdigest()[:32]}"
+            for channel, value in values.items()
+            if isinstance(value, str) and len(value) >= self.ref_threshold
+        }
+
+        if not refs:
+            return values
+
+        ttl = self.ttl_seconds()
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in refs.values():
+                if ttl:
+                    pipe.expire(key, ttl)
+                else:
+                    pipe.exists(key)
+            present = await pipe.execute()
+
+        if missing := [channel for channel, found in zip(refs, present, strict=True) if not found]:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for channel in missing:
+                    pipe.set(refs[channel], values[channel], ex=ttl)
+                await pipe.execute()
+
+        self.counters["refs_stored"] += len(missing)
+        self.counters["refs_reused"] += len(refs) - len(missing)
+
+        return {**values, **{channel: {REF_KEY: key} for channel, key in refs.items()}}
+
+    async def resolve_refs(self, checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+        """Replace reference markers in a loaded checkpoint with the stored strings"""
+        values = checkpoint_tuple.checkpoint.get("channel_values", {})
+        refs = {
+            channel: value[REF_KEY] for channel, value in values.items() if isinstance(value, dict) and REF_KEY in value
+        }
+
+        if refs:
+            for (channel, key), stored in zip(refs.items(), await self._redis.mget(list(refs.values())), strict=True):
+                if stored is None:
+                    self.counters["refs_missing"] += 1
+                    logger.warning("Checkpoint reference %s of channel %s expired", key, channel)
+
+                values[channel] = stored.decode() if isinstance(stored, bytes) else stored or ""
+
+        return checkpoint_tuple
+
+    @override
+    def _dump_checkpoint(self, checkpoint: Checkpoint) -> dict[str, Any]:
+        values = {channel: self.serde.pack(value) for channel, value in checkpoint["channel_values"].items()}
+        return super()._dump_checkpoint({**checkpoint, "channel_values": values})
+
+    @override
+    def _recursive_deserialize(self, obj: Any) -> Any:
+        if isinstance(obj, dict) and PACKED_KEY in obj:
+            return self.serde.unpack(obj)
+
+        return super()._recursive_deserialize(obj)
+
+    @override
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+        stream_mode: str = "values",
+    ) -> RunnableConfig:
+        with timed_phase("checkpoint", "aput"):
+            values = await self.store_refs(config["configurable"]["thread_id"], checkpoint["channel_values"])
+            checkpoint = {**checkpoint, "channel_values": values}
+            return await super().aput(config, checkpoint, metadata, new_versions, stream_mode)
+
+    @override
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with timed_phase("checkpoint", "aput_writes"):
+            await super().aput_writes(config, writes, task_id, task_path)
+
+    @override
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with timed_phase("checkpoint", "aget_tuple"):
+            if (checkpoint_tuple := await super().aget_tuple(config)) is None:
+                return None
+
+            return await self.resolve_refs(checkpoint_tuple)
+
+    @override
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async for checkpoint_tuple in super().alist(config, filter=filter, before=before, limit=limit):
+            yield await self.resolve_refs(checkpoint_tuple)
+
+    @override
+    async def adelete_thread(self, thread_id: str) -> None:
+        await super().adelete_thread(thread_id)
+
+        refs = [key async for key in self._redis.scan_iter(match=f"{REF_PREFIX}:{to_storage_safe_id(thread_id)}:*")]
+
+        if refs:
+            await self._redis.unlink(*refs)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.serde.counters, **self.counters}
+
+
+def create_checkpoint_serializer() -> CompactSerializer:
+    """Build the checkpoint serializer from settings; with compression off it only reads packed values"""
+    return CompactSerializer(
+        threshold=settings.CHECKPOINT_COMPRESSION_THRESHOLD if settings.CHECKPOINT_COMPRESSION_ENABLED else None,
+        level=settings.CHECKPOINT_COMPRESSION_LEVEL,
+    )
+
+
+def create_checkpointer() -> CompactRedisSaver:
+    """Build the Redis checkpointer from settings"""
+    return CompactRedisSaver(
+        settings.REDIS_URL,
+        serde=create_checkpoint_serializer(),
+        ref_threshold=settings.CHECKPOINT_REF_THRESHOLD or None,
+        ttl=checkpoint_ttl_config(),
+    )
@@ -1,24 +1,104 @@
+import json
+
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
-from .constants import constants
+from .constants import DeploymentMode, LogFormat, TraceExporter, constants
 
 
 class Settings(BaseSettings):
+    ADMIN_USERS: str | None = None
     AGENT_TIMEOUT: int = constants.DEFAULT_AGENT_TIMEOUT
+    ANSWER_CACHE_EMBEDDING_MODEL: str | None = constants.DEFAULT_ANSWER_CACHE_EMBEDDING_MODEL
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = constants.DEFAULT_ANSWER_CACHE_SIMILARITY
+    ANSWER_CACHE_TTL: int = constants.DEFAULT_ANSWER_CACHE_TTL
     ALLOWED_SHELL_COMMANDS: str = "cat,grep,echo,ls,find,du,kubectl,gcloud"
+    CHECKPOINT_COMPRESSION_ENABLED: bool = True
+    CHECKPOINT_COMPRESSION_LEVEL: int = constants.DEFAULT_CHECKPOINT_COMPRESSION_LEVEL
+    CHECKPOINT_COMPRESSION_THRESHOLD: int = constants.DEFAULT_CHECKPOINT_COMPRESSION_THRESHOLD
+    CHECKPOINT_KEEP_LATEST: int = constants.DEFAULT_CHECKPOINT_KEEP_LATEST
+    CHECKPOINT_REF_THRESHOLD: int = constants.DEFAULT_CHECKPOINT_REF_THRESHOLD
+    CHECKPOINT_RETENTION_ENABLED: bool = True
+    CHECKPOINT_SWEEP_INTERVAL: int = constants.DEFAULT_CHECKPOINT_SWEEP_INTERVAL
+    CHECKPOINT_TTL: int = constants.DEFAULT_CHECKPOINT_TTL
+    CHECKPOINT_TTLS: dict[str, int] = {}
     CLUSTERS: str | None = None
+    COMPACTION_ENABLED: bool = True
+    COMPACTION_KEEP_TOKENS: int = constants.DEFAULT_COMPACTION_KEEP_TOKENS
+    COMPACTION_MAX_TOKENS: int = constants.DEFAULT_COMPACTION_MAX_TOKENS
+    COMPACTION_STUB_AFTER_TURNS: int = constants.DEFAULT_COMPACTION_STUB_AFTER_TURNS
+    COMPACTION_STUB_MIN_CHARS: int = constants.DEFAULT_COMPACTION_STUB_MIN_CHARS
+    DEPLOYMENT_MODE: DeploymentMode = DeploymentMode.STANDALONE
+    DIGEST_ENABLED: bool = True
+    DIGEST_MAX_RAW_OUTPUTS: int = constants.DEFAULT_DIGEST_MAX_RAW_OUTPUTS
+    DIGEST_THRESHOLD: int = constants.DEFAULT_DIGEST_THRESHOLD
     DISCORD_BOT_TOKEN: str | None = None
+    DISPATCH_MAX_CONCURRENCY: int = constants.DEFAULT_DISPATCH_MAX_CONCURRENCY
+    DISPATCH_MAX_IN_FLIGHT: int = constants.DEFAULT_DISPATCH_MAX_IN_FLIGHT
+    EVALUATION_MODEL_NAME: str | None = None
     GOOGLE_API_KEY: str | None = None
+    LOG_INDEX_ENABLED: bool = True
+    LOG_INDEX_INLINE_CHARS: int = constants.DEFAULT_LOG_INDEX_INLINE_CHARS
+    LOG_INDEX_MAX_LINES: int = constants.DEFAULT_LOG_INDEX_MAX_LINES
+    LOG_INDEX_TTL: int = constants.DEFAULT_LOG_INDEX_TTL
+    LOG_FORMAT: LogFormat = constants.DEFAULT_LOG_FORMAT
     LOG_LEVEL: str = constants.DEFAULT_LOG_LEVEL
     LOG_TRUNCATE_LENGTH: int = constants.DEFAULT_LOG_TRUNCATE_LENGTH
+    LOOP_STALL_SECONDS: float = constants.DEFAULT_LOOP_STALL_SECONDS
+    LOOP_WATCHDOG_ENABLED: bool = True
     MAX_WAIT: int = constants.DEFAULT_MAX_WAIT
+    MESSAGE_ATTACHMENT_THRESHOLD: int = constants.DEFAULT_MESSAGE_ATTACHMENT_THRESHOLD
+    MCP_PING_INTERVAL: int = constants.DEFAULT_MCP_PING_INTERVAL
+    MCP_POOL_SIZE: int = constants.DEFAULT_MCP_POOL_SIZE
+    MODEL_BREAKER_COOLDOWN: int = constants.DEFAULT_MODEL_BREAKER_COOLDOWN
+    MODEL_BREAKER_ERROR_RATE: float = constants.DEFAULT_MODEL_BREAKER_ERROR_RATE
+    MODEL_HEALTH_WINDOW: int = constants.DEFAULT_MODEL_HEALTH_WINDOW
+    MODEL_HEDGE_DELAY: float = constants.DEFAULT_MODEL_HEDGE_DELAY
+    MODEL_HEDGE_MIN_DELAY: float = constants.DEFAULT_MODEL_HEDGE_MIN_DELAY
+    MODEL_HEDGING_ENABLED: bool = True
     MODEL_NAME: str = constants.DEFAULT_MODEL_NAME
     FALLBACK_MODEL_NAME: str = constants.DEFAULT_FALLBACK_MODEL_NAME
+    FANOUT_ENABLED: bool = True
+    FANOUT_MAX_CONCURRENCY_PER_SERVER: int = constants.DEFAULT_FANOUT_MAX_CONCURRENCY_PER_SERVER
+    FAST_PATH_ENABLED: bool = True
+    PROFILING_ENABLED: bool = False
+    QUESTION_LATENCY_BUDGET: int = constants.DEFAULT_QUESTION_LATENCY_BUDGET
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CHANNEL_BURST: int = constants.DEFAULT_RATE_LIMIT_CHANNEL_BURST
+    RATE_LIMIT_CHANNEL_PER_MINUTE: float = constants.DEFAULT_RATE_LIMIT_CHANNEL_PER_MINUTE
+    RATE_LIMIT_USER_BURST: int = constants.DEFAULT_RATE_LIMIT_USER_BURST
+    RATE_LIMIT_USER_PER_MINUTE: float = constants.DEFAULT_RATE_LIMIT_USER_PER_MINUTE
     RECURSION_LIMIT: int = constants.DEFAULT_RECURSION_LIMIT
     REDIS_URL: str | None = None
     REFLECTION_ITERATIONS: int = constants.DEFAULT_REFLECTION_ITERATIONS
+    SHARD_LEASE_TTL: int = constants.DEFAULT_SHARD_LEASE_TTL
+    SNAPSHOT_ENABLED: bool = False
+    SNAPSHOT_INTERVAL: int = constants.DEFAULT_SNAPSHOT_INTERVAL
+    SNAPSHOT_KINDS: list[str] = ["Pod", "Deployment"]
+    SNAPSHOT_MAX_CHANGES: int = constants.DEFAULT_SNAPSHOT_MAX_CHANGES
+    STREAMING_ENABLED: bool = True
+    STREAM_EDIT_INTERVAL: float = constants.DEFAULT_STREAM_EDIT_INTERVAL
+    TOKEN_QUOTA_PER_USER: int = constants.DEFAULT_TOKEN_QUOTA_PER_USER
+    TOKEN_QUOTA_WINDOW: int = constants.DEFAULT_TOKEN_QUOTA_WINDOW
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_DEFAULT_TTL: int = constants.DEFAULT_TOOL_CACHE_TTL
+    TOOL_CACHE_MAX_ENTRIES: int = constants.DEFAULT_TOOL_CACHE_MAX_ENTRIES
+    TOOL_CACHE_REDIS: bool = False
+    TOOL_CACHE_TTLS: dict[str, int] = {}
+    TRACING_BATCH_SIZE: int = constants.DEFAULT_TRACING_BATCH_SIZE
+    TRACING_BUFFER_SIZE: int = constants.DEFAULT_TRACING_BUFFER_SIZE
+    TRACING_EXPORTER: TraceExporter = TraceExporter.MLFLOW
+    TRACING_FILE: str = constants.DEFAULT_TRACING_FILE
+    TRACING_FLUSH_INTERVAL: int = constants.DEFAULT_TRACING_FLUSH_INTERVAL
+    TRACING_SAMPLE_RATE: float = constants.DEFAULT_TRACING_SAMPLE_RATE
+    TRACING_SLOW_SECONDS: int = constants.DEFAULT_TRACING_SLOW_SECONDS
+    TRIAGE_MAX_FINDINGS: int = constants.DEFAULT_TRIAGE_MAX_FINDINGS
+    TRIAGE_PROBE_TIMEOUT: int = constants.DEFAULT_TRIAGE_PROBE_TIMEOUT
     WHITELIST: str | None = None
+    WORKER_ID: str | None = None
+    WORKER_MODEL_NAME: str | None = None
+    WORK_SHARDS: int = constants.DEFAULT_WORK_SHARDS
     MLFLOW_TRACKING_URI: str = constants.DEFAULT_MLFLOW_TRACKING_URI
     MLFLOW_EXPERIMENT_NAME: str = constants.DEFAULT_MLFLOW_EXPERIMENT
 
@@ -32,7 +112,24 @@ class Settings(BaseSettings):
             raise ValueError(f"LOG_LEVEL must be one of {valid_levels}, got {v}")
         return v.upper()
 
-    @field_validator("AGENT_TIMEOUT", "MAX_WAIT")
+    @field_validator(
+        "AGENT_TIMEOUT",
+        "CHECKPOINT_SWEEP_INTERVAL",
+        "LOG_INDEX_TTL",
+        "LOOP_STALL_SECONDS",
+        "MAX_WAIT",
+        "MCP_PING_INTERVAL",
+        "MODEL_BREAKER_COOLDOWN",
+        "MODEL_HEDGE_DELAY",
+        "MODEL_HEDGE_MIN_DELAY",
+        "QUESTION_LATENCY_BUDGET",
+        "SHARD_LEASE_TTL",
+        "SNAPSHOT_INTERVAL",
+        "TOKEN_QUOTA_WINDOW",
+        "TRACING_FLUSH_INTERVAL",
+        "TRACING_SLOW_SECONDS",
+        "TRIAGE_PROBE_TIMEOUT",
+    )
     @classmethod
     def validate_positive_timeout(cls, v: int) -> int:
         """Validate that timeouts are positive"""
@@ -40,6 +137,116 @@ class Settings(BaseSettings):
             raise ValueError("Timeouts must be positive")
         return v
 
+    @field_validator(
+        "DISPATCH_MAX_CONCURRENCY",
+        "DISPATCH_MAX_IN_FLIGHT",
+        "FANOUT_MAX_CONCURRENCY_PER_SERVER",
+        "MCP_POOL_SIZE",
+        "WORK_SHARDS",
+    )
+    @classmethod
+    def validate_concurrency_limits(cls, v: int) -> int:
+        """Validate that concurrency limits are positive"""
+        if v <= 0:
+            raise ValueError("Concurrency limits must be positive")
+        return v
+
+    @field_validator(
+        "RATE_LIMIT_CHANNEL_BURST",
+        "RATE_LIMIT_CHANNEL_PER_MINUTE",
+        "RATE_LIMIT_USER_BURST",
+        "RATE_LIMIT_USER_PER_MINUTE",
+    )
+    @classmethod
+    def validate_rate_limits(cls, v: float) -> float:
+        """Validate that every bucket admits and refills at least something"""
+        if v <= 0:
+            raise ValueError("Rate limits must be positive")
+        return v
+
+    @field_validator("TOKEN_QUOTA_PER_USER")
+    @classmethod
+    def validate_token_quota(cls, v: int) -> int:
+        """Validate that the token quota is non-negative (0 disables it)"""
+        if v < 0:
+            raise ValueError("Token quota must not be negative")
+        return v
+
+    @field_validator("CHECKPOINT_TTL")
+    @classmethod
+    def validate_checkpoint_ttl(cls, v: int) -> int:
+        """Validate that the checkpoint TTL is non-negative (0 keeps checkpoints forever)"""
+        if v < 0:
+            raise ValueError("Checkpoint TTL must not be negative")
+        return v
+
+    @field_validator("CHECKPOINT_COMPRESSION_LEVEL")
+    @classmethod
+    def validate_compression_level(cls, v: int) -> int:
+        """Validate that the zstd level is within 1 to 22"""
+        if not 1 <= v <= constants.MAX_CHECKPOINT_COMPRESSION_LEVEL:
+            raise ValueError(f"Compression level must be between 1 and {constants.MAX_CHECKPOINT_COMPRESSION_LEVEL}")
+        return v
+
+    @field_validator("CHECKPOINT_COMPRESSION_THRESHOLD", "CHECKPOINT_REF_THRESHOLD")
+    @classmethod
+    def validate_checkpoint_thresholds(cls, v: int) -> int:
+        """Validate that checkpoint size thresholds are non-negative (0 disables references)"""
+        if v < 0:
+            raise ValueError("Checkpoint thresholds must not be negative")
+        return v
+
+    @field_validator("MODEL_BREAKER_ERROR_RATE")
+    @classmethod
+    def validate_breaker_error_rate(cls, v: float) -> float:
+        """Validate that the breaker error rate is a fraction in (0, 1]"""
+        if not 0 < v <= 1:
+            raise ValueError("Breaker error rate must be between 0 and 1")
+        return v
+
+    @field_validator("TRACING_SAMPLE_RATE")
+    @classmethod
+    def validate_sample_rate(cls, v: float) -> float:
+        """Validate that the trace sample rate is a fraction in [0, 1]"""
+        if not 0 <= v <= 1:
+            raise ValueError("Trace sample rate must be between 0 and 1")
+        return v
+
+    @field_validator(
+        "CHECKPOINT_KEEP_LATEST",
+        "LOG_INDEX_INLINE_CHARS",
+        "LOG_INDEX_MAX_LINES",
+        "LOG_TRUNCATE_LENGTH",
+        "MESSAGE_ATTACHMENT_THRESHOLD",
+        "MODEL_HEALTH_WINDOW",
+        "SNAPSHOT_MAX_CHANGES",
+        "TRACING_BATCH_SIZE",
+        "TRACING_BUFFER_SIZE",
+        "TRIAGE_MAX_FINDINGS",
+    )
+    @classmethod
+    def validate_result_limits(cls, v: int) -> int:
+        """Validate that result limits keep at least one item"""
+        if v <= 0:
+            raise ValueError("Result limits must be positive")
+        return v
+
+    @field_validator("TOOL_CACHE_MAX_ENTRIES")
+    @classmethod
+    def validate_tool_cache_size(cls, v: int) -> int:
+        """Validate that the tool cache can hold at least one entry"""
+        if v <= 0:
+            raise ValueError("Tool cache size must be positive")
+        return v
+
+    @field_validator("COMPACTION_KEEP_TOKENS", "COMPACTION_MAX_TOKENS", "COMPACTION_STUB_AFTER_TURNS")
+    @classmethod
+    def validate_compaction_limits(cls, v: int) -> int:
+        """Validate that compaction limits are positive"""
+        if v <= 0:
+            raise ValueError("Compaction limits must be positive")
+        return v
+
     @field_validator("RECURSION_LIMIT")
     @classmethod
     def validate_recursion_limit(cls, v: int) -> int:
@@ -56,6 +263,14 @@ class Settings(BaseSettings):
             raise ValueError("Reflection iterations must be between 0 and 10")
         return v
 
+    @property
+    def admin_user_ids(self) -> set[int]:
+        """Discord user ids allowed to run admin commands"""
+        if not self.ADMIN_USERS:
+            return set()
+
+        return {int(user_id) for user_id in self.ADMIN_USERS.split(",") if user_id.strip().isdigit()}
+
     @property
     def whitelisted_users(self) -> set[str]:
         """Parse and return the whitelist as a set of usernames for O(1) lookup"""
@@ -64,5 +279,22 @@ class Settings(BaseSettings):
 
         return {name.strip() for name in self.WHITELIST.split(",") if name.strip()}
 
+    @property
+    def cluster_contexts(self) -> dict[str, str]:
+        """Map each project in CLUSTERS to its GKE kubeconfig context name"""
+        if not self.CLUSTERS:
+            return {}
+
+        try:
+            clusters = json.loads(self.CLUSTERS)
+        except ValueError:
+            return {}
+
+        return {
+            project: f"gke_{project}_{config['region']}_{config['cluster']}"
+            for project, config in clusters.items()
+            if isinstance(config, dict) and {"region", "cluster"} <= config.keys()
+        }
+
 
 settings = Settings()
@@ -0,0 +1,253 @@
+import asyncio
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool
+from pydantic import BaseModel, Field
+
+from .clusters import discover_contexts
+from .constants import constants
+from .digest import render_rows
+from .fanout import ToolFanout
+from .logger import logger
+from .resources import ResourceRow, is_resource_record, parse_records, resource_row
+from .settings import settings
+
+ResourceKey = tuple[str, str]
+
+INDEXED_FIELDS = ("namespace", "owner", "status")
+
+
+@dataclass(frozen=True)
+class ResourceChange:
+    """A difference between two consecutive snapshots of one resource"""
+
+    at: float
+    context: str
+    kind: str
+    namespace: str
+    name: str
+    change: str
+    detail: str
+
+    def render(self, now: float) -> str:
+        ago = int(now - self.at)
+        return f"-{ago}s `{self.context}` {self.kind} {self.namespace}/{self.name}: {self.change} ({self.detail})"
+
+
+def diff_rows(
+    before: dict[ResourceKey, ResourceRow], after: dict[ResourceKey, ResourceRow]
+) -> list[tuple[ResourceRow, str, str]]:
+    """Created, removed, status-changed and restarted resources between two snapshots"""
+    changes = [(row, "removido", row.status) for key, row in before.items() if key not in after]
+
+    for key, row in after.items():
+        match before.get(key):
+            case None:
+                changes.append((row, "criado", row.status))
+            case previous if previous.status != row.status:
+                changes.append((row, "status", f"{previous.status} → {row.status}"))
+            case previous if row.restarts > previous.restarts:
+                changes.append((row, "restarts", f"+{row.restarts - previous.restarts}, total {row.restarts}"))
+            case _:
+                pass
+
+    return changes
+
+
+@dataclass
+class ResourceIndex:
+    """One snapshot of a kind in a context, indexed by namespace, owner and status"""
+
+    rows: dict[ResourceKey, ResourceRow]
+    taken_at: float
+    indexes: dict[str, dict[str, set[ResourceKey]]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for name in INDEXED_FIELDS:
+            index: dict[str, set[ResourceKey]] = defaultdict(set)
+
+            for key, row in self.rows.items():
+                index[getattr(row, name)].add(key)
+
+            self.indexes[name] = index
+
+    def query(self, min_restarts: int = 0, **filters: str | None) -> list[ResourceRow]:
+        """Rows matching every given indexed field, intersecting the smallest index sets first"""
+        matches = sorted(
+            (self.indexes[name].get(value, set()) for name, value in filters.items() if value),
+            key=len,
+        )
+        keys = set.intersection(*matches) if matches else self.rows.keys()
+
+        return [self.rows[key] for key in keys if self.rows[key].restarts >= min_restarts]
+
+
+class SnapshotQuery(BaseModel):
+    """Filters for the snapshot-resources tool"""
+
+    context: str | None = Field(default=None, description="Full context name; all contexts when omitted")
+    kind: str = Field(default="Pod", description='Resource kind, e.g. "Pod" or "Deployment"')
+    namespace: str | None = None
+    owner: str | None = Field(default=None, description="Owner reference name, e.g. a ReplicaSet or Job")
+    status: str | None = Field(default=None, description='Exact status, e.g. "CrashLoopBackOff"')
+    min_restarts: int = 0
+
+
+@dataclass
+class ClusterSnapshotter:
+    """Periodically snapshots resources of every context and keeps the changes between snapshots.
+
+    Refreshes go through the tool cache like any other call. The first snapshot of a context is the
+    baseline and records no changes; after that every refresh appends its diff to a bounded change log.
+    """
+
+    fanout: ToolFanout
+    kinds: tuple[str, ...]
+    interval: float
+    max_changes: int
+    snapshots: dict[tuple[str, str], ResourceIndex] = field(default_factory=dict)
+    changes: deque[ResourceChange] = field(init=False)
+    counters: Counter[str] = field(default_factory=Counter)
+    contexts: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.changes = deque(maxlen=self.max_changes)
+
+    async def snapshot(self, context: str, kind: str) -> None:
+        content = await self.fanout.invoke("list-k8s-resources", {"context": context, "kind": kind})
+        records = parse_records(content)
+
+        if records is None:
+            raise ValueError("unstructured output")
+
+        self.apply(context, kind, [resource_row(record) for record in records if is_resource_record(record)])
+
+    def apply(self, context: str, kind: str, rows: list[ResourceRow], now: float | None = None) -> None:
+        """Replace the snapshot of (context, kind) and log what changed since the previous one"""
+        now = time.time() if now is None else now
+        current = {(row.namespace, row.name): row for row in rows}
+
+        if (previous := self.snapshots.get((context, kind))) is not None:
+            for row, change, detail in diff_rows(previous.rows, current):
+                self.changes.append(ResourceChange(now, context, kind, row.namespace, row.name, change, detail))
+                self.counters["changes"] += 1
+
+        self.snapshots[context, kind] = ResourceIndex(current, now)
+
+    async def refresh(self) -> None:
+        """Snapshot every kind of every context concurrently"""
+        if not self.contexts:
+            self.contexts = await discover_contexts(self.fanout)
+
+        jobs = [(context, kind) for context in self.contexts for kind in self.kinds]
+        results = await asyncio.gather(*(self.snapshot(*job) for job in jobs), return_exceptions=True)
+
+        for (context, kind), result in zip(jobs, results, strict=True):
+            if isinstance(result, Exception):
+                self.counters["failed_snapshots"] += 1
+                logger.warning("Snapshot of %s in %s failed: %s", kind, context, result)
+
+        self.counters["refreshes"] += 1
+
+    async def run(self) -> None:
+        """Refresh every `interval` seconds until cancelled"""
+        while True:
+            started = time.perf_counter()
+
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Cluster snapshot refresh failed: %s", e)
+
+            logger.debug("Cluster snapshot refreshed in %.2fs", time.perf_counter() - started)
+            await asyncio.sleep(self.interval)
+
+    def recent_changes(
+        self,
+        minutes: int,
+        context: str | None = None,
+        namespace: str | None = None,
+        now: float | None = None,
+    ) -> list[ResourceChange]:
+        since = (time.time() if now is None else now) - minutes * 60
+        return [
+            change
+            for change in self.changes
+            if change.at >= since
+            and (not context or change.context == context)
+            and (not namespace or change.namespace == namespace)
+        ]
+
+    def render_changes(self, minutes: int = 10, context: str | None = None, namespace: str | None = None) -> str:
+        if not self.snapshots:
+            return "Nenhum snapshot disponível ainda; use as ferramentas MCP."
+
+        now = time.time()
+        changes = self.recent_changes(minutes, context, namespace, now)
+
+        if not changes:
+            return f"Nenhuma mudança nos últimos {minutes} minutos (snapshots a cada {self.interval:.0f}s)."
+
+        shown = changes[-constants.SNAPSHOT_MAX_ROWS :]
+        lines = [f"[{len(changes)} mudanças nos últimos {minutes} minutos, mais recentes por último]"]
+        lines.extend(change.render(now) for change in shown)
+
+        return "\n".join(lines)
+
+    def render_resources(self, query: SnapshotQuery) -> str:
+        indexes = [
+            (context, index)
+            for (context, kind), index in self.snapshots.items()
+            if kind == query.kind and (not query.context or context == query.context)
+        ]
+
+        if not indexes:
+            return f"Nenhum snapshot de {query.kind} para {query.context or 'nenhum contexto'}; use as ferramentas MCP."
+
+        sections = []
+
+        for context, index in indexes:
+            rows = index.query(query.min_restarts, namespace=query.namespace, owner=query.owner, status=query.status)
+            age = int(time.time() - index.taken_at)
+            table = render_rows(rows, constants.SNAPSHOT_MAX_ROWS)
+            sections.append(f"## {context} (snapshot de {age}s atrás)\n{table}")
+
+        return "\n\n".join(sections)
+
+    def tools(self) -> list[BaseTool]:
+        async def snapshot_changes(minutes: int = 10, context: str | None = None, namespace: str | None = None) -> str:
+            """Resources created, removed, restarted or with a new status in the last `minutes`, from background
+            snapshots. Answers "what changed recently" without calling the cluster."""
+            return self.render_changes(minutes, context, namespace)
+
+        async def snapshot_resources(**query: Any) -> str:
+            return self.render_resources(SnapshotQuery(**query))
+
+        return [
+            StructuredTool.from_function(coroutine=snapshot_changes, name="snapshot-changes"),
+            StructuredTool.from_function(
+                coroutine=snapshot_resources,
+                name="snapshot-resources",
+                description=(
+                    "Query the latest background snapshot of a kind by namespace, owner, exact status and minimum "
+                    "restarts. Faster than list-k8s-resources but up to one refresh interval old."
+                ),
+                args_schema=SnapshotQuery,
+            ),
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counters, "snapshots": len(self.snapshots), "changes_kept": len(self.changes)}
+
+
+def create_snapshotter(tools: list[BaseTool]) -> ClusterSnapshotter:
+    """Build the background snapshotter from settings"""
+    return ClusterSnapshotter(
+        fanout=ToolFanout(tools, settings.FANOUT_MAX_CONCURRENCY_PER_SERVER),
+        kinds=tuple(settings.SNAPSHOT_KINDS),
+        interval=settings.SNAPSHOT_INTERVAL,
+        max_changes=settings.SNAPSHOT_MAX_CHANGES,
+    )
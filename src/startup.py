@@ -0,0 +1,43 @@
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from .logger import logger
+
+T = TypeVar("T")
+
+
+@dataclass
+class StartupTimings:
+    """Wall time of each startup step, plus time since process start for milestones"""
+
+    started: float = field(default_factory=time.perf_counter)
+    steps: dict[str, float] = field(default_factory=dict)
+    milestones: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    @contextmanager
+    def measure(self, step: str) -> Iterator[None]:
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[step] = time.perf_counter() - begin
+
+    async def run(self, step: str, awaitable: Awaitable[T]) -> T:
+        with self.measure(step):
+            return await awaitable
+
+    def mark(self, milestone: str) -> None:
+        """Record a milestone once, as seconds since process start"""
+        self.milestones.setdefault(milestone, time.perf_counter() - self.started)
+
+    def log(self) -> None:
+        breakdown = ", ".join(f"{step}={seconds:.2f}s" for step, seconds in self.steps.items())
+        milestones = ", ".join(f"{name}@{seconds:.2f}s" for name, seconds in self.milestones.items())
+        logger.info("Startup timings: %s | %s", breakdown, milestones)
+
+    def stats(self) -> dict[str, Any]:
+        return {"steps": dict(self.steps), "milestones": dict(self.milestones), "error": self.error}
@@ -0,0 +1,32 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+ToolOutput = tuple[Any, Any]
+ToolCall = Callable[[dict[str, Any]], Awaitable[ToolOutput]]
+
+
+async def call_tool(tool: BaseTool, arguments: dict[str, Any]) -> ToolOutput:
+    """Invoke the tool implementation directly and return its (content, artifact) pair"""
+    match tool:
+        case StructuredTool(coroutine=coroutine, response_format="content_and_artifact") if coroutine is not None:
+            return await coroutine(**arguments)
+        case _:
+            return await tool.ainvoke(arguments), None
+
+
+def derive_tool(tool: BaseTool, call: ToolCall) -> StructuredTool:
+    """Create a tool with the same name, description and schema that runs `call` instead"""
+
+    async def coroutine(**arguments: Any) -> ToolOutput:
+        return await call(arguments)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema if tool.args_schema is not None else tool.get_input_schema(),
+        coroutine=coroutine,
+        response_format="content_and_artifact",
+        metadata=tool.metadata,
+    )
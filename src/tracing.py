@@ -0,0 +1,413 @@
+import asyncio
+import importlib
+import json
+import random
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Protocol, override
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from .constants import TraceExporter, constants
+from .logger import logger
+from .settings import settings
+
+HIDDEN_TAG = "langsmith:hidden"
+
+
+def clip(value: Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text[: constants.TRACE_PAYLOAD_CLIP]
+
+
+@dataclass
+class Span:
+    span_id: str
+    parent_id: str | None
+    name: str
+    kind: str
+    start_ns: int
+    end_ns: int = 0
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """One question: its spans are recorded for every question, and kept only if the trace is worth exporting"""
+
+    thread_id: str
+    question: str
+    sampled: bool
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    error: bool = False
+    dropped_spans: int = 0
+    spans: dict[str, Span] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def keep_reason(self, slow_seconds: float) -> str | None:
+        """Why the trace is exported: errors and slow questions always are, the rest only when sampled"""
+        if self.error:
+            return "error"
+        if self.duration >= slow_seconds:
+            return "slow"
+        if self.sampled:
+            return "sampled"
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "thread_id": self.thread_id,
+            "question": clip(self.question),
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "error": self.error,
+            "dropped_spans": self.dropped_spans,
+            "spans": [asdict(span) for span in self.spans.values()],
+        }
+
+
+class TraceRecorder(AsyncCallbackHandler):
+    """Records chain, model and tool runs of the active question as spans, without payloads or token events.
+
+    Runs LangGraph marks as hidden (channel writes, routing) get no span; their children hang from the
+    nearest recorded ancestor.
+    """
+
+    def __init__(self, trace: Trace, max_spans: int) -> None:
+        self.trace = trace
+        self.max_spans = max_spans
+        self.parents: dict[str, str | None] = {}
+
+    def visible_parent(self, parent_run_id: UUID | None) -> str | None:
+        parent = str(parent_run_id) if parent_run_id else None
+
+        while parent is not None and parent not in self.trace.spans:
+            parent = self.parents.get(parent)
+
+        return parent
+
+    def start(
+        self,
+        kind: str,
+        name: str,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        tags: list[str] | None,
+        **attributes: Any,
+    ) -> None:
+        span_id = str(run_id)
+        self.parents[span_id] = str(parent_run_id) if parent_run_id else None
+
+        if HIDDEN_TAG in (tags or []):
+            return
+
+        if len(self.trace.spans) >= self.max_spans:
+            self.trace.dropped_spans += 1
+            return
+
+        self.trace.spans[span_id] = Span(
+            span_id=span_id,
+            parent_id=self.visible_parent(parent_run_id),
+            name=name,
+            kind=kind,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+
+    def end(self, run_id: UUID, error: BaseException | None = None, **attributes: Any) -> None:
+        if (span := self.trace.spans.get(str(run_id))) is None:
+            return
+
+        span.end_ns = time.time_ns()
+        span.attributes.update(attributes)
+
+        if error is not None:
+            span.error = clip(error)
+            self.trace.error = True
+
+    @override
+    async def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        tags: list[str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        self.start("CHAIN", name, run_id, parent_run_id, tags)
+
+    @override
+    async def on_chain_end(self, outputs: dict[str, Any], *, run_id: UUID, **kwargs: Any) -> None:
+        self.end(run_id)
+
+    @override
+    async def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.end(run_id, error)
+
+    @override
+    async def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        model = str((metadata or {}).get("ls_model_name", "unknown"))
+        self.start("CHAT_MODEL", model, run_id, parent_run_id, tags, messages=sum(map(len, messages)))
+
+    @override
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        attributes: dict[str, Any] = {}
+
+        for generations in response.generations:
+            for generation in generations:
+                match generation:
+                    case ChatGeneration(message=AIMessage(usage_metadata=dict(usage)) as message):
+                        attributes["usage"] = dict(usage)
+                        attributes["model"] = message.response_metadata.get("model_name")
+                    case _:
+                        pass
+
+        self.end(run_id, **attributes)
+
+    @override
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.end(run_id, error)
+
+    @override
+    async def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        tags: list[str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self.start("TOOL", name, run_id, parent_run_id, tags, input=clip(input_str))
+
+    @override
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.end(run_id, output=clip(getattr(output, "content", output)))
+
+    @override
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.end(run_id, error)
+
+
+trace_recorder_var: ContextVar[TraceRecorder | None] = ContextVar("trace_recorder", default=None)
+register_configure_hook(trace_recorder_var, inheritable=True)
+
+
+class TraceSink(Protocol):
+    def setup(self) -> None: ...
+
+    def export(self, traces: list[Trace]) -> None: ...
+
+
+@dataclass
+class NullSink:
+    """Sink for TRACING_EXPORTER=none, where recording is disabled altogether"""
+
+    def setup(self) -> None:
+        pass
+
+    def export(self, traces: list[Trace]) -> None:
+        pass
+
+
+@dataclass
+class FileSink:
+    """Appends traces as JSON lines to a local file, for tests and offline debugging"""
+
+    path: Path
+
+    def setup(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, traces: list[Trace]) -> None:
+        with self.path.open("a", encoding="utf-8") as file:
+            for trace in traces:
+                file.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+
+
+@dataclass
+class MlflowSink:
+    """Replays recorded spans into MLflow with their original timestamps"""
+
+    tracking_uri: str
+    experiment: str
+    mlflow: Any = None
+
+    def setup(self) -> None:
+        """Import mlflow and point it at the tracking server; slow, so it runs in a thread"""
+        self.mlflow = importlib.import_module("mlflow")
+        self.mlflow.set_tracking_uri(self.tracking_uri)
+        self.mlflow.set_experiment(self.experiment)
+
+    def export(self, traces: list[Trace]) -> None:
+        for trace in traces:
+            root = self.mlflow.start_span_no_context(
+                name="question",
+                span_type="AGENT",
+                inputs={"question": trace.question},
+                attributes={"thread_id": trace.thread_id, "dropped_spans": trace.dropped_spans},
+                start_time_ns=trace.start_ns,
+            )
+            live: dict[str, Any] = {}
+
+            for span in sorted(trace.spans.values(), key=lambda span: span.start_ns):
+                live[span.span_id] = self.mlflow.start_span_no_context(
+                    name=span.name,
+                    span_type=span.kind,
+                    parent_span=live.get(span.parent_id, root) if span.parent_id else root,
+                    attributes=span.attributes,
+                    start_time_ns=span.start_ns,
+                )
+
+            for span in sorted(trace.spans.values(), key=lambda span: span.start_ns, reverse=True):
+                live[span.span_id].end(
+                    status="ERROR" if span.error else "OK",
+                    attributes={"error": span.error} if span.error else None,
+                    end_time_ns=span.end_ns or trace.end_ns,
+                )
+
+            root.end(status="ERROR" if trace.error else "OK", end_time_ns=trace.end_ns)
+
+
+@dataclass
+class Tracer:
+    """Head-sampled question tracing with a bounded buffer and batched background export.
+
+    Every question records lightweight spans in memory. When it finishes, the trace is kept if it was
+    sampled, failed, or was slow, and handed to a bounded buffer. A full buffer drops the trace, so
+    questions never wait on the tracing backend.
+    """
+
+    sink: TraceSink
+    sample_rate: float
+    slow_seconds: float
+    batch_size: int
+    flush_interval: float
+    buffer_size: int
+    max_spans: int = constants.TRACE_MAX_SPANS
+    enabled: bool = True
+    buffer: asyncio.Queue[Trace] = field(init=False)
+    counters: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self.buffer = asyncio.Queue(maxsize=self.buffer_size)
+
+    @contextmanager
+    def trace(self, thread_id: str, question: str) -> Iterator[Trace | None]:
+        """Record the question answered inside the block"""
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace(thread_id, question, sampled=random.random() < self.sample_rate)
+        token = trace_recorder_var.set(TraceRecorder(trace, self.max_spans))
+
+        try:
+            yield trace
+        except BaseException:
+            trace.error = True
+            raise
+        finally:
+            trace_recorder_var.reset(token)
+            trace.end_ns = time.time_ns()
+            self.finish(trace)
+
+    def finish(self, trace: Trace) -> None:
+        reason = trace.keep_reason(self.slow_seconds)
+        self.counters[reason or "discarded"] += 1
+
+        if reason is None:
+            return
+
+        try:
+            self.buffer.put_nowait(trace)
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+
+    async def next_batch(self) -> list[Trace]:
+        """Wait for one trace, then gather more until the batch is full or the flush interval ends"""
+        batch = [await self.buffer.get()]
+
+        try:
+            async with asyncio.timeout(self.flush_interval):
+                while len(batch) < self.batch_size:
+                    batch.append(await self.buffer.get())
+        except TimeoutError:
+            pass
+
+        return batch
+
+    async def run(self) -> None:
+        """Set up the sink off the event loop, then export batches in the background forever"""
+        if not self.enabled:
+            return
+
+        try:
+            await asyncio.to_thread(self.sink.setup)
+        except Exception as e:
+            logger.warning("Tracing disabled: %s", e)
+            self.enabled = False
+            return
+
+        while True:
+            batch = await self.next_batch()
+
+            try:
+                await asyncio.to_thread(self.sink.export, batch)
+                self.counters["exported"] += len(batch)
+            except Exception as e:
+                self.counters["export_errors"] += 1
+                logger.warning("Failed to export %d traces: %s", len(batch), e)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counters, "buffered": self.buffer.qsize(), "enabled": self.enabled}
+
+
+def create_tracer() -> Tracer:
+    """Build the tracer from settings; TRACING_EXPORTER=none disables recording entirely"""
+    match settings.TRACING_EXPORTER:
+        case TraceExporter.MLFLOW:
+            sink: TraceSink = MlflowSink(settings.MLFLOW_TRACKING_URI, settings.MLFLOW_EXPERIMENT_NAME)
+        case TraceExporter.FILE:
+            sink = FileSink(Path(settings.TRACING_FILE))
+        case TraceExporter.NONE:
+            sink = NullSink()
+
+    return Tracer(
+        sink=sink,
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+        slow_seconds=settings.TRACING_SLOW_SECONDS,
+        batch_size=settings.TRACING_BATCH_SIZE,
+        flush_interval=settings.TRACING_FLUSH_INTERVAL,
+        buffer_size=settings.TRACING_BUFFER_SIZE,
+        enabled=settings.TRACING_EXPORTER != TraceExporter.NONE,
+    )
@@ -0,0 +1,323 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.tools import BaseTool
+
+from .clusters import discover_contexts
+from .constants import constants
+from .fanout import ToolFanout
+from .llm import get_shared_model, llm_metrics
+from .logger import logger
+from .resources import is_resource_record, parse_records, resource_row
+from .settings import settings
+from .templates import load_prompt_text
+
+# Probes run against every context: (tool, extra arguments)
+PROBES: tuple[tuple[str, dict[str, Any]], ...] = (
+    ("list-k8s-resources", {"kind": "Pod"}),
+    ("list-k8s-events", {}),
+    ("list-k8s-nodes", {}),
+)
+
+POD_SEVERITY: dict[str, int] = {
+    "CrashLoopBackOff": 90,
+    "OOMKilled": 85,
+    "Error": 80,
+    "ImagePullBackOff": 70,
+    "ErrImagePull": 70,
+    "CreateContainerConfigError": 70,
+    "Failed": 60,
+    "Evicted": 50,
+    "Pending": 40,
+    "ContainerCreating": 20,
+}
+
+EVENT_SEVERITY: dict[str, int] = {
+    "NodeNotReady": 80,
+    "OOMKilling": 80,
+    "Evicted": 60,
+    "FailedScheduling": 60,
+    "BackOff": 50,
+    "FailedMount": 50,
+    "Unhealthy": 40,
+}
+
+NODE_PRESSURE_CONDITIONS = frozenset({"MemoryPressure", "DiskPressure", "PIDPressure"})
+
+DEFAULT_POD_SEVERITY = 30
+DEFAULT_EVENT_SEVERITY = 20
+NODE_NOT_READY_SEVERITY = 100
+NODE_PRESSURE_SEVERITY = 75
+PROBE_FAILURE_SEVERITY = 65
+MAX_COUNT_BONUS = 30
+
+
+@dataclass(frozen=True)
+class Finding:
+    """One ranked problem found by a probe"""
+
+    context: str
+    kind: str
+    subject: str
+    detail: str
+    score: int
+
+    def render(self) -> str:
+        return f"`{self.context}` **{self.kind} {self.subject}**: {self.detail}"
+
+
+def pod_findings(context: str, records: list[dict[str, Any]]) -> list[Finding]:
+    """Pods outside the healthy statuses, or healthy but restarting often"""
+    findings = []
+
+    for record in filter(is_resource_record, records):
+        row = resource_row(record)
+        healthy = row.status in constants.HEALTHY_STATUSES
+
+        if healthy and row.restarts < constants.TRIAGE_RESTART_THRESHOLD:
+            continue
+
+        severity = 0 if healthy else POD_SEVERITY.get(row.status, DEFAULT_POD_SEVERITY)
+        detail = f"{row.status}, {row.restarts} restarts" if row.restarts else row.status
+        findings.append(
+            Finding(
+                context=context,
+                kind="pod",
+                subject=f"{row.namespace}/{row.name}",
+                detail=detail,
+                score=severity + min(row.restarts, MAX_COUNT_BONUS),
+            )
+        )
+
+    return findings
+
+
+def event_subject(record: dict[str, Any]) -> str:
+    match record.get("involvedObject") or record.get("regarding"):
+        case {"kind": str(kind), "name": str(name)}:
+            return f"{kind}/{name}"
+        case _:
+            return str(record.get("object") or record.get("name") or "-")
+
+
+def event_count(record: dict[str, Any]) -> int:
+    match record.get("count"):
+        case int(count) if count > 0:
+            return count
+        case str(count) if count.isdigit():
+            return int(count)
+        case _:
+            return 1
+
+
+def event_findings(context: str, records: list[dict[str, Any]]) -> list[Finding]:
+    """Warning events grouped by reason and object; Kubernetes keeps events for about an hour, so all are recent"""
+    counts: Counter[tuple[str, str]] = Counter()
+    messages: dict[tuple[str, str], str] = {}
+
+    for record in records:
+        if record.get("type") != "Warning":
+            continue
+
+        key = (str(record.get("reason", "Unknown")), event_subject(record))
+        counts[key] += event_count(record)
+        messages.setdefault(key, str(record.get("message", "")).strip())
+
+    return [
+        Finding(
+            context=context,
+            kind="evento",
+            subject=f"{reason} {subject}",
+            detail=f"{count}x {messages[reason, subject][: constants.TRIAGE_DETAIL_CLIP]}".rstrip(),
+            score=EVENT_SEVERITY.get(reason, DEFAULT_EVENT_SEVERITY) + min(count, MAX_COUNT_BONUS),
+        )
+        for (reason, subject), count in counts.items()
+    ]
+
+
+def node_problems(record: dict[str, Any]) -> list[tuple[str, int]]:
+    """NotReady and pressure conditions of a raw or pre-flattened node"""
+    status = record.get("status")
+
+    if isinstance(status, str):
+        return [(status, NODE_NOT_READY_SEVERITY)] if "NotReady" in status or "Unknown" in status else []
+
+    conditions = status.get("conditions", []) if isinstance(status, dict) else []
+    problems = []
+
+    for condition in conditions:
+        match condition:
+            case {"type": "Ready", "status": str(ready)} if ready != "True":
+                problems.append(("NotReady", NODE_NOT_READY_SEVERITY))
+            case {"type": str(kind), "status": "True"} if kind in NODE_PRESSURE_CONDITIONS:
+                problems.append((kind, NODE_PRESSURE_SEVERITY))
+            case _:
+                pass
+
+    return problems
+
+
+def node_findings(context: str, records: list[dict[str, Any]]) -> list[Finding]:
+    findings = []
+
+    for record in filter(is_resource_record, records):
+        if problems := node_problems(record):
+            findings.append(
+                Finding(
+                    context=context,
+                    kind="node",
+                    subject=resource_row(record).name,
+                    detail=", ".join(problem for problem, _ in problems),
+                    score=max(score for _, score in problems),
+                )
+            )
+
+    return findings
+
+
+FINDING_PARSERS = {
+    "list-k8s-resources": pod_findings,
+    "list-k8s-events": event_findings,
+    "list-k8s-nodes": node_findings,
+}
+
+
+def rank_findings(findings: list[Finding]) -> list[Finding]:
+    return sorted(findings, key=lambda finding: (-finding.score, finding.context, finding.subject))
+
+
+@dataclass
+class TriageReport:
+    contexts: list[str]
+    findings: list[Finding]
+    elapsed: float
+    probes: int
+    failed_probes: int
+
+    def render(self, max_rows: int) -> str:
+        """Ranked markdown report: per-context totals, then the top findings"""
+        header = (
+            f"🩺 **Triagem de {len(self.contexts)} contexto(s)** — {self.probes} sondagens em {self.elapsed:.1f}s"
+            + (f" ({self.failed_probes} falharam)" if self.failed_probes else "")
+        )
+
+        if not self.findings:
+            return f"{header}\n\n✅ Nenhum problema encontrado."
+
+        per_context = Counter(finding.context for finding in self.findings)
+        totals = "\n".join(f"- `{context}`: {per_context[context]} achado(s)" for context in self.contexts)
+        rows = "\n".join(
+            f"{rank}. {finding.render()}" for rank, finding in enumerate(self.findings[:max_rows], start=1)
+        )
+        hidden = len(self.findings) - max_rows
+        more = f"\n_… e mais {hidden} achado(s)_" if hidden > 0 else ""
+
+        return f"{header}\n\n{totals}\n\n**Principais achados:**\n{rows}{more}"
+
+
+@dataclass
+class ClusterTriage:
+    """Runs a fixed set of health probes against every context at once and ranks what they find.
+
+    Probes go straight to the MCP tools (through the tool cache, before digestion) so the raw JSON can be
+    scored without the model; the LLM only writes a short summary of the top findings.
+    """
+
+    fanout: ToolFanout
+    model: Runnable[LanguageModelInput, BaseMessage]
+    probe_timeout: float
+    max_findings: int
+    summary_prompt: str = field(default_factory=lambda: load_prompt_text("triage-summary.md"))
+    counters: Counter[str] = field(default_factory=Counter)
+    last_elapsed: float = 0.0
+
+    async def probe(self, context: str, tool_name: str, arguments: dict[str, Any]) -> list[Finding] | None:
+        """Run one probe; None when it failed or timed out"""
+        try:
+            async with asyncio.timeout(self.probe_timeout):
+                content = await self.fanout.invoke(tool_name, {"context": context, **arguments})
+        except Exception as e:
+            logger.warning("Triage probe %s on %s failed: %s", tool_name, context, e)
+            return None
+
+        records = parse_records(content)
+
+        if records is None:
+            logger.warning("Triage probe %s on %s returned unstructured output", tool_name, context)
+            return None
+
+        return FINDING_PARSERS[tool_name](context, records)
+
+    async def run(self, contexts: list[str] | None = None) -> TriageReport:
+        started = time.perf_counter()
+        contexts = contexts or await discover_contexts(self.fanout)
+        jobs = [(context, tool_name, arguments) for context in contexts for tool_name, arguments in PROBES]
+        results = await asyncio.gather(*(self.probe(*job) for job in jobs))
+
+        findings = [finding for result in results if result for finding in result]
+        findings.extend(
+            Finding(context=context, kind="sondagem", subject=tool_name, detail="falhou", score=PROBE_FAILURE_SEVERITY)
+            for (context, tool_name, _), result in zip(jobs, results, strict=True)
+            if result is None
+        )
+
+        self.last_elapsed = time.perf_counter() - started
+        self.counters["runs"] += 1
+        self.counters["probes"] += len(jobs)
+        self.counters["failed_probes"] += results.count(None)
+
+        logger.info(
+            "Triage of %d contexts: %d findings from %d probes in %.2fs",
+            len(contexts),
+            len(findings),
+            len(jobs),
+            self.last_elapsed,
+        )
+
+        return TriageReport(contexts, rank_findings(findings), self.last_elapsed, len(jobs), results.count(None))
+
+    async def summarize(self, report: TriageReport) -> str | None:
+        """Short LLM summary of the top findings; None when there is nothing to summarize or the model fails"""
+        if not report.findings:
+            return None
+
+        top = "\n".join(finding.render() for finding in report.findings[: self.max_findings])
+
+        try:
+            response = await self.model.ainvoke(
+                [SystemMessage(content=self.summary_prompt), HumanMessage(content=top)],
+                config=RunnableConfig(callbacks=[llm_metrics]),
+            )
+        except Exception as e:
+            logger.warning("Triage summary failed: %s", e)
+            return None
+
+        return response.text()
+
+    async def answer(self, contexts: list[str] | None = None) -> str:
+        report = await self.run(contexts)
+        rendered = report.render(constants.TRIAGE_REPORT_ROWS)
+
+        if summary := await self.summarize(report):
+            return f"{summary}\n\n{rendered}"
+
+        return rendered
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counters, "last_seconds": round(self.last_elapsed, 3)}
+
+
+def create_cluster_triage(tools: list[BaseTool]) -> ClusterTriage:
+    """Build the triage runner from settings"""
+    return ClusterTriage(
+        fanout=ToolFanout(tools, settings.FANOUT_MAX_CONCURRENCY_PER_SERVER),
+        model=get_shared_model(),
+        probe_timeout=settings.TRIAGE_PROBE_TIMEOUT,
+        max_findings=settings.TRIAGE_MAX_FINDINGS,
+    )
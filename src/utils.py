@@ -1,16 +1,75 @@
-def split_content(content: str, max_length: int) -> list[str]:
+import re
+import unicodedata
+from collections.abc import Iterator
+
+FENCE = "```"
+FENCE_LINE = re.compile(r"^[ \t]*```([\w+-]*)[ \t]*$", re.MULTILINE)
+MAX_FENCE_LANGUAGE = 20
+
+
+def split_content(content: str, max_length: int) -> Iterator[str]:
     """
-    Split text into chunks at word boundaries (assumes content > max_length)
+    Yield chunks of at most `max_length` characters, breaking at a late newline, then a space, then anywhere
 
-    If no space found, split at `max_length`
+    Code fences open at a break are closed at the end of the chunk and reopened (with their language, clipped to
+    MAX_FENCE_LANGUAGE) at the start of the next one. Only lines holding nothing but a fence count, so inline
+    triple backticks never toggle it. Whitespace runs at a break are skipped (keeping the indentation of the next
+    line) and blank chunks are never yielded. Works by index over `content`, so each character is copied once.
     """
-    split_point = content.rfind(" ", 0, max_length)
-    split_point = max_length if split_point == -1 else split_point
+    fences = [(match.start(), FENCE + match.group(1)[:MAX_FENCE_LANGUAGE]) for match in FENCE_LINE.finditer(content)]
+    next_fence = 0
+    open_fence = ""
+    start = 0
+
+    while start < len(content):
+        prefix = f"{open_fence}\n" if open_fence else ""
+
+        if len(content) - start + len(prefix) <= max_length:
+            if content[start:].strip():
+                yield prefix + content[start:]
+            return
+
+        fence_ahead = next_fence < len(fences) and fences[next_fence][0] < start + max_length
+        reserve = len(FENCE) + 1 if open_fence or fence_ahead else 0
+        end = start + max(max_length - len(prefix) - reserve, 1)
+        cut = content.rfind("\n", (start + end) // 2, end)
+
+        if cut == -1:
+            cut = content.rfind(" ", start + 1, end)
+
+        if cut == -1:
+            cut = end
+
+        while next_fence < len(fences) and fences[next_fence][0] < cut:
+            open_fence = "" if open_fence else fences[next_fence][1]
+            next_fence += 1
+
+        if content[start:cut].strip():
+            suffix = f"\n{FENCE}" if open_fence else ""
+            yield prefix + content[start:cut].rstrip() + suffix
+
+        run_end = cut
+        while run_end < len(content) and content[run_end].isspace():
+            run_end += 1
+
+        line_start = content.rfind("\n", cut, run_end)
+        start = line_start + 1 if line_start != -1 else run_end
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    return " ".join(re.sub(r"[^\w\s-]", " ", without_accents).split())
+
 
-    chunk = content[:split_point]
-    remaining = content[split_point:].lstrip()
+def parse_flags(question: str) -> tuple[str, set[str]]:
+    """Split leading `--flag` tokens from a question"""
+    words = question.split()
+    flags = set()
 
-    if len(remaining) <= max_length:
-        return [chunk, remaining] if remaining else [chunk]
+    while words and words[0].startswith("--"):
+        flags.add(words.pop(0).lower())
 
-    return [chunk, *split_content(remaining, max_length)]
+    return " ".join(words), flags
@@ -0,0 +1,277 @@
+import asyncio
+import contextlib
+import math
+import socket
+import time
+import zlib
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from redis.typing import EncodableT, FieldT
+
+from .constants import constants
+from .logger import logger
+from .settings import settings
+
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """A validated question handed from the gateway to a worker replica"""
+
+    channel_id: int
+    thread_id: str
+    question: str
+    user_id: int = 0
+
+    def to_fields(self) -> dict[FieldT, EncodableT]:
+        return {key: str(value) for key, value in asdict(self).items()}
+
+    @classmethod
+    def from_fields(cls, fields: dict[str, str]) -> "WorkItem":
+        return cls(
+            channel_id=int(fields["channel_id"]),
+            thread_id=fields["thread_id"],
+            question=fields["question"],
+            user_id=int(fields.get("user_id", 0)),
+        )
+
+
+WorkHandler = Callable[[WorkItem], Awaitable[None]]
+
+
+def shard_for(thread_id: str, shards: int) -> int:
+    """Stable shard of a thread, so every question of a channel lands on the same ordered stream"""
+    return zlib.crc32(thread_id.encode()) % shards
+
+
+@dataclass
+class WorkQueue:
+    """Redis streams sharded by thread_id; one stream per shard keeps per-channel order"""
+
+    redis: Redis
+    shards: int
+    prefix: str = constants.WORK_STREAM_PREFIX
+
+    def stream(self, shard: int) -> str:
+        return f"{self.prefix}:{shard}"
+
+    async def publish(self, item: WorkItem) -> str:
+        """Append a work item to its thread's shard stream"""
+        return await self.redis.xadd(
+            self.stream(shard_for(item.thread_id, self.shards)),
+            item.to_fields(),
+            maxlen=constants.WORK_STREAM_MAXLEN,
+            approximate=True,
+        )
+
+
+@dataclass
+class ShardWorker:
+    """Claims shards with Redis leases and consumes each owned shard's stream in order.
+
+    Live workers announce themselves in a sorted set and each one holds at most ceil(shards / workers)
+    leases, so shards spread out as replicas join and are picked up again when a replica dies. A shard is
+    always read through the same consumer name, which lets a new owner resume the entries its previous
+    owner read but never acknowledged. Shards handed back to rebalance finish their current item first.
+    A lease that merely expired is taken back, while a shard whose lease another worker now holds is
+    cancelled at once so two workers never answer the same question.
+    """
+
+    queue: WorkQueue
+    handler: WorkHandler
+    worker_id: str
+    lease_ttl: float
+    max_concurrency: int
+    owned: dict[int, asyncio.Task] = field(default_factory=dict)
+    stopping: set[int] = field(default_factory=set)
+    processed: int = 0
+    failed: int = 0
+
+    def __post_init__(self) -> None:
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self.renew_lease = self.queue.redis.register_script(RENEW_LEASE_SCRIPT)
+        self.release_lease = self.queue.redis.register_script(RELEASE_LEASE_SCRIPT)
+
+    @property
+    def redis(self) -> Redis:
+        return self.queue.redis
+
+    @property
+    def members_key(self) -> str:
+        return f"{self.queue.prefix}:workers"
+
+    def lease_key(self, shard: int) -> str:
+        return f"{self.queue.prefix}:lease:{shard}"
+
+    async def ensure_groups(self) -> None:
+        for shard in range(self.queue.shards):
+            stream = self.queue.stream(shard)
+
+            try:
+                await self.redis.xgroup_create(stream, constants.WORK_STREAM_GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def target_shards(self) -> int:
+        """Heartbeat this worker and compute its fair share of shards"""
+        now = time.time()
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.members_key, {self.worker_id: now})
+            pipe.zremrangebyscore(self.members_key, 0, now - self.lease_ttl)
+            pipe.zcard(self.members_key)
+            *_, alive = await pipe.execute()
+
+        return math.ceil(self.queue.shards / max(alive, 1))
+
+    async def rebalance(self) -> None:
+        """Renew owned leases, hand back shards above the fair share and claim free ones below it"""
+        target = await self.target_shards()
+        lease_ms = int(self.lease_ttl * 1000)
+
+        for shard in list(self.owned):
+            lease_key = self.lease_key(shard)
+
+            if await self.renew_lease(keys=[lease_key], args=[self.worker_id, lease_ms]):
+                continue
+
+            if await self.redis.set(lease_key, self.worker_id, nx=True, px=lease_ms):
+                logger.warning("Lease on shard %d expired before renewal, re-acquired it", shard)
+            else:
+                logger.warning("Lost lease on shard %d to another worker, cancelling its in-flight item", shard)
+                self.stopping.add(shard)
+
+                if task := self.owned.get(shard):
+                    task.cancel()
+
+        active = [shard for shard in self.owned if shard not in self.stopping]
+
+        for shard in active[target:]:
+            logger.info("Releasing shard %d to rebalance (target %d)", shard, target)
+            self.stopping.add(shard)
+
+        for shard in range(self.queue.shards):
+            if len(self.owned) - len(self.stopping) >= target:
+                break
+
+            if shard in self.owned:
+                continue
+
+            if await self.redis.set(self.lease_key(shard), self.worker_id, nx=True, px=lease_ms):
+                logger.info("Acquired shard %d", shard)
+                self.owned[shard] = asyncio.create_task(self.consume(shard))
+
+    async def handle(self, entry_id: str, fields: dict[str, str]) -> None:
+        async with self.slots:
+            try:
+                await self.handler(WorkItem.from_fields(fields))
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error("Work item %s failed: %s", entry_id, e)
+
+    async def consume(self, shard: int) -> None:
+        """Process a shard's entries one at a time, starting with entries left pending by a previous owner"""
+        stream = self.queue.stream(shard)
+        consumer = f"shard-{shard}"
+        last_id = "0"
+
+        try:
+            while shard not in self.stopping:
+                response = await self.redis.xreadgroup(
+                    constants.WORK_STREAM_GROUP,
+                    consumer,
+                    {stream: last_id},
+                    count=1,
+                    block=constants.WORK_STREAM_BLOCK_MS,
+                )
+                entries = response[0][1] if response else []
+
+                if not entries:
+                    last_id = ">"
+                    continue
+
+                for entry_id, fields in entries:
+                    await self.handle(entry_id, fields)
+                    await self.redis.xack(stream, constants.WORK_STREAM_GROUP, entry_id)
+        except Exception as e:
+            logger.error("Shard %d consumer stopped: %s", shard, e)
+        finally:
+            self.owned.pop(shard, None)
+            self.stopping.discard(shard)
+
+            with contextlib.suppress(Exception):
+                await self.release_lease(keys=[self.lease_key(shard)], args=[self.worker_id])
+
+    async def run(self) -> None:
+        """Keep leases balanced until cancelled"""
+        await self.ensure_groups()
+
+        try:
+            while True:
+                try:
+                    await self.rebalance()
+                except Exception as e:
+                    logger.error("Shard rebalance failed: %s", e)
+
+                await asyncio.sleep(self.lease_ttl / 3)
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        tasks = list(self.owned.values())
+
+        for task in tasks:
+            task.cancel()
+
+        with contextlib.suppress(asyncio.CancelledError):
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        with contextlib.suppress(Exception):
+            await self.redis.zrem(self.members_key, self.worker_id)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "owned_shards": sorted(self.owned),
+            "stopping_shards": sorted(self.stopping),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+def create_work_queue() -> WorkQueue:
+    """Build the shared work queue from settings"""
+    if not settings.REDIS_URL:
+        raise ValueError("REDIS_URL is required for gateway and worker deployment modes")
+
+    return WorkQueue(Redis.from_url(settings.REDIS_URL, decode_responses=True), settings.WORK_SHARDS)
+
+
+def create_shard_worker(queue: WorkQueue, handler: WorkHandler) -> ShardWorker:
+    """Build a shard worker from settings"""
+    return ShardWorker(
+        queue=queue,
+        handler=handler,
+        worker_id=settings.WORKER_ID or socket.gethostname(),
+        lease_ttl=settings.SHARD_LEASE_TTL,
+        max_concurrency=settings.DISPATCH_MAX_CONCURRENCY,
+    )
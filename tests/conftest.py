@@ -0,0 +1,53 @@
+import os
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any
+
+import pytest
+from langchain_core.tools import StructuredTool
+from testcontainers.redis import RedisContainer
+
+REDIS_IMAGE = "redis/redis-stack-server:7.4.0-v6"
+
+FakeMCPTool = Callable[..., StructuredTool]
+
+
+@pytest.fixture
+def fake_mcp_tool() -> FakeMCPTool:
+    """Builds tools shaped like the MCP adapter's: a JSON-schema args dict and an optional `mcp_server` tag"""
+
+    def make(
+        name: str,
+        coroutine: Callable[..., Awaitable[Any]],
+        *,
+        properties: dict[str, Any] | None = None,
+        server: str | None = None,
+        response_format: str = "content",
+    ) -> StructuredTool:
+        return StructuredTool(
+            name=name,
+            description="fake MCP tool",
+            args_schema={"type": "object", "properties": properties or {}},
+            coroutine=coroutine,
+            response_format=response_format,
+            metadata={"mcp_server": server} if server else None,
+        )
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def redis_url() -> Iterator[str]:
+    """Redis Stack for the tests that need a live server; REDIS_TEST_URL points them at an existing one"""
+    if url := os.environ.get("REDIS_TEST_URL"):
+        yield url
+        return
+
+    try:
+        container = RedisContainer(REDIS_IMAGE).start()
+    except Exception as e:
+        pytest.skip(f"Redis is unavailable: {e}")
+
+    try:
+        yield f"redis://{container.get_container_host_ip()}:{container.get_exposed_port(container.port)}"
+    finally:
+        container.stop()
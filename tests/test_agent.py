@@ -0,0 +1,12 @@
+from src.agent import PlannedToolCall, TaskPlan
+
+
+def test_plans_carry_parallel_tool_calls():
+    plan = TaskPlan(
+        task_description="Listar os pods do namespace prod",
+        expected_outcome="Pods e seus status",
+        parallel_calls=[PlannedToolCall(tool="list-k8s-resources")],
+    )
+
+    assert plan.parallel_calls[0].arguments_json == "{}"
+    assert "parallel_calls" in TaskPlan.model_json_schema()["properties"]
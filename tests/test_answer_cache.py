@@ -0,0 +1,66 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from src.answer_cache import AnswerCache
+from src.clusters import resolve_cluster_context
+from src.utils import parse_flags
+
+CONTEXTS = {
+    "rj-superapp-staging": "gke_rj-superapp-staging_us-central1_application",
+    "rj-superapp": "gke_rj-superapp_us-central1_application",
+}
+
+
+class KeywordEmbeddings(Embeddings):
+    """Bag-of-keywords vectors, enough to tell paraphrases from different questions"""
+
+    vocabulary = ("superapp", "staging", "fora", "caiu", "down", "pods", "namespaces")
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        synonyms = {"caiu": "fora", "down": "fora"}
+        words = {synonyms.get(word, word) for word in text.split()}
+        return [1.0 if word in words else 0.0 for word in self.vocabulary]
+
+
+def make_cache(ttl: float = 60) -> AnswerCache:
+    return AnswerCache(embeddings=KeywordEmbeddings(), ttl=ttl, similarity_threshold=0.9, max_entries_per_context=10)
+
+
+def test_paraphrases_hit_within_the_same_context():
+    async def scenario():
+        cache = make_cache()
+        context = "gke_rj-superapp-staging_us-central1_application"
+
+        await cache.store("Por que o superapp staging caiu?", context, "resposta")
+
+        assert (await cache.lookup("por que o SUPERAPP staging caiu", context)).answer == "resposta"
+        assert (await cache.lookup("superapp staging down?", context)).answer == "resposta"
+        assert await cache.lookup("pods do superapp staging", context) is None
+        assert await cache.lookup("por que o superapp staging caiu?", "other") is None
+
+    asyncio.run(scenario())
+
+
+def test_expired_and_invalidated_entries_miss():
+    async def scenario():
+        expired = make_cache(ttl=0)
+        await expired.store("superapp caiu", "ctx", "resposta")
+        assert await expired.lookup("superapp caiu", "ctx") is None
+
+        cache = make_cache()
+        await cache.store("superapp caiu", "ctx", "resposta")
+        cache.invalidate("ctx")
+        assert await cache.lookup("superapp caiu", "ctx") is None
+
+    asyncio.run(scenario())
+
+
+def test_flags_and_context_resolution():
+    assert parse_flags("--fresh por que caiu?") == ("por que caiu?", {"--fresh"})
+    assert resolve_cluster_context("o superapp staging caiu", CONTEXTS) == CONTEXTS["rj-superapp-staging"]
+    assert resolve_cluster_context("o superapp caiu", CONTEXTS) == CONTEXTS["rj-superapp"]
+    assert resolve_cluster_context("o cluster caiu", CONTEXTS) is None
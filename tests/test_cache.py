@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from src.cache import ToolCache, canonical_key
+from tests.conftest import FakeMCPTool
+
+
+@pytest.fixture
+def make_tool(fake_mcp_tool: FakeMCPTool):
+    def make(name: str, calls: list[dict]) -> StructuredTool:
+        async def coroutine(**arguments):
+            calls.append(arguments)
+            await asyncio.sleep(0.01)
+            return f"result {len(calls)}", None
+
+        return fake_mcp_tool(
+            name,
+            coroutine,
+            properties={"context": {"type": "string"}},
+            response_format="content_and_artifact",
+        )
+
+    return make
+
+
+def test_canonical_key_ignores_order_and_unset_values():
+    assert canonical_key("t", {"a": 1, "b": 2}) == canonical_key("t", {"b": 2, "a": 1, "c": None})
+    assert canonical_key("t", {"a": 1}) != canonical_key("u", {"a": 1})
+
+
+def test_cached_tool_hits_and_coalesces(make_tool):
+    async def scenario():
+        calls: list[dict] = []
+        cache = ToolCache(max_entries=10, default_ttl=0, ttls={"list-k8s-nodes": 60})
+        tool = cache.wrap(make_tool("list-k8s-nodes", calls))
+
+        results = await asyncio.gather(*(tool.ainvoke({"context": "prod"}) for _ in range(3)))
+        again = await tool.ainvoke({"context": "prod"})
+
+        assert results == ["result 1"] * 3
+        assert again == "result 1"
+        assert len(calls) == 1
+        assert cache.stats()["misses"] == {"list-k8s-nodes": 1}
+        assert cache.stats()["coalesced"] == {"list-k8s-nodes": 2}
+        assert cache.stats()["hits"] == {"list-k8s-nodes": 1}
+
+    asyncio.run(scenario())
+
+
+def test_zero_ttl_tools_are_not_wrapped_and_lru_evicts(make_tool):
+    calls: list[dict] = []
+    cache = ToolCache(max_entries=1, default_ttl=0)
+    tool = make_tool("k8s-pod-exec", calls)
+
+    assert cache.wrap(tool) is tool
+
+    cache.store_local("a", ("1", None), 60)
+    cache.store_local("b", ("2", None), 60)
+
+    assert list(cache.entries) == ["b"]
+
+
+def test_cancelled_owner_does_not_cancel_coalesced_callers(make_tool):
+    async def scenario():
+        calls: list[dict] = []
+        cache = ToolCache(max_entries=10, default_ttl=60)
+        tool = cache.wrap(make_tool("list-k8s-nodes", calls))
+
+        owner = asyncio.create_task(tool.ainvoke({"context": "prod"}))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(tool.ainvoke({"context": "prod"}))
+        await asyncio.sleep(0.001)
+        owner.cancel()
+
+        assert await waiter == "result 2"
+        assert owner.cancelled()
+        assert len(calls) == 2
+        assert cache.stats()["coalesced"] == {"list-k8s-nodes": 1}
+        assert not cache.pending
+
+    asyncio.run(scenario())
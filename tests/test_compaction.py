@@ -0,0 +1,66 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+
+from src.compaction import MessageCompactor
+from src.constants import constants
+
+
+def make_turn(index: int, output_size: int) -> list:
+    return [
+        HumanMessage(content=f"pergunta {index}", id=f"h{index}"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "get-k8s-pod-logs", "args": {"pod": "letta"}, "id": f"c{index}"}],
+            id=f"a{index}",
+        ),
+        ToolMessage(content="x" * output_size, tool_call_id=f"c{index}", name="get-k8s-pod-logs", id=f"t{index}"),
+        AIMessage(content=f"resposta {index}", id=f"r{index}"),
+    ]
+
+
+def make_compactor(max_tokens: int = 100_000, keep_tokens: int = 100_000) -> MessageCompactor:
+    return MessageCompactor(
+        model=FakeListChatModel(responses=["resumo curto"]),
+        max_tokens=max_tokens,
+        keep_tokens=keep_tokens,
+        stub_after_turns=2,
+        stub_min_chars=100,
+        summary_prompt="resuma",
+    )
+
+
+def test_old_tool_outputs_become_stubs_with_same_ids():
+    messages = [*make_turn(1, 500), *make_turn(2, 500), *make_turn(3, 500)]
+    compactor = make_compactor()
+
+    update = asyncio.run(compactor.compact({"messages": messages}, {"configurable": {"thread_id": "channel_1"}}))
+
+    assert [stub.id for stub in update["messages"]] == ["t1"]
+    assert update["messages"][0].content.startswith(constants.COMPACTION_STUB_PREFIX)
+    assert compactor.stats()["thread_tokens"]["channel_1"] > 0
+
+
+def test_history_over_budget_is_summarized_keeping_recent_turns():
+    messages = [*make_turn(1, 50), *make_turn(2, 50), *make_turn(3, 50)]
+    compactor = make_compactor(max_tokens=50, keep_tokens=60)
+
+    update = asyncio.run(compactor.compact({"messages": messages}, {"configurable": {"thread_id": "channel_1"}}))
+    remove_all, summary, *recent = update["messages"]
+
+    assert isinstance(remove_all, RemoveMessage)
+    assert "resumo curto" in summary.content
+    assert [message.id for message in recent] == ["h3", "a3", "t3", "r3"]
+    assert compactor.stats()["summarizations"] == 1
+
+
+def test_token_counts_of_idle_threads_age_out():
+    compactor = make_compactor()
+    compactor.record_tokens("channel_1", 100)
+    compactor.record_tokens("channel_2", 200)
+    compactor.counted_at["channel_1"] -= constants.COMPACTION_TOKEN_COUNT_TTL + 1
+
+    compactor.record_tokens("channel_3", 300)
+
+    assert compactor.stats()["thread_tokens"] == {"channel_2": 200, "channel_3": 300}
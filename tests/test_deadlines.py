@@ -0,0 +1,42 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.constants import constants
+from src.deadlines import is_partial_answer, node_budget, partial_answer, refinement_deadline
+
+
+def test_each_node_gets_its_share_of_what_is_left():
+    assert node_budget("create_plan", deadline=100, now=0) == 15
+    assert round(node_budget("execute_task", deadline=100, now=15), 6) == 70
+    assert node_budget("evaluate_result", deadline=100, now=85) == 15
+    assert node_budget("execute_direct", deadline=100, now=40) == 60
+
+
+def test_an_expired_deadline_leaves_no_time():
+    assert node_budget("execute_task", deadline=100, now=130) == 0
+
+
+def test_refinement_stops_when_the_latency_budget_of_the_deadline_is_spent():
+    assert refinement_deadline(deadline=1300, timeout=300, latency_budget=180) == 1180
+    assert refinement_deadline(deadline=1300, timeout=300, latency_budget=600) == 1300
+
+
+def test_partial_answer_keeps_worker_notes_and_clipped_tool_outputs():
+    messages = [
+        HumanMessage(content="pergunta anterior"),
+        ToolMessage(content="antigo", name="list-k8s-nodes", tool_call_id="0"),
+        HumanMessage(content="liste os pods"),
+        AIMessage(content="Vou listar os pods."),
+        ToolMessage(content="x" * 5000, name="list-k8s-resources", tool_call_id="1"),
+    ]
+
+    answer = partial_answer(messages)
+
+    assert answer.startswith("Vou listar os pods.")
+    assert "**list-k8s-resources**" in answer
+    assert "3500 caracteres omitidos" in answer
+    assert "antigo" not in answer
+
+
+def test_partial_answers_are_recognized():
+    assert is_partial_answer(constants.PARTIAL_ANSWER_NOTE.format(reason="tempo limite de 300s atingido"))
+    assert not is_partial_answer("Todos os pods estão Running.")
@@ -0,0 +1,42 @@
+import json
+
+from src.digest import OutputDigester, digest_logs, line_signature
+
+
+def test_line_signature_masks_volatile_parts():
+    assert line_signature("2025-01-02T10:00:00Z GET /api/7 took 12ms") == line_signature(
+        "2025-01-02T10:00:01Z GET /api/8 took 9ms"
+    )
+
+
+def test_log_digest_keeps_errors_windows_and_counts():
+    lines = [f"2025-01-02T10:00:{i % 60:02d}Z healthcheck ok {i}" for i in range(1000)]
+    lines.insert(500, "2025-01-02T10:05:00Z ERROR connection refused to postgres:5432")
+
+    digested = digest_logs(lines, head=5, tail=5, max_errors=10)
+
+    assert "1001 linhas" in digested
+    assert "connection refused" in digested
+    assert "x1000" in digested
+    assert digested.count("\n") < 40
+
+
+def test_resource_lists_become_tables_and_raw_stays_retrievable():
+    pods = [
+        json.dumps({"name": f"app-{i}", "namespace": "prod", "status": "Running", "restarts": 0, "age": "2d"})
+        for i in range(200)
+    ]
+    crashing = {"name": "letta-98aoksnm", "namespace": "prod", "status": "CrashLoopBackOff", "restarts": 42}
+    pods.append(json.dumps(crashing))
+    digester = OutputDigester(threshold=1000, max_raw_outputs=4)
+
+    digested = digester.digest("list-k8s-resources", pods)
+
+    assert digested is not None
+    assert digested.splitlines()[2].startswith("letta-98aoksnm | prod | CrashLoopBackOff | 42")
+    ref = digested.rsplit("ref=", 1)[1].split(",", 1)[0]
+    assert "app-199" in digester.read_raw(ref, offset=0, limit=100_000)
+
+
+def test_small_outputs_pass_through():
+    assert OutputDigester(threshold=1000, max_raw_outputs=4).digest("list-k8s-nodes", "node-1 Ready") is None
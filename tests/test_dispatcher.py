@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from src.dispatcher import ThreadDispatcher
+from src.errors import DispatcherSaturatedError
+
+
+def test_same_thread_runs_in_order():
+    async def scenario() -> list[str]:
+        dispatcher = ThreadDispatcher(max_concurrency=4, max_in_flight=10)
+        order: list[str] = []
+
+        async def job(name: str, delay: float):
+            await asyncio.sleep(delay)
+            order.append(name)
+
+        positions = [
+            dispatcher.submit("channel_1", lambda: job("first", 0.02)),
+            dispatcher.submit("channel_1", lambda: job("second", 0)),
+        ]
+
+        await dispatcher.drain()
+
+        assert positions == [0, 1]
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_different_threads_run_concurrently():
+    async def scenario() -> int:
+        dispatcher = ThreadDispatcher(max_concurrency=4, max_in_flight=10)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        for i in range(3):
+            assert dispatcher.submit(f"channel_{i}", job) == 0
+
+        await dispatcher.drain()
+
+        return peak
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_pool_and_in_flight_limits():
+    async def scenario():
+        dispatcher = ThreadDispatcher(max_concurrency=1, max_in_flight=2)
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        assert dispatcher.submit("channel_1", job) == 0
+        await asyncio.sleep(0)
+        assert dispatcher.submit("channel_2", job) == 1
+
+        with pytest.raises(DispatcherSaturatedError):
+            dispatcher.submit("channel_3", job)
+
+        release.set()
+        await dispatcher.drain()
+
+        assert dispatcher.stats()["queued_threads"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_job_does_not_stop_the_thread_queue():
+    async def scenario() -> list[str]:
+        dispatcher = ThreadDispatcher(max_concurrency=1, max_in_flight=10)
+        order: list[str] = []
+
+        async def cancelled():
+            raise asyncio.CancelledError
+
+        async def job():
+            order.append("second")
+
+        dispatcher.submit("channel_1", cancelled)
+        dispatcher.submit("channel_1", job)
+
+        await dispatcher.drain()
+
+        assert dispatcher.stats()["in_flight"] == 0
+        return order
+
+    assert asyncio.run(scenario()) == ["second"]
+
+
+def test_cancelled_consumer_releases_its_queued_jobs():
+    async def scenario():
+        dispatcher = ThreadDispatcher(max_concurrency=1, max_in_flight=10)
+
+        for _ in range(3):
+            dispatcher.submit("channel_1", lambda: asyncio.sleep(1))
+
+        await asyncio.sleep(0)
+        dispatcher.consumers["channel_1"].cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await dispatcher.drain()
+
+        assert dispatcher.stats() == {"in_flight": 0, "active_threads": 0, "queued_threads": 0, "waiting_for_slot": 0}
+
+    asyncio.run(scenario())
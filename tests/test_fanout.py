@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from src.fanout import ToolFanout
+from tests.conftest import FakeMCPTool
+
+
+@pytest.fixture
+def make_tool(fake_mcp_tool: FakeMCPTool):
+    def make(name: str, server: str, delay: float) -> StructuredTool:
+        async def coroutine(**arguments):
+            await asyncio.sleep(delay)
+            return f"{name} {arguments}"
+
+        return fake_mcp_tool(name, coroutine, server=server)
+
+    return make
+
+
+def test_independent_calls_take_as_long_as_the_slowest(make_tool):
+    fanout = ToolFanout([make_tool("list-k8s-nodes", "k8s", 0.1), make_tool("list-k8s-events", "k8s", 0.1)], 4)
+    calls = [("list-k8s-nodes", '{"context": "a"}'), ("list-k8s-events", '{"context": "b"}'), ("x", "{}")]
+
+    started = time.perf_counter()
+    results = asyncio.run(fanout.run(calls))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.18
+    assert [result.ok for result in results] == [True, True, False]
+    assert "context" in results[0].output
+
+
+def test_per_server_cap_serializes_calls(make_tool):
+    fanout = ToolFanout([make_tool("list-k8s-nodes", "k8s", 0.05)], 1)
+
+    started = time.perf_counter()
+    asyncio.run(fanout.run([("list-k8s-nodes", "{}")] * 3))
+
+    assert time.perf_counter() - started >= 0.15
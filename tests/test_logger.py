@@ -0,0 +1,45 @@
+import json
+import logging
+from queue import SimpleQueue
+
+from src.logger import JsonFormatter, PolicyQueueHandler, clip, log_fields, redact
+
+
+def prepared(message: str, *args: object, exc_info: bool = False) -> logging.LogRecord:
+    queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    handler = PolicyQueueHandler(queue, truncate_length=20)
+    record = logging.LogRecord("kube-sherlock", logging.INFO, __file__, 1, message, args, None)
+
+    if exc_info:
+        try:
+            raise RuntimeError("password=hunter2")
+        except RuntimeError as e:
+            record.exc_info = (type(e), e, e.__traceback__)
+
+    handler.handle(record)
+    return queue.get_nowait()
+
+
+def test_long_arguments_are_clipped_but_numbers_kept():
+    assert clip("x" * 30, 20) == "x" * 20 + "… (+10 chars)"
+    assert clip(["pod"] * 2, 20) == "['pod', 'pod']"
+    assert clip(123456789, 2) == 123456789
+
+
+def test_secrets_are_masked():
+    assert redact("GOOGLE_API_KEY=AIzaSyA1234567890 ok") == "GOOGLE_API_KEY=*** ok"
+    assert redact('{"token": "abc.def"}') == '{"token": "***"}'
+    assert redact("Authorization: Bearer eyJhbGciOi") == "Authorization: ***"
+    assert redact("sent Bearer eyJhbGciOi to mcp") == "sent Bearer *** to mcp"
+
+
+def test_records_carry_context_fields_and_render_as_json():
+    with log_fields(thread_id="channel_1", node="execute_task", iteration=2):
+        record = prepared("Worker response: %s", "resposta " * 10, exc_info=True)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Worker response: resposta resposta re… (+70 chars)"
+    assert (entry["thread_id"], entry["node"], entry["iteration"]) == ("channel_1", "execute_task", 2)
+    assert "password=***" in entry["exception"]
+    assert prepared("fora de contexto").fields == ()
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import UTC, datetime
+
+from src.logindex import LogIndex, LogQuery, parse_log, parse_severity
+from tests.conftest import FakeMCPTool
+
+NOW = datetime(2025, 8, 14, 11, 0, tzinfo=UTC).timestamp()
+
+
+def api_log() -> str:
+    lines = [f"2025-08-14T10:{minute:02d}:00.000Z INFO GET /health 200 in {minute}ms" for minute in range(60)]
+    lines += [f"2025-08-14T10:{50 + i}:30.000Z ERROR connection refused to postgres:5432 attempt {i}" for i in range(5)]
+    lines.append("2025-08-14T10:55:31.000Z WARN retrying in 5s")
+    return "\n".join(lines)
+
+
+def make_index() -> LogIndex:
+    index = LogIndex(ttl=600, max_lines=10_000, inline_chars=500)
+    index.ingest("prod/api/api-7d9f", api_log(), NOW)
+    return index
+
+
+def test_severity_comes_from_fields_words_klog_and_keywords():
+    assert parse_severity('ts=1 level=warn msg="slow query"') == "warning"
+    assert parse_severity("2025-08-14 10:00:00 CRITICAL disk full") == "fatal"
+    assert parse_severity("E0814 10:21:03.123456 1 reflector.go:138] watch failed") == "error"
+    assert parse_severity("panic: runtime error: index out of range") == "error"
+    assert parse_severity("listening on :8080") == "info"
+
+
+def test_continuation_lines_inherit_timestamp_and_severity():
+    lines = parse_log("api", "2025-08-14T10:00:00Z ERROR boom\n  at handler.py:12\nno timestamp here", 2025)
+
+    assert [line.severity for line in lines] == ["error", "error", "info"]
+    assert len({line.timestamp for line in lines}) == 1
+
+
+def test_search_groups_repeats_and_filters_by_time_and_severity():
+    index = make_index()
+
+    def search(**query) -> str:
+        return asyncio.run(index.search(LogQuery(**query), NOW))
+
+    found = search(pattern="connection refused", since="8m", severity="error")
+
+    assert "3 linhas" in found
+    assert "x3 [error] 2025-08-14 10:54:30Z" in found
+    assert search(pattern="health", severity="warning").count("\n") == 0
+    assert "x1 [warning]" in search(pattern="retr", pod="api-7d9f")
+
+
+def test_literal_words_match_indexed_words_by_prefix():
+    log = make_index().logs[("", "prod/api/api-7d9f")]
+
+    assert log.candidates("5432") == log.candidates("postgres:5432") == list(range(60, 65))
+    assert log.candidates("conn refu") == list(range(60, 65))
+    assert log.candidates("efused") == []
+    assert len(log.candidates(r"\w*efused")) == len(log.lines)
+
+
+def test_histogram_buckets_counts_by_severity():
+    histogram = asyncio.run(make_index().histogram("30m", None, None, NOW))
+
+    assert "2025-08-14 10:00:00Z | 30 | info=30" in histogram
+    assert "2025-08-14 10:30:00Z | 36 | error=5, warning=1, info=30" in histogram
+
+
+def test_large_logs_are_indexed_and_replaced_by_an_overview(fake_mcp_tool: FakeMCPTool):
+    calls: list[dict] = []
+
+    async def coroutine(**arguments):
+        calls.append(arguments)
+        return api_log(), None
+
+    logs = fake_mcp_tool(
+        "get-k8s-pod-logs",
+        coroutine,
+        properties={"pod": {"type": "string"}},
+        response_format="content_and_artifact",
+    )
+    index = LogIndex(ttl=600, max_lines=10_000, inline_chars=500)
+    [wrapped] = index.wrap_tools([logs])
+    search, _ = index.tools()
+
+    overview = asyncio.run(wrapped.ainvoke({"context": "prod", "namespace": "api", "pod": "api-7d9f"}))
+    found = asyncio.run(search.ainvoke({"pattern": "postgres"}))
+
+    assert "66 linhas" in overview
+    assert "x5 " in overview
+    assert "search-logs" in overview
+    assert "prod/api/api-7d9f" in found
+    assert index.stats()["logs"] == 1
+
+
+def test_searches_only_see_logs_fetched_by_their_own_thread(fake_mcp_tool: FakeMCPTool):
+    async def coroutine(**_):
+        return api_log(), None
+
+    logs = fake_mcp_tool("get-k8s-pod-logs", coroutine, response_format="content_and_artifact")
+    index = LogIndex(ttl=600, max_lines=10_000, inline_chars=500)
+    [wrapped] = index.wrap_tools([logs])
+    search, histogram = index.tools()
+
+    def thread(name: str) -> dict:
+        return {"configurable": {"thread_id": name}}
+
+    async def scenario() -> tuple[str, str, str]:
+        await wrapped.ainvoke({"context": "prod", "namespace": "api", "pod": "api-7d9f"}, thread("channel_1"))
+        own = await search.ainvoke({"pattern": "postgres"}, thread("channel_1"))
+        other = await search.ainvoke({"pattern": "postgres"}, thread("channel_2"))
+        return own, other, await histogram.ainvoke({}, thread("channel_2"))
+
+    own, other, buckets = asyncio.run(scenario())
+
+    assert "x5 " in own
+    assert other.startswith("Nenhum log indexado")
+    assert buckets.startswith("Nenhuma linha")
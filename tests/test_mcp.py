@@ -0,0 +1,161 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from langchain_core.tools import StructuredTool, ToolException
+
+from src.errors import MCPUnavailableError
+from src.mcp import MCPPool
+from tests.conftest import FakeMCPTool
+
+SERVER = "mcp-k8s-go"
+
+
+class FakeSession:
+    def __init__(self, index: int, behaviour: str) -> None:
+        self.index = index
+        self.behaviour = behaviour
+        self.ping_fails = False
+
+    async def send_ping(self) -> None:
+        if self.ping_fails:
+            raise BrokenPipeError("ping")
+
+
+class FakeClient:
+    """Stands in for MultiServerMCPClient; each session opened gets the next scripted behaviour"""
+
+    def __init__(self, *behaviours: str) -> None:
+        self.connections = {SERVER: {}}
+        self.behaviours = behaviours
+        self.attempts = 0
+
+    @asynccontextmanager
+    async def session(self, server_name: str):
+        behaviour = self.behaviours[self.attempts % len(self.behaviours)]
+        index = self.attempts
+        self.attempts += 1
+
+        if behaviour == "unstartable":
+            raise OSError(f"{server_name}: executable not found")
+
+        yield FakeSession(index, behaviour)
+
+
+@pytest.fixture(autouse=True)
+def fake_session_tools(monkeypatch: pytest.MonkeyPatch, fake_mcp_tool: FakeMCPTool) -> None:
+    async def load_fake_tools(session: FakeSession) -> list[StructuredTool]:
+        async def list_resources(kind: str) -> tuple[str, None]:
+            match session.behaviour:
+                case "hangs":
+                    await asyncio.sleep(10)
+                case "crashes":
+                    raise ConnectionResetError("session closed")
+
+            return f"{kind} da sessão {session.index}", None
+
+        return [
+            fake_mcp_tool(
+                "list-k8s-resources",
+                list_resources,
+                properties={"kind": {"type": "string"}},
+                response_format="content_and_artifact",
+            )
+        ]
+
+    monkeypatch.setattr("src.mcp.load_mcp_tools", load_fake_tools)
+
+
+async def started_pool(*behaviours: str, size: int = 2) -> MCPPool:
+    pool = MCPPool(FakeClient(*behaviours), size=size, call_timeout=0.1, ping_interval=60)  # type: ignore[arg-type]
+    await pool.start()
+    return pool
+
+
+async def call(pool: MCPPool, tool: str = "list-k8s-resources") -> str:
+    content, _ = await pool.call(SERVER, tool, {"kind": "Pod"})
+    return content
+
+
+def test_calls_go_to_the_least_loaded_session():
+    async def scenario():
+        pool = await started_pool("ok")
+        pool.members[SERVER][0].in_flight = 1
+
+        assert await call(pool) == "Pod da sessão 1"
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_session_is_restarted_and_the_call_retried_on_another():
+    async def scenario():
+        pool = await started_pool("crashes", "ok")
+        first = pool.members[SERVER][0]
+
+        assert await call(pool) == "Pod da sessão 1"
+        assert not first.healthy
+        assert first.failures == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_sessions_are_restarted():
+    async def scenario():
+        pool = await started_pool("hangs", "ok")
+
+        assert await call(pool) == "Pod da sessão 1"
+        assert not pool.members[SERVER][0].healthy
+        await pool.close()
+
+        pool = await started_pool("hangs")
+
+        with pytest.raises(ToolException, match="timed out"):
+            await call(pool)
+
+        assert not pool.is_ready()
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_tool_is_a_tool_error_and_keeps_sessions_healthy():
+    async def scenario():
+        pool = await started_pool("ok")
+
+        with pytest.raises(ToolException, match="Unknown MCP tool"):
+            await call(pool, "delete-k8s-resource")
+
+        assert all(member.healthy for member in pool.members[SERVER])
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_ping_restarts_the_session():
+    async def scenario():
+        pool = await started_pool("ok", size=1)
+        member = pool.members[SERVER][0]
+        assert member.session is not None
+
+        member.session.ping_fails = True
+        await pool.ping(member)
+
+        assert not member.healthy
+        assert not pool.is_ready()
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_tools_are_unavailable_when_no_session_starts():
+    async def scenario():
+        pool = await started_pool("unstartable")
+
+        with pytest.raises(MCPUnavailableError):
+            pool.get_tools()
+
+        await pool.close()
+
+    asyncio.run(scenario())
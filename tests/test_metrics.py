@@ -0,0 +1,38 @@
+from langgraph.checkpoint.base import empty_checkpoint
+
+from src.metrics import Counter, Histogram, Registry, checkpoint_bytes, top_samples
+from src.serde import CompactSerializer
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = Registry()
+    errors = registry.register(Counter("tool_errors_total", "Tool failures", ("tool",)))
+    latency = registry.register(Histogram("tool_seconds", "Tool latency", ("tool",), buckets=(0.1, 1)))
+
+    errors.inc(tool="get-pod")
+    errors.inc(2, tool="get-pod")
+    latency.observe(0.5, tool='say "hi"')
+
+    text = registry.render()
+
+    assert "# TYPE tool_errors_total counter" in text
+    assert 'tool_errors_total{tool="get-pod"} 3.0' in text
+    assert 'tool_seconds_bucket{tool="say \\"hi\\"",le="0.1"} 0' in text
+    assert 'tool_seconds_bucket{tool="say \\"hi\\"",le="1.0"} 1' in text
+    assert 'tool_seconds_bucket{tool="say \\"hi\\"",le="+Inf"} 1' in text
+    assert 'tool_seconds_count{tool="say \\"hi\\""} 1' in text
+
+
+def test_top_samples_keep_the_largest_labels_and_sum_the_rest():
+    values = {f"channel_{i}": float(i) for i in range(100)}
+
+    assert top_samples(values, 2) == {("channel_99",): 99, ("channel_98",): 98, ("other",): sum(range(98))}
+
+
+def test_checkpoint_writes_record_the_bytes_the_serializer_produced():
+    serializer = CompactSerializer(threshold=None, level=3)
+    before = checkpoint_bytes.sums.get((), 0)
+
+    _, data = serializer.dumps_typed(empty_checkpoint())
+
+    assert checkpoint_bytes.sums[()] - before == len(data)
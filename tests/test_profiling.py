@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.profiling import LoopWatchdog, phase_timer, render_collapsed, sample_stacks, timed_phase
+
+
+def spin(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def block_loop() -> None:
+    time.sleep(0.3)
+
+
+def test_sampled_stacks_end_in_the_running_function():
+    thread = threading.Thread(target=spin, args=(0.3,))
+    thread.start()
+    stacks = sample_stacks(thread.ident or 0, seconds=0.1, interval=0.005)
+    thread.join()
+
+    assert any(stack.endswith(":spin") for stack in stacks)
+    assert render_collapsed(stacks).splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+
+def test_watchdog_reports_the_callback_that_blocked_the_loop():
+    async def scenario() -> LoopWatchdog:
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+        task = asyncio.create_task(watchdog.run())
+        await asyncio.sleep(0.05)
+        block_loop()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return watchdog
+
+    stall = asyncio.run(scenario()).stalls[0]
+
+    assert stall["seconds"] >= 0.2
+    assert stall["stack"].endswith(":block_loop")
+
+
+def test_phases_nest_calls_under_nodes_and_sum_checkpoint_io():
+    async def scenario() -> list[tuple[str, float]]:
+        with phase_timer(True) as timer:
+            assert timer is not None
+
+            with timed_phase("node", "create_plan"):
+                run_id = uuid4()
+                await timer.on_chat_model_start({}, [[]], run_id=run_id, metadata={"ls_model_name": "router"})
+                message = AIMessage("", response_metadata={"model_name": "models/gemini-2.5-flash"})
+                await timer.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+            for _ in range(2):
+                with timed_phase("checkpoint", "aput"):
+                    pass
+
+        return timer.rows()
+
+    labels = [label for label, _ in asyncio.run(scenario())]
+
+    assert labels == ["create_plan", "  llm gemini-2.5-flash", "checkpoint aput (2x)"]
+
+
+def test_phases_are_not_recorded_without_timings():
+    with phase_timer(False) as timer, timed_phase("node", "create_plan"):
+        assert timer is None
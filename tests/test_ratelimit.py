@@ -0,0 +1,105 @@
+import asyncio
+from uuid import uuid4
+
+from redis.asyncio import Redis
+
+from src.ratelimit import BucketSpec, RateLimiter, take_local
+
+
+def test_bucket_allows_a_burst_then_refills_over_time():
+    state: dict[str, tuple[float, float]] = {}
+    bucket = [("user:1", BucketSpec(burst=2, per_minute=6))]
+
+    assert take_local(state, bucket, 0) == (0, 0)
+    assert take_local(state, bucket, 0) == (0, 0)
+
+    blocked, wait_ms = take_local(state, bucket, 1000)
+    assert blocked == 1
+    assert wait_ms == 9000
+
+    assert take_local(state, bucket, 10_000) == (0, 0)
+
+
+def test_a_blocked_bucket_does_not_consume_the_others():
+    state: dict[str, tuple[float, float]] = {}
+    user = ("user:1", BucketSpec(burst=5, per_minute=60))
+    channel = ("channel:1", BucketSpec(burst=1, per_minute=1))
+
+    assert take_local(state, [user, channel], 0) == (0, 0)
+    assert take_local(state, [user, channel], 0)[0] == 2
+    assert state["user:1"][0] == 4
+
+
+def test_limiter_reports_scope_and_enforces_the_token_quota():
+    limiter = RateLimiter(
+        user_bucket=BucketSpec(burst=1, per_minute=1),
+        channel_bucket=BucketSpec(burst=10, per_minute=10),
+        token_quota=1000,
+        quota_window=3600,
+    )
+
+    async def scenario():
+        first = await limiter.check("alice", "c1")
+        second = await limiter.check("alice", "c1")
+        other = await limiter.check("bob", "c1")
+        await limiter.record_tokens("bob", 1500)
+        over_quota = await limiter.check("bob", "c1")
+        return first, second, other, over_quota
+
+    first, second, other, over_quota = asyncio.run(scenario())
+
+    assert first.allowed
+    assert (second.allowed, second.scope) == (False, "user")
+    assert "Tente novamente" in second.message()
+    assert other.allowed
+    assert (over_quota.allowed, over_quota.scope) == (False, "quota")
+    assert limiter.stats()["tokens_by_user"] == {"bob": 1500}
+
+
+def redis_limiter(redis_url: str, user: BucketSpec, channel: BucketSpec) -> RateLimiter:
+    return RateLimiter(
+        user_bucket=user,
+        channel_bucket=channel,
+        token_quota=0,
+        quota_window=3600,
+        redis=Redis.from_url(redis_url, decode_responses=True),
+        prefix=f"test:{uuid4().hex}:",
+    )
+
+
+def test_redis_script_allows_a_burst_then_reports_the_refill_wait(redis_url: str):
+    user = BucketSpec(burst=2, per_minute=6)
+    limiter = redis_limiter(redis_url, user, user)
+
+    async def scenario():
+        bucket = [("user:1", user)]
+        taken = [await limiter.take(bucket) for _ in range(3)]
+        ttl = await limiter.redis.pttl(f"{limiter.prefix}user:1")
+        await limiter.redis.aclose()
+        return taken, ttl
+
+    taken, ttl = asyncio.run(scenario())
+
+    assert taken[:2] == [(0, 0), (0, 0)]
+    assert taken[2][0] == 1
+    assert 9000 < taken[2][1] <= 10_000
+    assert 19_000 < ttl <= 20_000
+
+
+def test_redis_script_leaves_the_other_buckets_alone_when_one_blocks(redis_url: str):
+    user = BucketSpec(burst=5, per_minute=1)
+    channel = BucketSpec(burst=1, per_minute=1)
+    limiter = redis_limiter(redis_url, user, channel)
+
+    async def scenario():
+        decisions = [await limiter.check("alice", "c1") for _ in range(2)]
+        tokens = await limiter.redis.hget(f"{limiter.prefix}user:alice", "tokens")
+        await limiter.redis.aclose()
+        return decisions, float(tokens)
+
+    (first, second), tokens = asyncio.run(scenario())
+
+    assert first.allowed
+    assert (second.allowed, second.scope) == (False, "channel")
+    assert 4 <= tokens < 4.01
+    assert limiter.stats()["decisions"] == {"allowed": 1, "channel": 1}
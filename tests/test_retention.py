@@ -0,0 +1,31 @@
+from src.retention import checkpoint_of, prunable_keys
+
+THREAD = "channel_1"
+
+
+def keys_for(namespace: str, checkpoint_id: str) -> list[str]:
+    return [
+        f"checkpoint:{THREAD}:{namespace}:{checkpoint_id}",
+        f"checkpoint_write:{THREAD}:{namespace}:{checkpoint_id}:task-1:0",
+        f"write_keys_zset:{THREAD}:{namespace}:{checkpoint_id}",
+    ]
+
+
+def test_namespaces_with_colons_are_parsed_from_the_right():
+    assert checkpoint_of(f"checkpoint:{THREAD}:__empty__:01J0", THREAD) == ("__empty__", "01J0")
+    assert checkpoint_of(f"checkpoint_write:{THREAD}:worker:abc:01J0:task:3", THREAD) == ("worker:abc", "01J0")
+    assert checkpoint_of(f"checkpoint_latest:{THREAD}:__empty__", THREAD) is None
+
+
+def test_only_checkpoints_older_than_the_latest_n_per_namespace_are_pruned():
+    root = [key for checkpoint_id in ("01J1", "01J2", "01J3", "01J4") for key in keys_for("__empty__", checkpoint_id)]
+    worker = [key for checkpoint_id in ("01J1", "01J5") for key in keys_for("worker:abc", checkpoint_id)]
+    pointers = [f"checkpoint_latest:{THREAD}:__empty__", f"checkpoint_blob:{THREAD}:__empty__:messages:1"]
+
+    stale = prunable_keys(root + worker + pointers, THREAD, keep_latest=2)
+
+    assert set(stale) == {*keys_for("__empty__", "01J1"), *keys_for("__empty__", "01J2")}
+
+
+def test_nothing_is_pruned_under_the_limit():
+    assert prunable_keys(keys_for("__empty__", "01J1"), THREAD, keep_latest=5) == []
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import Any, override
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.router import ModelHealth, ModelRouter
+
+
+class SleepyModel(BaseChatModel):
+    answer: str
+    latency: float = 0.0
+    fail: bool = False
+
+    @property
+    @override
+    def _llm_type(self) -> str:
+        return "sleepy"
+
+    def result(self) -> ChatResult:
+        if self.fail:
+            raise RuntimeError("503 model overloaded")
+
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    @override
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any):
+        time.sleep(self.latency)
+        return self.result()
+
+    @override
+    async def _agenerate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any):
+        await asyncio.sleep(self.latency)
+        return self.result()
+
+
+def router(*models: SleepyModel, hedge_delay: float = 0.05) -> ModelRouter:
+    names = [model.answer for model in models]
+    return ModelRouter(
+        models=list(models),
+        names=names,
+        health={name: ModelHealth(window=10, error_threshold=0.5, cooldown=30, min_samples=2) for name in names},
+        hedge_delay=hedge_delay,
+        hedge_min_delay=0.01,
+    )
+
+
+def test_slow_primary_is_hedged_and_the_fastest_answer_wins():
+    routed = router(SleepyModel(answer="lite", latency=5), SleepyModel(answer="flash", latency=0.01))
+
+    started = time.perf_counter()
+    message = asyncio.run(routed.ainvoke([HumanMessage(content="oi")]))
+
+    assert message.content == "flash"
+    assert message.response_metadata["model_name"] == "flash"
+    assert time.perf_counter() - started < 1
+    assert routed.stats()["flash"]["hedge_wins"] == 1
+
+
+def test_failures_fail_over_and_trip_the_breaker():
+    routed = router(SleepyModel(answer="lite", fail=True), SleepyModel(answer="flash"), hedge_delay=10)
+
+    async def ask_twice():
+        return [await routed.ainvoke([HumanMessage(content="oi")]) for _ in range(2)]
+
+    assert [message.content for message in asyncio.run(ask_twice())] == ["flash", "flash"]
+    assert routed.stats()["lite"]["state"] == "open"
+    assert routed.candidates(time.time()) == [1]
+
+
+def test_blocking_calls_fail_over_in_order():
+    routed = router(SleepyModel(answer="lite", fail=True), SleepyModel(answer="flash"))
+
+    message = routed.invoke([HumanMessage(content="oi")])
+
+    assert message.content == "flash"
+    assert message.response_metadata["model_name"] == "flash"
+    assert routed.stats()["lite"]["error"] == 1
+    assert routed.stats()["flash"]["success"] == 1
+
+
+def test_breaker_half_opens_after_cooldown_and_closes_on_success():
+    health = ModelHealth(window=10, error_threshold=0.5, cooldown=30, min_samples=2)
+    health.record(False, 1.0, now=0)
+    health.record(False, 1.0, now=1)
+
+    assert health.state(now=10) == "open"
+    assert health.state(now=40) == "half-open"
+
+    health.record(True, 1.0, now=40)
+
+    assert health.state(now=40) == "closed"
+    assert health.error_rate() == 0
+
+
+def test_p95_needs_enough_samples():
+    health = ModelHealth(window=100, error_threshold=0.5, cooldown=30, min_samples=5)
+
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        health.record(True, latency, now=0)
+
+    assert health.p95() is None
+
+    for latency in range(5, 21):
+        health.record(True, float(latency), now=0)
+
+    assert health.p95() == 19.0
@@ -0,0 +1,29 @@
+import pytest
+
+from src.constants import QuestionRoute
+from src.routing import classify_question
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "liste os pods do namespace letta no superapp staging",
+        "quais namespaces existem no iplanrio?",
+        "mostre os deployments em produção",
+    ],
+)
+def test_simple_lookups_take_direct_route(question: str):
+    assert classify_question(question) == QuestionRoute.DIRECT
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "por que o pod letta está em CrashLoopBackOff?",
+        "liste os pods com erro no superapp",
+        "o superapp staging caiu, o que aconteceu?",
+        "",
+    ],
+)
+def test_diagnostic_questions_are_supervised(question: str):
+    assert classify_question(question) == QuestionRoute.SUPERVISED
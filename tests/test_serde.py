@@ -0,0 +1,125 @@
+import asyncio
+from uuid import uuid4
+
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import CheckpointTuple, empty_checkpoint
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+
+from src.retention import REF_PREFIX
+from src.serde import PACKED_KEY, PACKED_TYPE, REF_KEY, CompactRedisSaver, CompactSerializer
+
+OFFLINE_REDIS_URL = "redis://localhost:6379"
+
+
+def checkpoint_with_history() -> dict:
+    logs = "\n".join(f"2025-08-14T10:21:{i % 60:02d}Z ERROR connection refused to postgres:5432" for i in range(200))
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {
+        "messages": [
+            HumanMessage(content="por que o letta está caindo?", id="1"),
+            AIMessage(content="", id="2", tool_calls=[{"name": "get-k8s-pod-logs", "args": {}, "id": "c1"}]),
+            ToolMessage(content=logs, tool_call_id="c1", id="3"),
+        ],
+        "iteration_count": 1,
+        "worker_result": "curto",
+    }
+    return checkpoint
+
+
+def roundtrip(saver: AsyncRedisSaver, checkpoint: dict) -> tuple[bytes, dict]:
+    """Encode the way aput stores a checkpoint document and decode the way aget_tuple reads it"""
+    document = orjson.dumps(saver._dump_checkpoint(checkpoint))
+    return document, saver._recursive_deserialize(orjson.loads(document)["channel_values"])
+
+
+def test_large_channels_are_packed_and_restored():
+    async def scenario():
+        compact = CompactRedisSaver(OFFLINE_REDIS_URL, serde=CompactSerializer(threshold=1024, level=3))
+        plain = AsyncRedisSaver(OFFLINE_REDIS_URL)
+        checkpoint = checkpoint_with_history()
+
+        packed, values = roundtrip(compact, checkpoint)
+        unpacked, _ = roundtrip(plain, checkpoint)
+
+        assert PACKED_KEY in orjson.loads(packed)["channel_values"]["messages"]
+        assert values == checkpoint["channel_values"]
+        assert len(packed) * 4 < len(unpacked)
+
+    asyncio.run(scenario())
+
+
+def test_existing_json_checkpoints_still_load():
+    async def scenario():
+        compact = CompactRedisSaver(OFFLINE_REDIS_URL, serde=CompactSerializer(threshold=1024, level=3))
+        checkpoint = checkpoint_with_history()
+        document = orjson.dumps(AsyncRedisSaver(OFFLINE_REDIS_URL)._dump_checkpoint(checkpoint))
+
+        assert compact._recursive_deserialize(orjson.loads(document)["channel_values"]) == checkpoint["channel_values"]
+
+    asyncio.run(scenario())
+
+
+def test_large_writes_use_the_packed_type_and_small_ones_stay_json():
+    serializer = CompactSerializer(threshold=1024, level=3)
+    messages = checkpoint_with_history()["channel_values"]["messages"]
+
+    type_, blob = serializer.dumps_typed(messages)
+
+    assert type_ == PACKED_TYPE
+    assert serializer.loads_typed((type_, blob)) == messages
+    assert serializer.dumps_typed({"decision": "approve"})[0] == "json"
+    assert CompactSerializer(threshold=None, level=3).dumps_typed(messages)[0] == "json"
+
+
+def test_large_strings_are_stored_once_by_reference_and_resolved(redis_url: str):
+    async def scenario():
+        saver = CompactRedisSaver(redis_url, serde=CompactSerializer(threshold=1024, level=3), ref_threshold=100)
+        thread_id = f"thread-{uuid4().hex}"
+        report = "pods em CrashLoopBackOff no namespace prod " * 10
+        values = {"worker_result": report, "iteration_count": 1}
+
+        first = await saver.store_refs(thread_id, values)
+        second = await saver.store_refs(thread_id, values)
+        key = first["worker_result"][REF_KEY]
+
+        assert first == second == {"worker_result": {REF_KEY: key}, "iteration_count": 1}
+        assert saver.counters == {"refs_stored": 1, "refs_reused": 1}
+        assert await saver._redis.get(key) in (report, report.encode())
+
+        loaded = await saver.resolve_refs(CheckpointTuple({}, {**empty_checkpoint(), "channel_values": first}, {}))
+        assert loaded.checkpoint["channel_values"] == values
+
+        await saver._redis.delete(key)
+        expired = await saver.resolve_refs(CheckpointTuple({}, {**empty_checkpoint(), "channel_values": second}, {}))
+        assert expired.checkpoint["channel_values"]["worker_result"] == ""
+        assert saver.counters["refs_missing"] == 1
+        await saver._redis.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_checkpoints_round_trip_through_redis_and_are_deleted_with_their_refs(redis_url: str):
+    async def scenario():
+        serde = CompactSerializer(threshold=1024, level=3)
+        thread_id = f"thread-{uuid4().hex}"
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        checkpoint = checkpoint_with_history()
+        checkpoint["channel_values"]["worker_result"] = "relatório do worker " * 500
+
+        async with CompactRedisSaver(redis_url, serde=serde, ref_threshold=4096) as saver:
+            await saver.aput(config, checkpoint, {"source": "loop", "step": 1}, {})
+            loaded = await saver.aget_tuple(config)
+
+            assert loaded is not None
+            assert loaded.checkpoint["id"] == checkpoint["id"]
+            assert loaded.checkpoint["channel_values"] == checkpoint["channel_values"]
+            assert saver.stats()["packed"] >= 1
+            assert saver.stats()["refs_stored"] == 1
+
+            await saver.adelete_thread(thread_id)
+
+            assert await saver.aget_tuple(config) is None
+            assert not [key async for key in saver._redis.scan_iter(match=f"{REF_PREFIX}:*{thread_id}*")]
+
+    asyncio.run(scenario())
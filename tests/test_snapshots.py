@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+from src.fanout import ToolFanout
+from src.resources import ResourceRow
+from src.snapshots import ClusterSnapshotter, SnapshotQuery
+from tests.conftest import FakeMCPTool
+
+
+def row(name: str, status: str = "Running", restarts: int = 0, owner: str = "api") -> ResourceRow:
+    return ResourceRow(name=name, namespace="prod", status=status, restarts=restarts, age="1h", owner=owner)
+
+
+def make_snapshotter() -> ClusterSnapshotter:
+    return ClusterSnapshotter(fanout=ToolFanout([], 1), kinds=("Pod",), interval=60, max_changes=100)
+
+
+def test_first_snapshot_is_a_baseline_and_later_ones_are_diffed():
+    snapshotter = make_snapshotter()
+    snapshotter.apply("ctx", "Pod", [row("api-1"), row("api-2"), row("old-1")], now=1000)
+
+    assert not snapshotter.changes
+
+    snapshotter.apply(
+        "ctx",
+        "Pod",
+        [row("api-1", restarts=3), row("api-2", status="CrashLoopBackOff"), row("new-1")],
+        now=1060,
+    )
+
+    changes = {(change.name, change.change) for change in snapshotter.changes}
+    assert changes == {("api-1", "restarts"), ("api-2", "status"), ("new-1", "criado"), ("old-1", "removido")}
+    assert len(snapshotter.recent_changes(1, now=1100)) == len(changes)
+    assert not snapshotter.recent_changes(1, now=1200)
+
+
+def test_index_query_intersects_fields_and_filters_restarts():
+    snapshotter = make_snapshotter()
+    snapshotter.apply(
+        "ctx",
+        "Pod",
+        [row("api-1", restarts=5), row("api-2", status="Pending"), row("job-1", restarts=9, owner="job")],
+    )
+    index = snapshotter.snapshots["ctx", "Pod"]
+
+    assert {r.name for r in index.query(owner="api")} == {"api-1", "api-2"}
+    assert {r.name for r in index.query(owner="api", status="Running")} == {"api-1"}
+    assert {r.name for r in index.query(min_restarts=5)} == {"api-1", "job-1"}
+    assert index.query(namespace="missing") == []
+
+
+def test_refresh_snapshots_every_context_through_the_tools(fake_mcp_tool: FakeMCPTool):
+    payload = json.dumps([{"name": "api-1", "namespace": "prod", "status": "Running"}])
+
+    async def coroutine(**_):
+        return payload
+
+    tool = fake_mcp_tool("list-k8s-resources", coroutine)
+    snapshotter = ClusterSnapshotter(ToolFanout([tool], 4), kinds=("Pod",), interval=60, max_changes=10)
+    snapshotter.contexts = ["a", "b"]
+
+    asyncio.run(snapshotter.refresh())
+
+    assert set(snapshotter.snapshots) == {("a", "Pod"), ("b", "Pod")}
+    assert "api-1" in snapshotter.render_resources(SnapshotQuery(context="a"))
+
+    [_, resources_tool] = snapshotter.tools()
+    assert "api-1" in asyncio.run(resources_tool.ainvoke({"context": "b", "min_restarts": 0}))
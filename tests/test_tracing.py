@@ -0,0 +1,70 @@
+import asyncio
+import json
+from pathlib import Path
+
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+
+from src.tracing import FileSink, Trace, Tracer
+
+
+@tool
+def list_pods(namespace: str) -> str:
+    """List pods"""
+    return f"pod-a Running ({namespace})"
+
+
+async def plan(question: str) -> str:
+    return await list_pods.ainvoke({"namespace": question})
+
+
+def make_tracer(sink: FileSink, sample_rate: float = 0.0, buffer_size: int = 8) -> Tracer:
+    return Tracer(
+        sink=sink, sample_rate=sample_rate, slow_seconds=60, batch_size=4, flush_interval=0.05, buffer_size=buffer_size
+    )
+
+
+def test_keep_reason_prefers_errors_then_slowness_then_sampling():
+    assert Trace("t", "q", sampled=False, start_ns=0, end_ns=1, error=True).keep_reason(60) == "error"
+    assert Trace("t", "q", sampled=False, start_ns=0, end_ns=int(61e9)).keep_reason(60) == "slow"
+    assert Trace("t", "q", sampled=True, start_ns=0, end_ns=1).keep_reason(60) == "sampled"
+    assert Trace("t", "q", sampled=False, start_ns=0, end_ns=1).keep_reason(60) is None
+
+
+def test_sampled_questions_are_recorded_and_exported_to_file(tmp_path: Path):
+    sink = FileSink(tmp_path / "traces.jsonl")
+    tracer = make_tracer(sink, sample_rate=1.0)
+
+    async def scenario():
+        with tracer.trace("channel_1", "default"):
+            await RunnableLambda(plan, name="create_plan").ainvoke("default")
+
+        exporter = asyncio.create_task(tracer.run())
+        await asyncio.sleep(0.2)
+        exporter.cancel()
+
+    asyncio.run(scenario())
+
+    [trace] = [json.loads(line) for line in sink.path.read_text().splitlines()]
+    spans = {span["name"]: span for span in trace["spans"]}
+
+    assert trace["thread_id"] == "channel_1"
+    assert spans["list_pods"]["parent_id"] == spans["create_plan"]["span_id"]
+    assert "pod-a Running" in spans["list_pods"]["attributes"]["output"]
+    assert tracer.stats()["exported"] == 1
+
+
+def test_unsampled_traces_are_discarded_and_a_full_buffer_drops(tmp_path: Path):
+    tracer = make_tracer(FileSink(tmp_path / "traces.jsonl"), buffer_size=1)
+
+    with tracer.trace("channel_1", "rápido"):
+        pass
+
+    for _ in range(3):
+        try:
+            with tracer.trace("channel_1", "falha"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+    assert tracer.stats() == {"discarded": 1, "error": 3, "dropped": 2, "buffered": 1, "enabled": True}
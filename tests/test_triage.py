@@ -0,0 +1,92 @@
+import asyncio
+import json
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
+
+from src.fanout import ToolFanout
+from src.triage import ClusterTriage, event_findings, node_findings, pod_findings, rank_findings
+from tests.conftest import FakeMCPTool
+
+PODS = [
+    {"name": "api-1", "namespace": "prod", "status": "CrashLoopBackOff", "restarts": 12},
+    {"name": "api-2", "namespace": "prod", "status": "Running", "restarts": 0},
+    {"name": "worker-1", "namespace": "jobs", "status": "Running", "restarts": 7},
+    {"name": "web-1", "namespace": "prod", "status": "Pending", "restarts": 0},
+]
+
+EVENTS = [
+    {"type": "Warning", "reason": "BackOff", "involvedObject": {"kind": "Pod", "name": "api-1"}, "count": 4},
+    {"type": "Warning", "reason": "BackOff", "involvedObject": {"kind": "Pod", "name": "api-1"}, "count": 2},
+    {"type": "Normal", "reason": "Pulled", "involvedObject": {"kind": "Pod", "name": "api-2"}},
+]
+
+NODES = [
+    {"metadata": {"name": "node-a"}, "status": {"conditions": [{"type": "Ready", "status": "True"}]}},
+    {
+        "metadata": {"name": "node-b"},
+        "status": {"conditions": [{"type": "Ready", "status": "True"}, {"type": "DiskPressure", "status": "True"}]},
+    },
+    {"name": "node-c", "status": "NotReady"},
+]
+
+
+def test_pod_findings_skip_healthy_pods_unless_restarting():
+    findings = pod_findings("ctx", PODS)
+
+    assert {finding.subject for finding in findings} == {"prod/api-1", "jobs/worker-1", "prod/web-1"}
+    assert rank_findings(findings)[0].subject == "prod/api-1"
+
+
+def test_warning_events_are_grouped_and_counted():
+    [finding] = event_findings("ctx", EVENTS)
+
+    assert finding.subject == "BackOff Pod/api-1"
+    assert finding.detail.startswith("6x")
+
+
+def test_node_findings_report_not_ready_and_pressure():
+    findings = rank_findings(node_findings("ctx", NODES))
+
+    assert [(finding.subject, finding.detail) for finding in findings] == [
+        ("node-c", "NotReady"),
+        ("node-b", "DiskPressure"),
+    ]
+
+
+@pytest.fixture
+def make_tool(fake_mcp_tool: FakeMCPTool):
+    def make(name: str, payload: list[dict], delay: float) -> StructuredTool:
+        async def coroutine(**_):
+            await asyncio.sleep(delay)
+            return json.dumps(payload)
+
+        return fake_mcp_tool(name, coroutine, server="k8s")
+
+    return make
+
+
+def test_probes_run_concurrently_across_contexts_and_failures_become_findings(make_tool):
+    tools = [
+        make_tool("list-k8s-resources", PODS, 0.1),
+        make_tool("list-k8s-events", EVENTS, 0.1),
+        make_tool("list-k8s-nodes", NODES, 0.5),
+    ]
+    triage = ClusterTriage(
+        fanout=ToolFanout(tools, 8),
+        model=RunnableLambda(lambda _: AIMessage(content="resumo")),
+        probe_timeout=0.2,
+        max_findings=3,
+    )
+
+    started = time.perf_counter()
+    report = asyncio.run(triage.run(["a", "b"]))
+
+    assert time.perf_counter() - started < 0.4
+    assert report.probes == 6
+    assert report.failed_probes == 2
+    assert report.findings[0].subject == "prod/api-1"
+    assert asyncio.run(triage.summarize(report)) == "resumo"
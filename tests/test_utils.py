@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from src.discord import SendPacer
+from src.utils import MAX_FENCE_LANGUAGE, split_content
+
+
+def test_short_content_is_a_single_chunk():
+    assert list(split_content("uma resposta curta", 2000)) == ["uma resposta curta"]
+
+
+def test_chunks_respect_the_limit_and_keep_all_words():
+    content = " ".join(f"palavra{i}" for i in range(2000))
+    chunks = list(split_content(content, 200))
+
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert " ".join(chunks).split() == content.split()
+
+
+def test_code_fences_are_closed_and_reopened_across_chunks():
+    rows = "\n".join(f"pod-{i}   Running   0   3d" for i in range(200))
+    content = f"Pods encontrados:\n```text\n{rows}\n```\nTudo certo."
+    chunks = list(split_content(content, 500))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert all(chunk.count("```") % 2 == 0 for chunk in chunks)
+    assert all(chunk.startswith("```text\n") for chunk in chunks[1:-1])
+    assert chunks[-1].endswith("Tudo certo.")
+
+
+def test_huge_content_without_spaces_is_cut_without_recursion():
+    chunks = list(split_content("x" * 500_000, 2000))
+
+    assert len(chunks) == 250
+    assert "".join(chunks) == "x" * 500_000
+
+
+def test_inline_triple_backticks_are_not_fences():
+    rows = "\n".join(f"pod-{i} em CrashLoopBackOff" for i in range(100))
+    content = f"```kubectl get pods``` lista os pods:\n{rows}"
+    chunks = list(split_content(content, 300))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert "\n".join(chunks) == content
+
+
+def test_reopened_fences_clip_a_long_language():
+    rows = "\n".join(f"linha {i}" for i in range(100))
+    chunks = list(split_content(f"```{'a' * 500}\n{rows}\n```", 200))
+
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert all(chunk.startswith(f"```{'a' * MAX_FENCE_LANGUAGE}\n") for chunk in chunks[2:])
+
+
+def test_whitespace_runs_never_become_chunks():
+    assert list(split_content("a" * 10 + "\n" * 30 + "b" * 10, 12)) == ["a" * 10, "b" * 10]
+    assert list(split_content(" " * 40, 12)) == []
+
+
+def test_reopened_fences_never_wrap_a_blank_chunk():
+    content = "```text\n" + "linha\n" + "\n" * 40 + "    fim\n```"
+    chunks = list(split_content(content, 20))
+
+    assert all(len(chunk) <= 20 for chunk in chunks)
+    assert all(chunk.replace("```text", "").replace("```", "").strip() for chunk in chunks)
+    assert chunks[-1] == "```text\n    fim\n```"
+
+
+def test_concurrent_sends_to_a_channel_respect_the_window():
+    pacer = SendPacer(burst=2, window=0.2)
+
+    async def scenario() -> list[float]:
+        started = time.monotonic()
+        sends: list[float] = []
+
+        async def send() -> None:
+            await pacer.wait(1)
+            sends.append(time.monotonic() - started)
+
+        await send()
+        await asyncio.sleep(0.1)
+        await send()
+        await asyncio.gather(send(), send())
+        return sends
+
+    sends = asyncio.run(scenario())
+
+    assert sends[3] >= 0.29
+
+
+def test_idle_channels_are_evicted_from_the_pacer():
+    pacer = SendPacer(burst=2, window=0.05)
+
+    async def scenario():
+        for channel_id in (1, 2, 3):
+            await pacer.wait(channel_id)
+
+        await asyncio.sleep(0.06)
+        await pacer.wait(4)
+
+    asyncio.run(scenario())
+
+    assert set(pacer.sent) == set(pacer.locks) == {4}
@@ -0,0 +1,194 @@
+import asyncio
+from dataclasses import replace
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis
+
+from src.constants import constants
+from src.workqueue import ShardWorker, WorkItem, WorkQueue, shard_for
+
+
+def test_threads_map_to_stable_shards():
+    shards = {shard_for(f"channel_{i}", 16) for i in range(200)}
+
+    assert shard_for("channel_42", 16) == shard_for("channel_42", 16)
+    assert shards <= set(range(16))
+    assert len(shards) > 8
+
+
+def test_work_item_round_trips_through_stream_fields():
+    item = WorkItem(
+        channel_id=1234567890123,
+        thread_id="channel_1234567890123",
+        question="pods em crash?",
+        user_id=987654321,
+    )
+
+    fields = item.to_fields()
+
+    assert all(isinstance(value, str) for value in fields.values())
+    assert WorkItem.from_fields(fields) == item
+
+
+@pytest.fixture
+def fast_polling(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.workqueue.constants", replace(constants, WORK_STREAM_BLOCK_MS=50))
+
+
+def make_worker(redis: Redis, prefix: str, worker_id: str, handler, shards: int = 1) -> ShardWorker:
+    queue = WorkQueue(redis, shards, prefix=prefix)
+    return ShardWorker(queue=queue, handler=handler, worker_id=worker_id, lease_ttl=5, max_concurrency=4)
+
+
+def question(n: int) -> WorkItem:
+    return WorkItem(channel_id=1, thread_id="channel_1", question=f"pergunta {n}")
+
+
+@pytest.mark.usefixtures("fast_polling")
+def test_owned_shards_are_consumed_in_order(redis_url: str):
+    async def scenario():
+        redis = Redis.from_url(redis_url, decode_responses=True)
+        handled: list[str] = []
+        done = asyncio.Event()
+
+        async def handler(item: WorkItem) -> None:
+            handled.append(item.question)
+
+            if len(handled) == 3:
+                done.set()
+
+        worker = make_worker(redis, f"test:{uuid4().hex}", "worker-a", handler)
+        await worker.ensure_groups()
+
+        for n in range(3):
+            await worker.queue.publish(question(n))
+
+        await worker.rebalance()
+        await asyncio.wait_for(done.wait(), 5)
+
+        assert handled == ["pergunta 0", "pergunta 1", "pergunta 2"]
+        assert await redis.xpending(worker.queue.stream(0), constants.WORK_STREAM_GROUP) == {
+            "pending": 0,
+            "min": None,
+            "max": None,
+            "consumers": [],
+        }
+        await worker.close()
+        await redis.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.usefixtures("fast_polling")
+def test_shards_are_renewed_and_rebalanced_across_workers(redis_url: str):
+    async def scenario():
+        redis = Redis.from_url(redis_url, decode_responses=True)
+        prefix = f"test:{uuid4().hex}"
+
+        async def handler(item: WorkItem) -> None:
+            pass
+
+        first = make_worker(redis, prefix, "worker-a", handler, shards=4)
+        second = make_worker(redis, prefix, "worker-b", handler, shards=4)
+        await first.ensure_groups()
+
+        await first.rebalance()
+        assert sorted(first.owned) == [0, 1, 2, 3]
+
+        await redis.pexpire(first.lease_key(0), 100)
+        consumers = list(first.owned.values())
+        await second.rebalance()
+        await first.rebalance()
+        assert await redis.pttl(first.lease_key(0)) > 100
+
+        released, _ = await asyncio.wait(consumers, timeout=0.5)
+        assert len(released) == 2
+        await second.rebalance()
+
+        assert sorted(first.owned) + sorted(second.owned) == [0, 1, 2, 3]
+        assert len(second.owned) == 2
+        await first.close()
+        await second.close()
+        await redis.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.usefixtures("fast_polling")
+def test_lost_lease_cancels_the_in_flight_item_and_the_new_owner_resumes_it(redis_url: str):
+    async def scenario():
+        redis = Redis.from_url(redis_url, decode_responses=True)
+        prefix = f"test:{uuid4().hex}"
+        started = asyncio.Event()
+        cancelled: list[str] = []
+        resumed = asyncio.Event()
+
+        async def stalled(item: WorkItem) -> None:
+            started.set()
+
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(item.question)
+                raise
+
+        async def handler(item: WorkItem) -> None:
+            assert item.question == "pergunta 0"
+            resumed.set()
+
+        first = make_worker(redis, prefix, "worker-a", stalled)
+        second = make_worker(redis, prefix, "worker-b", handler)
+        await first.ensure_groups()
+        await first.queue.publish(question(0))
+
+        await first.rebalance()
+        await asyncio.wait_for(started.wait(), 5)
+
+        await redis.delete(first.lease_key(0))
+        await second.rebalance()
+        in_flight = first.owned[0]
+        await first.rebalance()
+        await asyncio.wait([in_flight], timeout=5)
+        await asyncio.wait_for(resumed.wait(), 5)
+
+        assert cancelled == ["pergunta 0"]
+        assert first.processed == 0
+        assert not first.owned
+        assert await redis.get(first.lease_key(0)) == "worker-b"
+        await second.close()
+        await first.close()
+        await redis.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.usefixtures("fast_polling")
+def test_expired_lease_without_a_new_owner_is_reacquired(redis_url: str):
+    async def scenario():
+        redis = Redis.from_url(redis_url, decode_responses=True)
+        started = asyncio.Event()
+
+        async def stalled(_: WorkItem) -> None:
+            started.set()
+            await asyncio.sleep(10)
+
+        worker = make_worker(redis, f"test:{uuid4().hex}", "worker-a", stalled)
+        await worker.ensure_groups()
+        await worker.queue.publish(question(0))
+
+        await worker.rebalance()
+        await asyncio.wait_for(started.wait(), 5)
+        in_flight = worker.owned[0]
+
+        await redis.delete(worker.lease_key(0))
+        await worker.rebalance()
+
+        assert worker.owned == {0: in_flight}
+        assert not in_flight.cancelled()
+        assert not worker.stopping
+        assert await redis.get(worker.lease_key(0)) == "worker-a"
+        await worker.close()
+        await redis.aclose()
+
+    asyncio.run(scenario())